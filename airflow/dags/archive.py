@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+from airflow.decorators import task, dag
+import sys
+
+sys.path.append('/autotracker/src')
+from helper_io import archive_activity
+
+
+default_args = {
+    "owner": "autotracker",
+    "retries": 2,
+    "retry_delay": timedelta(seconds=10),
+    "start_date": datetime(2024, 1, 1)
+}
+
+
+@dag(default_args=default_args, schedule=timedelta(days=1), catchup=False)
+def archive():
+    @task
+    def archive_old_activity() -> None:
+        archive_activity()
+
+    archive_old_activity()
+
+
+archive()
@@ -7,10 +7,10 @@ import sys
 
 sys.path.append('/autotracker/src')
 from helper_io import load_config
+from helper_database import POOL
 
 
 BACKUP_FOLDER = '/autotracker/backup'
-DATABASE_FOLDER = '/autotracker/data/activity.db'
 DATE_FORMAT = "%Y-%m-%d-%H-%M"
 default_args = {
     "owner": "autotracker",
@@ -41,7 +41,7 @@ def backup():
         # Create backup
         now = datetime.now()
         shutil.copy2(
-            DATABASE_FOLDER,
+            POOL.path("activity"),
             join(BACKUP_FOLDER, f'{now.strftime(DATE_FORMAT)}.db')
         )
 
@@ -1,15 +1,41 @@
+CREATE TABLE IF NOT EXISTS "dim_app" (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS "dim_info" (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS "dim_process_name" (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS "dim_url" (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS "dim_domain" (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
 CREATE TABLE IF NOT EXISTS "activity" (
     start_time INTEGER NOT NULL,
     end_time INTEGER NOT NULL,
-    app TEXT DEFAULT "" NOT NULL,
-    info TEXT DEFAULT "" NOT NULL,
-    process_name TEXT NOT NULL,
-    url TEXT DEFAULT "" NOT NULL,
-    domain TEXT DEFAULT "" NOT NULL,
+    app_id INTEGER NOT NULL REFERENCES dim_app (id),
+    info_id INTEGER NOT NULL REFERENCES dim_info (id),
+    process_name_id INTEGER NOT NULL REFERENCES dim_process_name (id),
+    url_id INTEGER NOT NULL REFERENCES dim_url (id),
+    domain_id INTEGER NOT NULL REFERENCES dim_domain (id),
     duration INTEGER GENERATED ALWAYS AS (
         end_time - start_time
     ) STORED NOT NULL,
     total REAL GENERATED ALWAYS AS (
         duration / 3600.0
-    ) STORED NOT NULL
-)
+    ) STORED NOT NULL,
+    day TEXT DEFAULT "" NOT NULL
+);
+CREATE INDEX IF NOT EXISTS "idx_activity_start_time" ON "activity" (start_time);
+CREATE INDEX IF NOT EXISTS "idx_activity_end_time" ON "activity" (end_time);
+CREATE INDEX IF NOT EXISTS "idx_activity_process_name" ON "activity" (process_name_id);
+CREATE INDEX IF NOT EXISTS "idx_activity_domain" ON "activity" (domain_id);
+CREATE INDEX IF NOT EXISTS "idx_activity_day" ON "activity" (day);
@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS "activity_partitions" (
+    period INTEGER PRIMARY KEY,
+    first_rowid INTEGER NOT NULL,
+    last_rowid INTEGER NOT NULL,
+    first_start INTEGER NOT NULL,
+    last_start INTEGER NOT NULL,
+    first_day TEXT NOT NULL,
+    last_day TEXT NOT NULL
+)
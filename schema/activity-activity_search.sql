@@ -0,0 +1,39 @@
+CREATE VIRTUAL TABLE IF NOT EXISTS "activity_search" USING fts5(
+    info, url, domain,
+    content = 'activity_view', content_rowid = 'rowid'
+);
+CREATE TRIGGER IF NOT EXISTS "activity_search_insert"
+AFTER INSERT ON "activity" BEGIN
+    INSERT INTO activity_search (rowid, info, url, domain) VALUES (
+        new.rowid,
+        (SELECT value FROM dim_info WHERE id = new.info_id),
+        (SELECT value FROM dim_url WHERE id = new.url_id),
+        (SELECT value FROM dim_domain WHERE id = new.domain_id)
+    );
+END;
+CREATE TRIGGER IF NOT EXISTS "activity_search_delete"
+AFTER DELETE ON "activity" BEGIN
+    INSERT INTO activity_search (activity_search, rowid, info, url, domain)
+    VALUES (
+        'delete', old.rowid,
+        (SELECT value FROM dim_info WHERE id = old.info_id),
+        (SELECT value FROM dim_url WHERE id = old.url_id),
+        (SELECT value FROM dim_domain WHERE id = old.domain_id)
+    );
+END;
+CREATE TRIGGER IF NOT EXISTS "activity_search_update"
+AFTER UPDATE OF info_id, url_id, domain_id ON "activity" BEGIN
+    INSERT INTO activity_search (activity_search, rowid, info, url, domain)
+    VALUES (
+        'delete', old.rowid,
+        (SELECT value FROM dim_info WHERE id = old.info_id),
+        (SELECT value FROM dim_url WHERE id = old.url_id),
+        (SELECT value FROM dim_domain WHERE id = old.domain_id)
+    );
+    INSERT INTO activity_search (rowid, info, url, domain) VALUES (
+        new.rowid,
+        (SELECT value FROM dim_info WHERE id = new.info_id),
+        (SELECT value FROM dim_url WHERE id = new.url_id),
+        (SELECT value FROM dim_domain WHERE id = new.domain_id)
+    );
+END;
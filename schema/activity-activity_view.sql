@@ -1,5 +1,19 @@
 DROP VIEW IF EXISTS "activity_view";
 CREATE VIEW IF NOT EXISTS "activity_view" AS
-SELECT *,
-    strftime('%Y-%m-%d', start_time + (3600 * (SELECT value FROM settings WHERE label="gmt_offset")), 'unixepoch') as day
-FROM activity
+SELECT a.start_time,
+    a.end_time,
+    app.value AS app,
+    info.value AS info,
+    process_name.value AS process_name,
+    url.value AS url,
+    domain.value AS domain,
+    a.duration,
+    a.total,
+    a.day,
+    a.rowid AS rowid
+FROM activity a
+JOIN dim_app app ON app.id = a.app_id
+JOIN dim_info info ON info.id = a.info_id
+JOIN dim_process_name process_name ON process_name.id = a.process_name_id
+JOIN dim_url url ON url.id = a.url_id
+JOIN dim_domain domain ON domain.id = a.domain_id
@@ -1,4 +1,3 @@
-DROP TABLE IF EXISTS "settings";
 CREATE TABLE IF NOT EXISTS "settings" (
     label TEXT NOT NULL,
     value NOT NULL,
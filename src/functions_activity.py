@@ -5,28 +5,53 @@ Updates DataFrame with current activity.
 # pylint: disable=c-extension-no-member, import-error, no-name-in-module
 import time
 import re
-from typing import Optional
-from threading import Thread
+from typing import Any, Optional
 from urllib.parse import urlparse
-from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, wait
 import pandas as pd
 import numpy as np
 import pywinctl as pwc
 from helper_server import format_long_duration
 from helper_io import (
-    load_dataframe,
+    iter_dataframe,
     load_input_time,
-    append_to_database,
-    save_dataframe,
+    append_activity,
+    load_dimensions,
+    queue_dataframe,
     load_url,
     load_config,
     load_latest_row,
     modify_latest_row,
+    save_input_time,
     load_categories,
-    timestamp_to_day,
+    local_day,
+    utc_offset,
+    update_day_settings,
+    load_hot_activity,
+    refresh_activity_partitions,
+    load_archive_files,
+    load_archive_sums,
+    CHANGES,
+    JOURNAL,
+    HOT,
+    SAMPLES,
     retry,
 )
+from helper_samples import fold_samples, IDLE, UNKNOWN, SESSION_COLUMNS
+
+DAY_SETTINGS = {"timezone": None}
+BUILD: dict = {"categories": None}
+SESSION: dict = {"row": None, "dirty": False, "flushed": 0.0, "folded": 0.0}
+PARTITION_SUMS: dict[int, tuple[tuple, pd.DataFrame]] = {}
+ARCHIVE_SUMS: dict[str, tuple[tuple, pd.DataFrame]] = {}
+CATEGORY_KEYS = ["process_name", "day", "subtitle", "category", "method"]
+CODE_KEYS = ["process_name_id", "domain_id", "info_id", "day"]
+CATEGORIZED = CODE_KEYS + ["total", "duration"]
+CHOICES = [
+    "Work(A)", "Personal(A)",
+    "Work(D)", "Personal(D)", "Neutral(D)",
+    "Work(K)", "Personal(K)",
+]
 
 
 @retry(wait=0.25, log_result=True)
@@ -120,100 +145,123 @@ def detect_idle() -> Optional[bool]:
     return False
 
 
-def parse_data(data: tuple[int, str, str, str, str]) -> pd.DataFrame:
+def flush_session() -> None:
     """
-    Transforms the raw data into an appropriate form for processing.
+    Writes the buffered end of the open session to the activity
+    database and empties the journal.
+    """
+    session = SESSION["row"]
+    if session is not None and SESSION["dirty"]:
+        modify_latest_row("activity", session, ["end_time"])
+        JOURNAL.clear()
+    SESSION["dirty"] = False
+    SESSION["flushed"] = time.monotonic()
+
+
+def session_values(row: pd.DataFrame) -> list:
+    """
+    Converts the latest activity row into an open session for folding.
 
     Args:
-        tuple[int, str, str, str, str]: time of detection, \
-            active window title, process name, url and domain.
+        row (pd.DataFrame): Latest row of the activity view.
 
     Returns:
-        pd.DataFrame: Dataframe with parsed data.
+        list: Values of the SESSION_COLUMNS.
     """
-    parsed = {
-        "start_time": [data[0]],
-        "end_time": [data[0]],
-        "app": [data[1].split(" - ")[-1]],
-        "info": [data[1]],
-        "process_name": data[2],
-        "url": data[3],
-        "domain": data[4],
-    }
-    return pd.DataFrame(parsed)
+    values = row.loc[0, SESSION_COLUMNS].tolist()
+    values[0], values[1] = int(values[0]), int(values[1])
+    return values
 
 
-def join(current_act: pd.DataFrame) -> None:
+def fold_sessions() -> None:
     """
-    Tries to join current activity to previous activity,
-    adds activity otherwise.
-
-    Args:
-        pd.DataFrame: Dataframe with parsed data from latest activity.
+    Folds the new samples of the log into activity sessions. The open
+    session is extended in memory and journaled, being written to the
+    database on a cadence and when a new session starts. New sessions
+    are appended in one batch.
     """
     cfg = load_config()
-    previous_act = load_latest_row("activity")
+    SAMPLES.flush()
+    SESSION["folded"] = time.monotonic()
+    previous_act = SESSION["row"]
     if previous_act is None:
+        previous_act = load_latest_row("activity")
+    session = None if previous_act is None else session_values(previous_act)
+    samples = SAMPLES.read(None if session is None else session[1])
+    if samples.empty:
         return
-    start1, start2 = previous_act["start_time"], current_act["start_time"]
-    assert isinstance(start1, pd.Series) and isinstance(start2, pd.Series)
-
-    # Check if merge should be done and if events are on the same day
-    same_event = all(previous_act.iloc[0, 2:7] == current_act.iloc[0, 2:7])
-    same_event &= all(timestamp_to_day(start1) == timestamp_to_day(start2))
-
-    not_idle = (
-        int(time.time()) - previous_act.loc[0, "end_time"]
-    ) < cfg["IDLE_TIME"]
-
-    if not_idle:
-        if same_event:  # Join to last event
-            previous_act.loc[0, "end_time"] = current_act.loc[0, "end_time"]
-            modify_latest_row("activity", previous_act, ["end_time"])
-        else:  # Append and connect to last event
-            new_time = previous_act.loc[0, "end_time"]
-            current_act.loc[0, "start_time"] = new_time
-            append_to_database("activity", current_act)
-    else:  # Raw append
-        current_act.loc[0, "start_time"] -= 1
-        append_to_database("activity", current_act)
-
-
-def categories_sum(dataframe: pd.DataFrame) -> pd.DataFrame:
+    sessions = fold_samples(samples, session, cfg["IDLE_TIME"], local_day)
+
+    if session is not None and previous_act is not None:
+        sessions.pop(0)
+        end_time = session[1]
+        if end_time > previous_act.loc[0, "end_time"]:
+            rowid = int(previous_act.loc[0, "rowid"])
+            previous_act.loc[0, "end_time"] = end_time
+            JOURNAL.append(rowid, end_time)
+            HOT.extend(rowid, end_time)
+            SESSION["dirty"] = True
+        SESSION["row"] = previous_act
+
+    if sessions:
+        flush_session()
+        SESSION["row"] = None
+        append_activity(pd.DataFrame(sessions, columns=SESSION_COLUMNS))
+    elif time.monotonic() - SESSION["flushed"] >= \
+            cfg["SESSION_FLUSH_INTERVAL"]:
+        flush_session()
+
+
+def match_categories(
+    process_name: pd.Series, domain: pd.Series, info: pd.Series, cfg2: dict
+) -> list[pd.Series]:
     """
-    Generates the sum of time of equivalent rows in the input dataframe.
+    Evaluates the categorization rules, in order of priority.
+    Each rule only looks at one of the inputs.
 
     Args:
-        dataframe (pd.DataFrame): Activity dataframe.
+        process_name (pd.Series): Process names.
+        domain (pd.Series): Domains.
+        info (pd.Series): Window titles.
+        cfg2 (dict): Categories config.
 
     Returns:
-        pd.DataFrame: Aggregated categorized dataframe.
+        list[pd.Series]: Matches of each rule of CHOICES.
     """
-    cfg2 = load_categories()
-
-    # Choose event category and method of choosing
-    conds = [
-        dataframe["process_name"].str.contains(
+    return [
+        process_name.str.contains(
             "|".join(cfg2["WORK_APPS"]), case=False, regex=True),
-        dataframe["process_name"].str.contains(
+        process_name.str.contains(
             "|".join(cfg2["PERSONAL_APPS"]), case=False, regex=True),
-        dataframe["domain"].str.contains(
+        domain.str.contains(
             "|".join(cfg2["WORK_DOMAINS"]), case=False, regex=True),
-        dataframe["domain"].str.contains(
+        domain.str.contains(
             "|".join(cfg2["PERSONAL_DOMAINS"]), case=False, regex=True),
-        dataframe["domain"] != "",
-        dataframe["info"].str.contains(
+        domain != "",
+        info.str.contains(
             "|".join(cfg2["WORK_KEYWORDS"]), case=False, regex=True),
-        dataframe["info"].str.contains(
+        info.str.contains(
             "|".join(cfg2["PERSONAL_KEYWORDS"]), case=False, regex=True),
     ]
-    choices = [
-        "Work(A)", "Personal(A)",
-        "Work(D)", "Personal(D)", "Neutral(D)",
-        "Work(K)", "Personal(K)",
-    ]
 
-    dataframe["category"] = np.select(conds, choices, default="Neutral(E)")
+
+def categorize(dataframe: pd.DataFrame, cfg2: dict) -> pd.DataFrame:
+    """
+    Categorizes activity rows and sums the time of equivalent rows.
+
+    Args:
+        dataframe (pd.DataFrame): Activity dataframe.
+        cfg2 (dict): Categories config.
+
+    Returns:
+        pd.DataFrame: Aggregated categorized dataframe, unsorted.
+    """
+    # Choose event category and method of choosing
+    conds = match_categories(
+        dataframe["process_name"], dataframe["domain"], dataframe["info"],
+        cfg2
+    )
+    dataframe["category"] = np.select(conds, CHOICES, default="Neutral(E)")
 
     dataframe.loc[:, "method"] = dataframe["category"].str[-3:]
     dataframe.loc[:, "category"] = dataframe["category"].str[:-3]
@@ -224,12 +272,82 @@ def categories_sum(dataframe: pd.DataFrame) -> pd.DataFrame:
     dataframe["subtitle"] = np.select(conds, choices, default="")
 
     # Aggregate events to simply visualization
-    df_sum = (
-        dataframe.groupby(
-            ["process_name", "day", "subtitle", "category", "method"])
+    return merge_categories([dataframe])
+
+
+def categorize_codes(
+    dataframe: pd.DataFrame, dimensions: dict[str, pd.Series], cfg2: dict
+) -> pd.DataFrame:
+    """
+    Categorizes activity sums that hold dimension ids. The rules run
+    once per distinct string instead of once per row.
+
+    Args:
+        dataframe (pd.DataFrame): Sums of time by CODE_KEYS.
+        dimensions (dict[str, pd.Series]): Strings indexed by id.
+        cfg2 (dict): Categories config.
+
+    Returns:
+        pd.DataFrame: Aggregated categorized dataframe, unsorted.
+    """
+    rules = match_categories(
+        dimensions["process_name"], dimensions["domain"],
+        dimensions["info"], cfg2
+    )
+    columns = ["process_name_id"] * 2 + ["domain_id"] * 3 + ["info_id"] * 2
+    conds = [
+        rule.reindex(dataframe[col], fill_value=False).to_numpy(dtype=bool)
+        for col, rule in zip(columns, rules)
+    ]
+    category = pd.Series(
+        np.select(conds, CHOICES, default="Neutral(E)"), dataframe.index)
+
+    def strings(col: str) -> np.ndarray:
+        return dimensions[col].reindex(dataframe[f"{col}_id"]).to_numpy()
+
+    decoded = dataframe[["day", "total", "duration"]].copy()
+    decoded["process_name"] = strings("process_name")
+    decoded["category"] = category.str[:-3]
+    decoded["method"] = category.str[-3:]
+    decoded["subtitle"] = np.select(
+        [conds[4], decoded["method"] != "(A)"],
+        [strings("domain"), strings("info")], default=""
+    )
+    return merge_categories([decoded])
+
+
+def merge_categories(
+    dataframes: list[pd.DataFrame], keys: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """
+    Sums the time of equivalent rows across categorized dataframes.
+
+    Args:
+        dataframes (list[pd.DataFrame]): Categorized dataframes.
+        keys (list[str], optional): Columns of equivalent rows.
+            Defaults to CATEGORY_KEYS.
+
+    Returns:
+        pd.DataFrame: Aggregated categorized dataframe, unsorted.
+    """
+    return (
+        pd.concat(dataframes, ignore_index=True)
+        .groupby(CATEGORY_KEYS if keys is None else keys, observed=True)
         .agg({"total": "sum", "duration": "sum"})
         .reset_index()
     )
+
+
+def format_categories(df_sum: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sorts aggregated categories and formats their durations.
+
+    Args:
+        df_sum (pd.DataFrame): Aggregated categorized dataframe.
+
+    Returns:
+        pd.DataFrame: Categories ready to be saved.
+    """
     df_sum = df_sum.sort_values(by=["day", "duration"], ascending=False)
     durations = df_sum["duration"].apply(format_long_duration)
     df_sum = df_sum.astype({"duration": "str"})
@@ -237,52 +355,175 @@ def categories_sum(dataframe: pd.DataFrame) -> pd.DataFrame:
     return df_sum
 
 
+def categories_sum(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Generates the sum of time of equivalent rows in the input dataframe.
+
+    Args:
+        dataframe (pd.DataFrame): Activity dataframe.
+
+    Returns:
+        pd.DataFrame: Aggregated categorized dataframe.
+    """
+    return format_categories(categorize(dataframe, load_categories()))
+
+
+def partition_sums(partition: Any) -> Optional[pd.DataFrame]:
+    """
+    Sums the time of the events of a partition of the activity database
+    chunk by chunk. Sums of closed partitions are kept, so they are only
+    read once.
+
+    Args:
+        partition (Any): Row of the partitions of the activity database.
+
+    Returns:
+        Optional[pd.DataFrame]: Sums of time by CODE_KEYS, None if the
+            partition has no events.
+    """
+    key = (
+        partition.first_rowid, partition.last_rowid,
+        partition.first_day, partition.last_day
+    )
+    cached = PARTITION_SUMS.get(partition.period)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    # Events of other partitions may share the rowid range
+    where = [
+        ("rowid", ">=", partition.first_rowid),
+        ("start_time", ">=", partition.low)
+    ]
+    if not partition.latest:
+        where += [
+            ("rowid", "<=", partition.last_rowid),
+            ("start_time", "<", partition.high)
+        ]
+    sums = None
+    for chunk in iter_dataframe("activity", where_cond=where,
+                                columns=CATEGORIZED):
+        part = merge_categories([chunk], CODE_KEYS)
+        sums = part if sums is None else merge_categories(
+            [sums, part], CODE_KEYS)
+    if partition.closed and sums is not None:
+        PARTITION_SUMS[partition.period] = (key, sums)
+    return sums
+
+
+def archived_sums() -> list[pd.DataFrame]:
+    """
+    Sums the time of the archived events of every month. Sums are kept
+    until the file of their month changes.
+
+    Returns:
+        list[pd.DataFrame]: Sums of time by process name, domain,
+            window title and day of each month.
+    """
+    files = load_archive_files()
+    for month in set(ARCHIVE_SUMS) - set(files):
+        del ARCHIVE_SUMS[month]
+    for month, key in files.items():
+        cached = ARCHIVE_SUMS.get(month)
+        if cached is None or cached[0] != key:
+            sums = load_archive_sums(month)
+            assert sums is not None
+            ARCHIVE_SUMS[month] = (key, sums)
+    return [ARCHIVE_SUMS[month][1] for month in files]
+
+
 def create_categories_database(partial: bool = False) -> None:
     """
-    Wrapper function for creating categories DB.
+    Wrapper function for creating categories DB. The complete DB is
+    aggregated partition by partition, only reading the partitions that
+    changed, and chunk by chunk, so memory does not grow with history.
+    Archived months are categorized from their own sums. The partial
+    DB is aggregated from today's events in memory and only saved every
+    HOT_CHECKPOINT_INTERVAL seconds and on new days.
 
     Args:
         partial (bool, optional): Create partial categories DB?
             Defaults to False.
     """
     if partial:
-        act = load_dataframe(
-            "activity", False, 'activity_view',
-            False, ('day', '=', datetime.now().date()))
+        sums = load_hot_activity(local_day())
+        if sums is None or sums.empty or \
+                not HOT.due(load_config()["HOT_CHECKPOINT_INTERVAL"]):
+            return
+        cat_df = categories_sum(sums)
+        HOT.checkpoint()
     else:
-        act = load_dataframe("activity", False, 'activity_view', False)
-
-    if act is None:
-        return
-    cat_df = categories_sum(act)
-    arg = (cat_df, "activity", f"categories{'_partial' if partial else ''}")
-    categories_thread = Thread(target=save_dataframe, args=arg)
-    categories_thread.daemon = True
-    categories_thread.start()
+        partitions = refresh_activity_partitions()
+        assert partitions is not None
+        for period in set(PARTITION_SUMS) - set(partitions["period"]):
+            del PARTITION_SUMS[period]
+        parts = [
+            partition_sums(partition)
+            for partition in partitions.itertuples(index=False)
+        ]
+        parts = [part for part in parts if part is not None]
+        archived = archived_sums()
+        categorized = []
+        if parts:
+            # Strings interned while reading are known once chunks are done
+            categorized.append(categorize_codes(
+                merge_categories(parts, CODE_KEYS), load_dimensions(),
+                load_categories()
+            ))
+        if archived:
+            categorized.append(categorize(
+                pd.concat(archived, ignore_index=True), load_categories()))
+        if not categorized:
+            return
+        cat_df = format_categories(merge_categories(categorized))
+
+    table = f"categories{'_partial' if partial else ''}"
+    queue_dataframe(cat_df, "activity", table)
 
 
 def parser() -> None:
-    """Parses raw activity and creates appropriate partial categories DBs."""
-    # Get raw data
+    """
+    Samples the active window into the sample log. Every
+    SAMPLE_FOLD_INTERVAL seconds, the log is folded into activity
+    sessions and the partial categories DB is updated.
+    """
+    cfg = load_config()
     raw_data = detect_activity()
     idle_data = detect_idle()
 
+    flags = IDLE if idle_data or (idle_data is None) else 0
     if raw_data is not None:
-        arg = (pd.DataFrame({"time": [int(time.time())]}), "backend")
-        save_thread = Thread(target=save_dataframe, args=arg)
-        save_thread.daemon = True
-        save_thread.start()
-
-    if idle_data or (raw_data is None) or (idle_data is None):
-        raw_data = (int(time.time()), "Time not counted", "IDLE TIME", "", "")
-
-    # Parse and add to activity file
-    parsed_data = parse_data(raw_data)
-    join(parsed_data)
+        save_input_time("backend")
+    else:
+        flags |= UNKNOWN
+        raw_data = (int(time.time()), "", "", "", "")
+    SAMPLES.append(raw_data[0], flags, *raw_data[1:])
 
-    create_categories_database(True)
+    if time.monotonic() - SESSION["folded"] >= cfg["SAMPLE_FOLD_INTERVAL"]:
+        fold_sessions()
+        create_categories_database(True)
 
 
 def secondary_parser() -> None:
-    """Parses activity DB and creates complete categories DB."""
-    create_categories_database(False)
+    """
+    Parses activity DB and creates complete categories DB, only when
+    the activity or the category rules changed since the last run.
+    """
+    changed = bool(CHANGES.poll("activity_processor", ["activity"]))
+
+    # Keep the totals view offset in sync across DST transitions
+    cfg = load_config()
+    timezone = (cfg["TZNAME"], utc_offset(cfg["TZINFO"]))
+    if DAY_SETTINGS["timezone"] != timezone:
+        update_day_settings()
+        PARTITION_SUMS.clear()
+        DAY_SETTINGS["timezone"] = timezone
+        changed = True
+
+    # The cached rules are replaced when the file changes
+    categories = load_categories()
+    changed |= BUILD["categories"] is not categories
+
+    if changed:
+        create_categories_database(False)
+    BUILD["categories"] = categories
+    CHANGES.ack("activity_processor")
@@ -10,6 +10,7 @@ import os
 import sys
 import logging
 import shutil
+import signal
 from typing import Any
 from datetime import datetime, timedelta
 from flask import request, jsonify, Flask
@@ -19,12 +20,16 @@ from pynput import keyboard
 from pyautogui import position
 import dash_bootstrap_components as dbc
 from dash import Dash, html, dcc, Input, Output, callback
-from functions_activity import parser, secondary_parser
-from helper_io import save_dataframe, load_config, retry
+from functions_activity import parser, secondary_parser, flush_session, \
+    fold_sessions
+from helper_io import save_dataframe, save_input_time, load_config, retry, \
+    publish_snapshots, use_snapshots
+from helper_writer import WRITERS
 from pages import layout_categorization, layout_dashboard, layout_activity, layout_categories, \
     layout_inputs, layout_credits, layout_configuration, \
     layout_urls, layout_milestones, layout_trends, layout_all, \
-    layout_conflicts, layout_flashcards, layout_registering
+    layout_conflicts, layout_flashcards, layout_registering, layout_search, \
+    layout_queries
 
 
 @retry(attempts=2, wait=1.0)
@@ -38,7 +43,7 @@ def mouse_idle_detector() -> None:
         cfg = load_config()
         new_position = position()
         if new_position != last_position:
-            save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'mouse')
+            save_input_time('mouse')
             last_position = new_position
         time.sleep(cfg['IDLE_CHECK_INTERVAL'])
 
@@ -50,7 +55,7 @@ def keyboard_idle_detector() -> None:
     after detection to actively look for activity again.
     """
     def track_activity(*_args: Any) -> None:
-        save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'keyboard')
+        save_input_time('keyboard')
 
     while True:
         cfg = load_config()
@@ -64,21 +69,38 @@ def activity_detector() -> None:
     """
     Detects window activity. Waits a couple of seconds
     after detection to actively look for activity again.
+    Buffered samples, the open session and queued writes are saved
+    on shutdown.
     """
-    while True:
-        cfg = load_config()
-        parser()
-        time.sleep(cfg['ACTIVITY_CHECK_INTERVAL'])
+    def shutdown(*_args: Any) -> None:
+        sys.exit()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        while True:
+            cfg = load_config()
+            parser()
+            time.sleep(cfg['ACTIVITY_CHECK_INTERVAL'])
+    finally:
+        fold_sessions()
+        flush_session()
+        WRITERS.flush()
 
 
 @retry(attempts=2, wait=1.0)
 def activity_processor() -> None:
     """
-    Process activity database into categories and total databases.
+    Process activity database into categories and total databases,
+    then publish the snapshot read by the dashboard.
     """
+    published = 0.0
     while True:
         cfg = load_config()
         secondary_parser()
+        interval = cfg['SNAPSHOT_INTERVAL']
+        if 0 < interval <= time.time() - published:
+            publish_snapshots()
+            published = time.time()
         time.sleep(cfg['PARTIAL_CATEGORIES_INTERVAL'])
 
 
@@ -96,12 +118,13 @@ def audio_idle_detector() -> None:
             data = mic.record(numframes=10000)
             time.sleep(1)
         if any(x.any() != 0 for x in data):
-            save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'audio')
+            save_input_time('audio')
         time.sleep(cfg['IDLE_CHECK_INTERVAL'])
 
 
 def server_supervisor() -> None:
     """Server runner function."""
+    use_snapshots()
     external_stylesheets = [dbc.themes.BOOTSTRAP]
     app = Dash(
         __name__,
@@ -132,6 +155,8 @@ def server_supervisor() -> None:
                 layout = layout_categories.layout
             case "/inputs":
                 layout = layout_inputs.layout
+            case "/queries":
+                layout = layout_queries.layout
             case "/credits":
                 layout = layout_credits.layout
             case "/configuration":
@@ -144,6 +169,8 @@ def server_supervisor() -> None:
                 layout = layout_trends.layout
             case "/all":
                 layout = layout_all.layout
+            case "/search":
+                layout = layout_search.layout
             case "/urls":
                 layout = layout_urls.layout
             case "/milestones":
@@ -0,0 +1,127 @@
+"""
+Collection of helper functions for the Parquet archive of old activity.
+"""
+import os
+from os.path import exists, join
+from typing import Optional
+import pandas as pd
+
+ARCHIVE_COLUMNS = [
+    "start_time", "end_time", "app", "info", "process_name", "url",
+    "domain", "duration", "total", "day", "rowid"
+]
+SUM_KEYS = ["process_name", "domain", "info", "day"]
+COMPRESSION = "zstd"
+
+
+def month_path(folder: str, month: str) -> str:
+    """
+    Gets the path of the archive file of a month.
+
+    Args:
+        folder (str): Archive folder.
+        month (str): Month yyyy-mm.
+
+    Returns:
+        str: Path of the Parquet file.
+    """
+    return join(folder, f"activity-{month}.parquet")
+
+
+def archive_files(folder: str) -> dict[str, tuple[int, int]]:
+    """
+    Lists the archived months with the modification time and size of
+    their files, which change whenever a month is written again.
+
+    Args:
+        folder (str): Archive folder.
+
+    Returns:
+        dict[str, tuple[int, int]]: File signature by month yyyy-mm.
+    """
+    if not exists(folder):
+        return {}
+    files = {}
+    for file in sorted(os.listdir(folder)):
+        if file.startswith("activity-") and file.endswith(".parquet"):
+            stat = os.stat(join(folder, file))
+            files[file[9:16]] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def write_archive(folder: str, dataframe: pd.DataFrame) -> None:
+    """
+    Adds events to the files of their months. Each file is rewritten
+    and replaced atomically, and events already archived are kept once.
+
+    Args:
+        folder (str): Archive folder.
+        dataframe (pd.DataFrame): Events with the ARCHIVE_COLUMNS.
+    """
+    os.makedirs(folder, exist_ok=True)
+    for month, rows in dataframe.groupby(dataframe["day"].str[:7]):
+        path = month_path(folder, str(month))
+        if exists(path):
+            rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+        rows = rows[ARCHIVE_COLUMNS].drop_duplicates("rowid", keep="last")
+        partial = f"{path}.partial"
+        rows.sort_values("rowid").to_parquet(
+            partial, compression=COMPRESSION, index=False)
+        os.replace(partial, path)
+
+
+def read_archive(
+    folder: str, first_day: Optional[str] = None,
+    last_day: Optional[str] = None, columns: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """
+    Reads the archived events of a range of days. Only the files of the
+    months in the range are opened, and row groups outside of it are
+    skipped by their statistics.
+
+    Args:
+        folder (str): Archive folder.
+        first_day (str, optional): First day yyyy-mm-dd. Defaults to None.
+        last_day (str, optional): Last day yyyy-mm-dd. Defaults to None.
+        columns (list[str], optional): Columns to read.
+            Defaults to ARCHIVE_COLUMNS.
+
+    Returns:
+        pd.DataFrame: Archived events, month by month.
+    """
+    columns = ARCHIVE_COLUMNS if columns is None else columns
+    filters = []
+    if first_day:
+        filters.append(("day", ">=", first_day))
+    if last_day:
+        filters.append(("day", "<=", last_day))
+    frames = [
+        pd.read_parquet(
+            month_path(folder, month), columns=columns,
+            filters=filters or None
+        )
+        for month in archive_files(folder)
+        if (not first_day or month >= first_day[:7])
+        and (not last_day or month <= last_day[:7])
+    ]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def sum_archive(folder: str, month: str) -> pd.DataFrame:
+    """
+    Sums the time of the archived events of a month.
+
+    Args:
+        folder (str): Archive folder.
+        month (str): Month yyyy-mm.
+
+    Returns:
+        pd.DataFrame: Total and duration by process name, domain,
+            window title and day.
+    """
+    events = pd.read_parquet(
+        month_path(folder, month), columns=SUM_KEYS + ["total", "duration"])
+    return events.groupby(SUM_KEYS, observed=True).agg(
+        {"total": "sum", "duration": "sum"}).reset_index()
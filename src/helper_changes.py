@@ -0,0 +1,94 @@
+"""
+Collection of helper functions for data change notifications.
+"""
+import time
+from typing import Sequence
+from helper_heartbeat import MappedSlots
+
+TABLES = (
+    "activity", "categories", "categories_partial", "milestones", "snapshots"
+)
+SLOT_SIZE = 16
+
+
+class ChangeBoard(MappedSlots):
+    """
+    Change stamps of tables in the mapped slots. After committing,
+    writers store the time of the change and the latest rowid they wrote
+    in the slot of the table, so subscribers compare a couple of
+    integers instead of querying the databases on every tick.
+    """
+
+    def __init__(self, path: str, tables: tuple[str, ...] = TABLES):
+        super().__init__(path, len(tables) * SLOT_SIZE)
+        self.slots = {table: index for index, table in enumerate(tables)}
+        self.seen: dict[str, dict[str, int]] = {}
+        self.polled: dict[str, dict[str, int]] = {}
+
+    def publish(self, table: str, rowid: int = 0) -> None:
+        """
+        Announces a committed change of a table. Tables without
+        subscribers are ignored. Writers of all processes update the
+        slot under the file lock, and the rowid is stored before the
+        time, so readers never pair a new time with an older rowid.
+
+        Args:
+            table (str): Name of table.
+            rowid (int, optional): Latest rowid written, 0 if unknown.
+                Defaults to 0.
+        """
+        if table not in self.slots:
+            return
+        index = self.slots[table] * 2
+        with self.exclusive() as view:
+            view[index + 1] = max(view[index + 1], int(rowid))
+            view[index] = time.time_ns()
+
+    def version(self, table: str) -> tuple[int, int]:
+        """
+        Loads the change stamp of a table.
+
+        Args:
+            table (str): Name of table.
+
+        Returns:
+            tuple[int, int]: Time of the latest change and latest rowid.
+        """
+        view = self.open()
+        index = self.slots[table] * 2
+        # Time first, publish stores it last
+        version = view[index]
+        return version, view[index + 1]
+
+    def poll(self, subscriber: str, tables: Sequence[str]) -> dict[str, int]:
+        """
+        Gets the tables that changed since the subscriber acknowledged
+        them. Every table is reported on the first poll.
+
+        Args:
+            subscriber (str): Name of subscriber.
+            tables (Sequence[str]): Names of tables.
+
+        Returns:
+            dict[str, int]: Latest rowid by changed table.
+        """
+        seen = self.seen.setdefault(subscriber, {})
+        polled = self.polled.setdefault(subscriber, {})
+        changed = {}
+        for table in tables:
+            version, rowid = self.version(table)
+            if seen.get(table) != version:
+                polled[table] = version
+                changed[table] = rowid
+        return changed
+
+    def ack(self, subscriber: str) -> None:
+        """
+        Marks the changes of the last poll as handled, changes published
+        after it are reported by the next poll.
+
+        Args:
+            subscriber (str): Name of subscriber.
+        """
+        self.seen.setdefault(subscriber, {}).update(
+            self.polled.pop(subscriber, {}))
@@ -0,0 +1,1043 @@
+"""
+Collection of helper functions for database connection routines.
+"""
+# pylint: disable=too-few-public-methods, too-many-arguments
+# pylint: disable=too-many-locals, too-many-lines, too-many-instance-attributes
+import os
+import re
+import sys
+import hashlib
+from os.path import dirname, join, abspath, exists
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+import sqlite3 as sql
+import numpy as np
+import pandas as pd
+from helper_trace import TRACER, TracedCursor
+
+WORKSPACE = dirname(dirname(abspath(__file__)))
+CACHED_STATEMENTS = 256
+MAX_VARIABLES = 500
+FETCH_SIZE = 50000
+READERS = 4
+CONSOLIDATED = "autotracker"
+SCHEMA_VERSIONS = "schema_versions"
+CONSOLIDATED_DATABASES = ("activity", "flashcards", "milestones", "urls")
+PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+)
+WAL_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -16000",
+)
+ROLLBACK_PRAGMAS = (
+    "PRAGMA journal_mode = DELETE",
+)
+OPERATORS = (
+    "=", "!=", "<", "<=", ">", ">=", "LIKE", "NOT LIKE",
+    "IN", "NOT IN", "IS", "IS NOT"
+)
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+PROJECTION = re.compile(
+    r"[A-Za-z_]\w*|"
+    r"(?:COUNT|SUM|TOTAL|MIN|MAX|AVG)\((?:\*|DISTINCT [A-Za-z_]\w*|"
+    r"[A-Za-z_]\w*)\)(?: AS [A-Za-z_]\w*)?",
+    re.IGNORECASE
+)
+ORDERING = re.compile(r"[A-Za-z_]\w*(?: ASC| DESC)?", re.IGNORECASE)
+
+
+class PooledConnection(sql.Connection):
+    """SQLite connection that is kept open and shared by a process."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+        self.inode = (0, 0)
+        self.file = ""
+        self.wal = False
+        self.shared_cursor = self.cursor()
+        for pragma in PRAGMAS:
+            self.shared_cursor.execute(pragma).fetchall()
+
+    def apply_mode(self, wal: bool) -> None:
+        """
+        Applies the PRAGMAs of the storage mode to the connection.
+
+        Args:
+            wal (bool): Use WAL journaling.
+        """
+        self.wal = wal
+        for pragma in WAL_PRAGMAS if wal else ROLLBACK_PRAGMAS:
+            try:
+                self.shared_cursor.execute(pragma).fetchall()
+            except sql.OperationalError:
+                # Journal mode can only change without other connections
+                pass
+
+    def cursor(self, *args: Any, **kwargs: Any) -> sql.Cursor:
+        """
+        Opens a cursor, which reports its statements to the TRACER
+        while tracing is enabled.
+
+        Returns:
+            sql.Cursor: New cursor.
+        """
+        if TRACER.enabled and not args and not kwargs:
+            return super().cursor(TracedCursor)
+        return super().cursor(*args, **kwargs)
+
+    def execute(self, *args: Any) -> sql.Cursor:
+        """
+        Executes a statement in a new cursor.
+
+        Returns:
+            sql.Cursor: Cursor of the statement.
+        """
+        if TRACER.enabled:
+            return self.cursor().execute(*args)
+        return super().execute(*args)
+
+    def executemany(self, *args: Any) -> sql.Cursor:
+        """
+        Executes a statement for each set of parameters in a new cursor.
+
+        Returns:
+            sql.Cursor: Cursor of the statement.
+        """
+        if TRACER.enabled:
+            return self.cursor().executemany(*args)
+        return super().executemany(*args)
+
+
+class ConnectionPool:
+    """
+    Per-process cache of SQLite connections keyed by database name.
+    Connections are reopened when the database file is replaced and
+    dropped in forked children, since SQLite handles must not cross forks.
+    Memory pools keep each database in its connection, without any file.
+    In the consolidated layout the CONSOLIDATED_DATABASES are tables of
+    a single file and share its connection. Next to the shared writer
+    connection, each database has up to `readers` read-only connections
+    that threads borrow one at a time, so reads run in parallel.
+    """
+
+    def __init__(self, memory: bool = False, readers: int = READERS) -> None:
+        self.connections: dict[str, PooledConnection] = {}
+        self.lock = threading.Lock()
+        self.abandoned: list[PooledConnection] = []
+        self.wal = False
+        self.consolidated = False
+        self.memory = memory
+        self.readers = readers
+        self.opened: dict[str, list[PooledConnection]] = {}
+        self.idle: dict[str, list[PooledConnection]] = {}
+        self.returned = threading.Condition()
+
+    def configure(self, wal: bool, consolidated: bool = False) -> None:
+        """
+        Sets the storage mode, reopening connections if it changed.
+
+        Args:
+            wal (bool): Use WAL journaling and in-place table replacement.
+            consolidated (bool, optional): Keep the CONSOLIDATED_DATABASES
+                in one file. Defaults to False.
+        """
+        if (wal, consolidated) == (self.wal, self.consolidated):
+            return
+        with self.lock:
+            self.wal, self.consolidated = wal, consolidated
+            # Memory databases live in their connection, so keep them
+            for name in [] if self.memory else list(self.connections):
+                self.discard(name)
+
+    def resolve(self, name: str) -> str:
+        """
+        Maps a database name to the name of the file that holds it.
+
+        Args:
+            name (str): Name of database.
+
+        Returns:
+            str: Name of the database file.
+        """
+        if self.consolidated and name in CONSOLIDATED_DATABASES:
+            return CONSOLIDATED
+        return name
+
+    def path(self, name: str) -> str:
+        """
+        Resolves the file path of the database with the provided name.
+
+        Args:
+            name (str): Name of database.
+
+        Returns:
+            str: Path of the database file.
+        """
+        return database_path(self.resolve(name))
+
+    def get(self, name: str, create: bool = False) -> PooledConnection:
+        """
+        Gets the pooled connection of the given database.
+
+        Args:
+            name (str): Name of database.
+            create (bool, optional): Create database file if it does not
+                exist. Defaults to False.
+
+        Returns:
+            PooledConnection: Open connection to the database.
+        """
+        name = self.resolve(name)
+        path = ":memory:" if self.memory else database_path(name)
+        inode = (0, 0) if name in self.connections else None
+        if not self.memory:
+            inode = self.identity(name)
+        if inode is None and not create:
+            print("\033[93mPath does not exist error\033[00m")
+            sys.exit()
+
+        with self.lock:
+            conn = self.connections.get(name)
+            if conn is not None and conn.inode == inode:
+                return conn
+            if conn is not None:
+                self.discard(name)
+
+            conn = sql.connect(
+                path, factory=PooledConnection, check_same_thread=False,
+                cached_statements=CACHED_STATEMENTS
+            )
+            assert isinstance(conn, PooledConnection), "conn is None"
+            conn.apply_mode(self.wal)
+            conn.inode = (0, 0) if self.memory else self.identity(name)
+            self.connections[name] = conn
+            return conn
+
+    def identity(self, file: str) -> Optional[tuple]:
+        """
+        Identifies the current version of a database file, which changes
+        when the file is replaced.
+
+        Args:
+            file (str): Name of the database file.
+
+        Returns:
+            Optional[tuple]: Device and inode, None if it does not exist.
+        """
+        try:
+            stat = os.stat(database_path(file))
+        except FileNotFoundError:
+            return None
+        return (stat.st_dev, stat.st_ino)
+
+    def open_reader(self, file: str, identity: tuple) -> PooledConnection:
+        """
+        Opens a read-only connection to a database file.
+
+        Args:
+            file (str): Name of the database file.
+            identity (tuple): Version of the file, see identity.
+
+        Returns:
+            PooledConnection: New reader connection.
+        """
+        conn = sql.connect(
+            database_path(file), factory=PooledConnection,
+            check_same_thread=False, cached_statements=CACHED_STATEMENTS
+        )
+        assert isinstance(conn, PooledConnection), "conn is None"
+        conn.execute("PRAGMA query_only = ON").fetchall()
+        conn.inode = identity
+        return conn
+
+    def borrow(self, name: str) -> PooledConnection:
+        """
+        Takes a reader connection of the given database, opening one
+        while fewer than `readers` are open and waiting for one to be
+        released otherwise. Readers of a replaced file are closed.
+
+        Args:
+            name (str): Name of database.
+
+        Returns:
+            PooledConnection: Reader connection, to be released after use.
+        """
+        file = self.resolve(name)
+        identity = self.identity(file)
+        if identity is None:
+            print("\033[93mPath does not exist error\033[00m")
+            sys.exit()
+
+        with self.returned:
+            opened = self.opened.setdefault(file, [])
+            idle = self.idle.setdefault(file, [])
+            while True:
+                for conn in [conn for conn in idle if conn.inode != identity]:
+                    idle.remove(conn)
+                    opened.remove(conn)
+                    conn.close()
+                if idle:
+                    return idle.pop()
+                if len(opened) < self.readers:
+                    break
+                self.returned.wait()
+            conn = self.open_reader(file, identity)
+            conn.file = file
+            opened.append(conn)
+            return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        """
+        Returns a borrowed reader connection, closing it if its database
+        was discarded in the meantime.
+
+        Args:
+            conn (PooledConnection): Reader connection.
+        """
+        with self.returned:
+            if any(conn is other for other in self.opened.get(conn.file, [])):
+                self.idle.setdefault(conn.file, []).append(conn)
+            else:
+                conn.close()
+            self.returned.notify()
+
+    def exists(self, name: str) -> bool:
+        """
+        Checks if the database with the provided name exists.
+
+        Args:
+            name (str): Name of database.
+
+        Returns:
+            bool: If the database exists, consolidated databases exist
+                once their table was created.
+        """
+        key = self.resolve(name)
+        if self.memory:
+            found = key in self.connections
+        else:
+            found = exists(database_path(key))
+        if not found or key == name:
+            return found
+        conn = self.get(key)
+        with conn.lock:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?", (name,)
+            ).fetchone() is not None
+
+    def discard(self, name: str) -> None:
+        """
+        Closes and forgets the connection of the given database.
+
+        Args:
+            name (str): Name of database.
+        """
+        for key in dict.fromkeys((name, self.resolve(name))):
+            # Borrowed readers are closed when they are released
+            with self.returned:
+                for reader in self.idle.pop(key, []):
+                    reader.close()
+                self.opened.pop(key, None)
+                self.returned.notify_all()
+            conn = self.connections.pop(key, None)
+            if conn is None:
+                continue
+            with conn.lock:
+                conn.close()
+
+    def close_all(self) -> None:
+        """Closes all pooled connections."""
+        with self.lock:
+            for name in list(self.connections) + list(self.opened):
+                self.discard(name)
+
+    def reset_after_fork(self) -> None:
+        """Forgets inherited connections without closing them."""
+        self.lock = threading.Lock()
+        self.returned = threading.Condition()
+        self.abandoned.extend(self.connections.values())
+        for readers in self.opened.values():
+            self.abandoned.extend(readers)
+        self.connections, self.opened, self.idle = {}, {}, {}
+
+
+POOL = ConnectionPool()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=POOL.reset_after_fork)
+
+
+def database_path(name: str) -> str:
+    """
+    Resolves the file path of the database with the provided name.
+
+    Args:
+        name (str): Name of database.
+
+    Returns:
+        str: Path of the database file.
+    """
+    return join(WORKSPACE, f"data/{name}.db")
+
+
+@contextmanager
+def connect_reader(
+    name: str, pool: Optional[ConnectionPool] = None
+) -> Iterator[PooledConnection]:
+    """
+    Borrows a reader connection of a database, so reads do not wait for
+    the writer connection or the reads of other threads. Memory pools
+    have one connection per database, which is borrowed as in connect.
+
+    Args:
+        name (str): Name of database.
+        pool (ConnectionPool, optional): Pool to borrow from.
+            Defaults to POOL.
+
+    Yields:
+        PooledConnection: Read-only connection to the database.
+    """
+    pool = POOL if pool is None else pool
+    if pool.memory:
+        with connect(name, pool=pool) as conn:
+            yield conn
+        return
+    conn = pool.borrow(name)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        pool.release(conn)
+
+
+@contextmanager
+def connect(
+    name: str, create: bool = False, pool: Optional[ConnectionPool] = None
+) -> Iterator[PooledConnection]:
+    """
+    Borrows the pooled connection of a database for exclusive use by
+    the current thread. Uncommitted work is rolled back on errors.
+
+    Args:
+        name (str): Name of database.
+        create (bool, optional): Create database file if it does not
+            exist. Defaults to False.
+        pool (ConnectionPool, optional): Pool to borrow from.
+            Defaults to POOL.
+
+    Yields:
+        PooledConnection: Open connection to the database.
+    """
+    conn = (POOL if pool is None else pool).get(name, create)
+    with conn.lock:
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+
+def database_modified(name: str) -> float:
+    """
+    Gets the time of the latest write to a database, including writes
+    still in its WAL file.
+
+    Args:
+        name (str): Name of database.
+
+    Returns:
+        float: Modification time, 0 if the database does not exist.
+    """
+    path = database_path(name)
+    return max((
+        os.path.getmtime(file) for file in (path, f"{path}-wal")
+        if exists(file)
+    ), default=0.0)
+
+
+def replace_database(partial: str, name: str) -> None:
+    """
+    Moves a complete copy in place of a database. Its pooled connection
+    and leftover WAL files are dropped first, since they belong to the
+    replaced file.
+
+    Args:
+        partial (str): Path of the copy.
+        name (str): Name of database.
+    """
+    path = database_path(name)
+    POOL.discard(name)
+    for file in (f"{path}-wal", f"{path}-shm"):
+        if exists(file):
+            os.remove(file)
+    os.replace(partial, path)
+
+
+def copy_tables(
+    conn: sql.Connection, path: str, tables: Optional[Sequence[str]] = None
+) -> None:
+    """
+    Adds the tables of another database file, with their indexes,
+    triggers and views, skipping names that already exist.
+
+    Args:
+        conn (sql.Connection): Connection to the receiving database.
+        path (str): Path of the other database.
+        tables (Sequence[str], optional): Only copy these tables and the
+            objects on them. Defaults to all tables.
+    """
+    conn.execute("ATTACH DATABASE ? AS source", (path,))
+    schema = conn.execute(
+        "SELECT type, name, tbl_name, sql FROM source.sqlite_master \
+            WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' \
+            ORDER BY type = 'index'"
+    ).fetchall()
+    for kind, table, parent, query in schema:
+        if tables is not None and parent not in tables:
+            continue
+        if conn.execute(
+            "SELECT 1 FROM main.sqlite_master WHERE name = ?", (table,)
+        ).fetchone() is not None:
+            continue
+        conn.execute(query)
+        if kind == "table":
+            conn.execute(
+                f'INSERT INTO main."{table}" SELECT * FROM source."{table}"')
+    conn.commit()
+    conn.execute("DETACH DATABASE source")
+
+
+def consolidate_databases(
+    names: Sequence[str] = CONSOLIDATED_DATABASES,
+    target: str = CONSOLIDATED
+) -> list[str]:
+    """
+    Copies separate databases into the consolidated file when it does
+    not exist yet, or when one of them was written after it while the
+    layout was off. The first one is copied whole with the backup API,
+    the tables of the others are added to it.
+
+    Args:
+        names (Sequence[str], optional): Names of the databases.
+            Defaults to CONSOLIDATED_DATABASES.
+        target (str, optional): Name of the consolidated database.
+            Defaults to CONSOLIDATED.
+
+    Returns:
+        list[str]: Names of the copied databases.
+    """
+    path = database_path(target)
+    sources = [name for name in names if exists(database_path(name))]
+    modified = database_modified(target)
+    if not sources or all(
+        database_modified(name) < modified for name in sources
+    ):
+        return []
+
+    partial = f"{path}.partial"
+    if exists(partial):
+        os.remove(partial)
+    conn = sql.connect(partial)
+    try:
+        source = sql.connect(database_path(sources[0]))
+        try:
+            source.backup(conn)
+        finally:
+            source.close()
+        for name in sources[1:]:
+            copy_tables(conn, database_path(name))
+    finally:
+        conn.close()
+    replace_database(partial, target)
+    return sources
+
+
+def separate_databases(
+    names: Sequence[str] = CONSOLIDATED_DATABASES,
+    target: str = CONSOLIDATED
+) -> list[str]:
+    """
+    Copies the consolidated file back to the separate databases when it
+    was written after all of them, so writes made in the consolidated
+    layout are kept when it is turned off. Tables named after one of
+    the databases go to it, all others to the first database.
+
+    Args:
+        names (Sequence[str], optional): Names of the databases.
+            Defaults to CONSOLIDATED_DATABASES.
+        target (str, optional): Name of the consolidated database.
+            Defaults to CONSOLIDATED.
+
+    Returns:
+        list[str]: Names of the written databases.
+    """
+    path = database_path(target)
+    modified = database_modified(target)
+    if not modified or any(
+        database_modified(name) >= modified for name in names
+    ):
+        return []
+
+    conn = sql.connect(path)
+    try:
+        tables = {table for (table,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+    written = []
+    for index, name in enumerate(names):
+        if index and name not in tables:
+            continue
+        partial = f"{database_path(name)}.partial"
+        if exists(partial):
+            os.remove(partial)
+        conn = sql.connect(partial)
+        try:
+            if index:
+                copy_tables(conn, path, [name])
+            else:
+                source = sql.connect(path)
+                try:
+                    source.backup(conn)
+                finally:
+                    source.close()
+                for table in tables.intersection(names[1:]):
+                    conn.execute(f'DROP TABLE "{table}"')
+                conn.commit()
+        finally:
+            conn.close()
+        replace_database(partial, name)
+        written.append(name)
+    return written
+
+
+def apply_schema(conn: sql.Connection, name: str, script: str) -> bool:
+    """
+    Runs a schema script unless the same version of it was already
+    applied to the database. The script and the record of its new
+    version in SCHEMA_VERSIONS are committed together.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        name (str): Name of the schema script.
+        script (str): Statements of the script.
+
+    Returns:
+        bool: If the script was run.
+    """
+    checksum = hashlib.sha256(script.encode()).hexdigest()
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{SCHEMA_VERSIONS}" ( \
+            name TEXT PRIMARY KEY, version INTEGER NOT NULL, \
+            checksum TEXT NOT NULL)'
+    )
+    row = conn.execute(
+        f'SELECT version, checksum FROM "{SCHEMA_VERSIONS}" WHERE name = ?',
+        (name,)
+    ).fetchone()
+    if row is not None and row[1] == checksum:
+        return False
+    version = 1 if row is None else row[0] + 1
+    quoted = name.replace("'", "''")
+    try:
+        conn.executescript(
+            f"BEGIN;\n{script}\n;\n"
+            f'INSERT OR REPLACE INTO "{SCHEMA_VERSIONS}" '
+            f"VALUES ('{quoted}', {version}, '{checksum}');\nCOMMIT;"
+        )
+    except sql.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    return True
+
+
+def explain_query(
+    conn: sql.Connection, query: str, params: tuple = ()
+) -> list[str]:
+    """
+    Gets the query plan SQLite uses for the given query.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        query (str): Query to be explained.
+        params (tuple, optional): Query parameters. Defaults to ().
+
+    Returns:
+        list[str]: Details of each step of the query plan.
+    """
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def ensure_column(
+    conn: sql.Connection, table: str, column: str, definition: str
+) -> bool:
+    """
+    Adds a column to an existing table if it does not have it yet.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        table (str): Name of table.
+        column (str): Name of column.
+        definition (str): Column type and constraints.
+
+    Returns:
+        bool: If the column was added.
+    """
+    info = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+    if not info or column in [row[1] for row in info]:
+        return False
+    conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {column} {definition}')
+    conn.commit()
+    return True
+
+
+def frame_rows(df: pd.DataFrame) -> list[tuple]:
+    """
+    Converts a dataframe into rows of python values that sqlite3 can bind.
+
+    Args:
+        df (pd.DataFrame): Dataframe to be converted.
+
+    Returns:
+        list[tuple]: Rows of the dataframe.
+    """
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def replace_table(conn: sql.Connection, df: pd.DataFrame, table: str):
+    """
+    Replaces the contents of a table in a single write transaction.
+    The table is emptied and refilled in place, only being recreated
+    when its columns changed. WAL readers keep seeing the old contents
+    until the commit and never see a missing table.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        df (pd.DataFrame): Dataframe to be saved.
+        table (str): Name of table.
+    """
+    columns = [str(col) for col in df.columns]
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        existing = [
+            row[1] for row in
+            cursor.execute(f'PRAGMA table_info("{table}")').fetchall()
+        ]
+        if existing == columns:
+            cursor.execute(f'DELETE FROM "{table}"')
+        else:
+            cursor.execute(f'DROP TABLE IF EXISTS "{table}"')
+            cursor.execute(pd.io.sql.get_schema(df, table, con=conn))
+
+        names = ", ".join(f'"{col}"' for col in columns)
+        marks = ", ".join("?" for _ in columns)
+        cursor.executemany(
+            f'INSERT INTO "{table}" ({names}) VALUES ({marks})',
+            frame_rows(df)
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def check_identifier(name: str) -> str:
+    """
+    Validates a column or table name that is written into a query.
+
+    Args:
+        name (str): Name to be validated.
+
+    Returns:
+        str: The same name.
+    """
+    assert IDENTIFIER.fullmatch(name), f"Invalid identifier: {name}"
+    return name
+
+
+def select_query(
+    table: str, columns: Optional[Sequence[str]] = None,
+    where: Optional[Sequence[tuple]] = None,
+    group_by: Optional[Sequence[str]] = None,
+    order_by: Optional[Sequence[str]] = None,
+    limit: Optional[int] = None, offset: Optional[int] = None,
+    load_rowid: bool = False
+) -> tuple[str, list]:
+    """
+    Builds a SELECT statement whose values are all bound parameters.
+    Names are validated, so only values may come from user input.
+
+    Args:
+        table (str): Name of table.
+        columns (Sequence[str], optional): Columns or aggregates such as
+            "SUM(total) AS total". Defaults to all columns.
+        where (Sequence[tuple], optional): Predicates joined with AND,
+            "count > 3" should be passed as ("count", ">", 3) and IN
+            operators take a list. Defaults to None.
+        group_by (Sequence[str], optional): Grouping columns.
+            Defaults to None.
+        order_by (Sequence[str], optional): Ordering columns, optionally
+            followed by ASC or DESC. Defaults to None.
+        limit (int, optional): Maximum number of rows. Defaults to None.
+        offset (int, optional): Number of rows to skip. Defaults to None.
+        load_rowid (bool, optional): Select rowid. Defaults to False.
+
+    Returns:
+        tuple[str, list]: Query and its parameters.
+    """
+    if columns is None:
+        columns = ["*"]
+    for column in columns:
+        assert column == "*" or PROJECTION.fullmatch(column), \
+            f"Invalid column: {column}"
+    projection = list(columns) + (["rowid"] if load_rowid else [])
+    query = f"SELECT {', '.join(projection)} FROM {check_identifier(table)}"
+    params: list = []
+
+    predicates = []
+    for column, operator, value in where or []:
+        operator = operator.upper()
+        assert operator in OPERATORS, f"Invalid operator: {operator}"
+        column = check_identifier(column)
+        if operator in ("IN", "NOT IN"):
+            values = list(value)
+            marks = ", ".join("?" for _ in values)
+            predicates.append(f"{column} {operator} ({marks})")
+            params.extend(values)
+        else:
+            predicates.append(f"{column} {operator} ?")
+            params.append(value)
+    if predicates:
+        query += " WHERE " + " AND ".join(predicates)
+
+    if group_by:
+        query += " GROUP BY " + ", ".join(map(check_identifier, group_by))
+    if order_by:
+        for term in order_by:
+            assert ORDERING.fullmatch(term), f"Invalid ordering: {term}"
+        query += " ORDER BY " + ", ".join(order_by)
+    if limit is not None or offset is not None:
+        query += " LIMIT ?"
+        params.append(-1 if limit is None else int(limit))
+    if offset is not None:
+        query += " OFFSET ?"
+        params.append(int(offset))
+    return query, params
+
+
+def intern_values(
+    conn: sql.Connection, table: str, values: list[str]
+) -> dict[str, int]:
+    """
+    Gets the ids of values in a dictionary table, adding missing ones.
+    The caller commits, so the ids should only be cached after that.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        table (str): Dictionary table with id and value columns.
+        values (list[str]): Values to be interned.
+
+    Returns:
+        dict[str, int]: Ids by value.
+    """
+    values = list(dict.fromkeys(values))
+    conn.executemany(
+        f'INSERT OR IGNORE INTO "{table}" (value) VALUES (?)',
+        [(value,) for value in values]
+    )
+    ids: dict[str, int] = {}
+    for start in range(0, len(values), MAX_VARIABLES):
+        part = values[start:start + MAX_VARIABLES]
+        marks = ", ".join("?" for _ in part)
+        ids.update(conn.execute(
+            f'SELECT value, id FROM "{table}" WHERE value IN ({marks})', part
+        ).fetchall())
+    return ids
+
+
+def stage_rows(
+    conn: sql.Connection, df: pd.DataFrame, name: str = "staged"
+) -> str:
+    """
+    Copies rows into a temporary table of the connection, so bulk
+    statements can join them instead of binding one variable per value.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        df (pd.DataFrame): Rows to be staged.
+        name (str, optional): Name of the temporary table.
+            Defaults to "staged".
+
+    Returns:
+        str: Qualified name of the temporary table.
+    """
+    columns = ", ".join(map(check_identifier, df.columns))
+    staged = f"temp.{check_identifier(name)}"
+    conn.execute(f"DROP TABLE IF EXISTS {staged}")
+    conn.execute(f"CREATE TEMP TABLE {name} ({columns})")
+    conn.executemany(
+        f"INSERT INTO {staged} VALUES ({', '.join('?' for _ in df.columns)})",
+        frame_rows(df)
+    )
+    return staged
+
+
+def delete_rows(conn: sql.Connection, table: str, keys: pd.DataFrame) -> int:
+    """
+    Deletes the rows whose columns match any row of keys, in a single
+    statement whatever the number of keys. The caller commits.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        table (str): Name of table.
+        keys (pd.DataFrame): Values of the key columns to delete.
+
+    Returns:
+        int: Number of deleted rows.
+    """
+    staged = stage_rows(conn, keys)
+    columns = ", ".join(keys.columns)
+    deleted = conn.execute(
+        f"DELETE FROM {check_identifier(table)} WHERE ({columns}) \
+            IN (SELECT {columns} FROM {staged})"
+    ).rowcount
+    conn.execute(f"DROP TABLE {staged}")
+    return deleted
+
+
+def update_rows(
+    conn: sql.Connection, table: str, df: pd.DataFrame, keys: list[str]
+) -> int:
+    """
+    Sets the other columns of df on the rows matching its key columns,
+    running one prepared statement for every row. The caller commits.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        table (str): Name of table.
+        df (pd.DataFrame): Key and new values of each row.
+        keys (list[str]): Columns that identify a row, NULL never matches.
+
+    Returns:
+        int: Number of updated rows.
+    """
+    values = [col for col in df.columns if col not in keys]
+    if not values:
+        return 0
+    assignments = ", ".join(f"{check_identifier(col)} = ?" for col in values)
+    matches = " AND ".join(f"{check_identifier(col)} = ?" for col in keys)
+    return conn.executemany(
+        f"UPDATE {check_identifier(table)} SET {assignments} \
+            WHERE {matches}",
+        frame_rows(df[values + keys])
+    ).rowcount
+
+
+def upsert_rows(
+    conn: sql.Connection, table: str, df: pd.DataFrame, keys: list[str]
+) -> int:
+    """
+    Updates the rows matching the key columns of df and inserts the
+    others, without needing a unique index. The caller commits.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        table (str): Name of table.
+        df (pd.DataFrame): Rows to be written.
+        keys (list[str]): Columns that identify a row, NULL never matches.
+
+    Returns:
+        int: Number of updated and inserted rows.
+    """
+    table = check_identifier(table)
+    written = update_rows(conn, table, df, keys)
+    staged = stage_rows(conn, df)
+    columns = ", ".join(df.columns)
+    matches = " AND ".join(f"t.{col} = s.{col}" for col in keys)
+    written += conn.execute(
+        f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staged} s \
+            WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {matches})"
+    ).rowcount
+    conn.execute(f"DROP TABLE {staged}")
+    return written
+
+
+def read_columns(
+    conn: sql.Connection, query: str, params: Sequence = (),
+    dtypes: Optional[dict[str, Any]] = None, fetch_size: int = FETCH_SIZE
+) -> dict[str, Any]:
+    """
+    Runs a query and returns its result by column. Rows are fetched in
+    blocks that are copied into typed NumPy arrays, instead of building
+    object columns for the whole result first.
+
+    Args:
+        conn (sql.Connection): Connection to the database.
+        query (str): Query to be run.
+        params (Sequence, optional): Bound parameters. Defaults to ().
+        dtypes (dict[str, Any], optional): NumPy type of each column,
+            "category" dictionary encodes strings and integer columns can
+            not hold NULL. Other columns are objects. Defaults to None.
+        fetch_size (int, optional): Rows copied at a time.
+            Defaults to FETCH_SIZE.
+
+    Returns:
+        dict[str, Any]: Arrays by column name, categories are returned
+            as pd.Categorical.
+    """
+    dtypes = dtypes or {}
+    cursor = conn.execute(query, params)
+    names = [column[0] for column in cursor.description]
+    types = [dtypes.get(name, object) for name in names]
+    types = [object if kind == "category" else kind for kind in types]
+    blocks: list[list[np.ndarray]] = [[] for _ in names]
+    while rows := cursor.fetchmany(fetch_size):
+        for block, kind, values in zip(blocks, types, zip(*rows)):
+            block.append(np.array(values, dtype=kind))
+
+    columns: dict[str, Any] = {}
+    for name, kind, block in zip(names, types, blocks):
+        values = np.concatenate(block) if block else np.empty(0, kind)
+        if dtypes.get(name) == "category":
+            codes, categories = pd.factorize(values)
+            values = pd.Categorical.from_codes(codes, categories)
+        columns[name] = values
+    return columns
+
+
+def cast_columns(
+    dataframe: pd.DataFrame, dtypes: Optional[dict[str, Any]] = None
+) -> pd.DataFrame:
+    """
+    Casts the columns of a dataframe to their types, so frames read row
+    by row share the types of read_columns. Columns without a type are
+    kept, and integer columns holding NULL keep their inferred type.
+
+    Args:
+        dataframe (pd.DataFrame): Dataframe to be cast.
+        dtypes (dict[str, Any], optional): NumPy type or "category" of
+            each column. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Dataframe with the typed columns.
+    """
+    types = {
+        col: kind for col, kind in (dtypes or {}).items()
+        if col in dataframe.columns and (
+            kind == "category" or
+            not np.issubdtype(np.dtype(kind), np.integer) or
+            not dataframe[col].isna().any()
+        )
+    }
+    return dataframe.astype(types, copy=False) if types else dataframe
@@ -0,0 +1,145 @@
+"""
+Collection of helper functions for liveness heartbeat routines.
+"""
+# pylint: disable=too-few-public-methods
+import os
+import mmap
+import time
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+if os.name == "nt":
+    import msvcrt  # pylint: disable=import-error
+else:
+    import fcntl
+
+HEARTBEATS = ("mouse", "keyboard", "audio", "backend", "frontend")
+SLOT_SIZE = 8
+
+
+class MappedSlots:
+    """
+    Fixed int64 slots in a memory mapped file shared by all processes.
+    The file is mapped on first use, and created or grown to fit. Its
+    descriptor stays open for the file lock of exclusive.
+    """
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self.lock = threading.Lock()
+        self.fd: Optional[int] = None
+        self.view: Optional[memoryview] = None
+        self.buffer: Optional[mmap.mmap] = None
+
+    def open(self) -> memoryview:
+        """
+        Maps the file, creating or growing it if needed.
+
+        Returns:
+            memoryview: Int64 slots of the file.
+        """
+        view = self.view
+        if view is not None:
+            return view
+
+        with self.lock:
+            if self.view is not None:
+                return self.view
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < self.size:
+                    os.ftruncate(fd, self.size)
+                self.buffer = mmap.mmap(fd, self.size)
+            except BaseException:
+                os.close(fd)
+                raise
+            self.fd = fd
+            self.view = memoryview(self.buffer).cast("q")
+            return self.view
+
+    @contextmanager
+    def exclusive(self) -> Iterator[memoryview]:
+        """
+        Holds a lock on the file, shared by all processes, so updates
+        that read slots before writing them do not interleave.
+
+        Yields:
+            memoryview: Int64 slots of the file.
+        """
+        view = self.open()
+        with self.lock:
+            assert self.fd is not None, "File is not mapped"
+            if os.name == "nt":
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX)
+            try:
+                yield view
+            finally:
+                if os.name == "nt":
+                    os.lseek(self.fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.lockf(self.fd, fcntl.LOCK_UN)
+
+
+class HeartbeatBoard(MappedSlots):
+    """
+    Each slot holds the timestamp of the latest heartbeat of one signal,
+    so writers do a single aligned store and readers a single load.
+    """
+
+    def __init__(self, path: str, names: tuple[str, ...] = HEARTBEATS):
+        super().__init__(path, len(names) * SLOT_SIZE)
+        self.names = names
+        self.slots = {name: index for index, name in enumerate(names)}
+        self.flushed = 0.0
+
+    def beat(
+        self, name: str, value: Optional[int] = None,
+        flush_interval: float = 0
+    ) -> None:
+        """
+        Stores a heartbeat in the slot of the given signal.
+
+        Args:
+            name (str): Name of signal.
+            value (int, optional): Timestamp to store. Defaults to now.
+            flush_interval (float, optional): Minimum time between writing
+                the slots back to disk, 0 disables it. Defaults to 0.
+        """
+        view = self.open()
+        view[self.slots[name]] = int(time.time()) if value is None else value
+        if 0 < flush_interval <= time.monotonic() - self.flushed:
+            self.flush()
+
+    def load(self, name: str) -> int:
+        """
+        Loads the latest heartbeat of the given signal.
+
+        Args:
+            name (str): Name of signal.
+
+        Returns:
+            int: Timestamp of the latest heartbeat.
+        """
+        return self.open()[self.slots[name]]
+
+    def snapshot(self) -> dict[str, int]:
+        """
+        Loads the latest heartbeat of every signal.
+
+        Returns:
+            dict[str, int]: Timestamps by signal name.
+        """
+        view = self.open()
+        return {name: view[index] for name, index in self.slots.items()}
+
+    def flush(self) -> None:
+        """Writes the slots back to disk for crash diagnostics."""
+        self.open()
+        assert self.buffer is not None, "Heartbeat file is not mapped"
+        self.buffer.flush()
+        self.flushed = time.monotonic()
@@ -0,0 +1,145 @@
+"""
+Collection of helper functions for the in-memory tier of today's activity.
+"""
+import time
+import threading
+import sqlite3 as sql
+from typing import Optional
+import pandas as pd
+
+HOT_COLUMNS = [
+    "start_time", "end_time", "process_name", "info", "domain", "day", "rowid"
+]
+HOT_SCHEMA = """
+    CREATE TABLE activity (
+        start_time INTEGER NOT NULL,
+        end_time INTEGER NOT NULL,
+        process_name TEXT NOT NULL,
+        info TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        duration INTEGER GENERATED ALWAYS AS (
+            end_time - start_time
+        ) STORED NOT NULL,
+        total REAL GENERATED ALWAYS AS (
+            duration / 3600.0
+        ) STORED NOT NULL,
+        day TEXT NOT NULL
+    )
+"""
+INSERT_QUERY = "INSERT OR REPLACE INTO activity \
+    (rowid, start_time, end_time, process_name, info, domain, day) \
+    VALUES (?, ?, ?, ?, ?, ?, ?)"
+SUMS_QUERY = """
+    SELECT process_name, domain, info, day,
+        SUM(total) AS total, SUM(duration) AS duration
+    FROM activity
+    GROUP BY process_name, domain, info, day
+"""
+
+
+class HotTier:
+    """
+    In-memory copy of the activity events of a single day, so the
+    tracker aggregates today without reading the disk on every tick.
+    Rows keep the rowid they have in the activity database, the tier is
+    filled from disk when the day rolls over and the aggregates are
+    checkpointed to the database on an interval.
+    """
+
+    def __init__(self):
+        self.conn = sql.connect(":memory:", check_same_thread=False)
+        self.conn.execute(HOT_SCHEMA)
+        self.lock = threading.Lock()
+        self.day: Optional[str] = None
+        self.checkpointed: Optional[float] = None
+
+    def fill(self, day: str, dataframe: pd.DataFrame) -> None:
+        """
+        Replaces the rows of the tier with the events of a new day.
+        A checkpoint is due right after filling.
+
+        Args:
+            day (str): Day of the events yyyy-mm-dd.
+            dataframe (pd.DataFrame): Events with the HOT_COLUMNS.
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM activity")
+            self.day = None
+            self.insert(dataframe)
+            self.day = day
+            self.checkpointed = None
+
+    def append(self, dataframe: pd.DataFrame) -> None:
+        """
+        Adds new events, ignoring the ones of other days.
+
+        Args:
+            dataframe (pd.DataFrame): Events with the HOT_COLUMNS.
+        """
+        with self.lock:
+            if self.day is not None:
+                self.insert(dataframe[dataframe["day"] == self.day])
+
+    def insert(self, dataframe: pd.DataFrame) -> None:
+        """
+        Inserts events, the caller holds the lock.
+
+        Args:
+            dataframe (pd.DataFrame): Events with the HOT_COLUMNS.
+        """
+        rows = dataframe[[HOT_COLUMNS[-1]] + HOT_COLUMNS[:-1]]
+        self.conn.executemany(
+            INSERT_QUERY, rows.astype(object).itertuples(index=False))
+        self.conn.commit()
+
+    def extend(self, rowid: int, end_time: int) -> None:
+        """
+        Moves the end of an event forward.
+
+        Args:
+            rowid (int): Rowid of the event in the activity database.
+            end_time (int): New end time of the event.
+        """
+        with self.lock:
+            self.conn.execute(
+                "UPDATE activity SET end_time = ? \
+                    WHERE rowid = ? AND end_time < ?",
+                (end_time, rowid, end_time)
+            )
+            self.conn.commit()
+
+    def sums(self) -> pd.DataFrame:
+        """
+        Sums the time of the events of the tier.
+
+        Returns:
+            pd.DataFrame: Total and duration by process name, domain,
+                window title and day.
+        """
+        with self.lock:
+            return pd.read_sql(SUMS_QUERY, self.conn)
+
+    def due(self, interval: float) -> bool:
+        """
+        Checks if the aggregates should be checkpointed.
+
+        Args:
+            interval (float): Time between checkpoints in seconds.
+
+        Returns:
+            bool: If interval seconds passed since the last checkpoint.
+        """
+        checkpointed = self.checkpointed
+        return checkpointed is None or \
+            time.monotonic() - checkpointed >= interval
+
+    def checkpoint(self) -> None:
+        """Marks the aggregates as saved to the database."""
+        self.checkpointed = time.monotonic()
+
+    def clear(self) -> None:
+        """Forgets the rows, so the tier is filled again on next use."""
+        with self.lock:
+            self.conn.execute("DELETE FROM activity")
+            self.conn.commit()
+            self.day = None
@@ -2,19 +2,41 @@
 Collection of helper functions for input and output rountines.
 """
 # pylint: disable=broad-exception-caught, possibly-unused-variable
-# pylint: disable=unused-argument, ungrouped-imports
-from os import listdir
+# pylint: disable=unused-argument, ungrouped-imports, too-many-arguments
+# pylint: disable=global-statement, too-many-lines
+from os import listdir, stat, makedirs
 import sys
 from os.path import dirname, exists, join, abspath
 import time
+import hashlib
+import threading
 import traceback
+from datetime import datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo
 import logging
 from logging.handlers import RotatingFileHandler
-from typing import Callable, TypeVar, Any, Optional
-import sqlite3 as sql
+from typing import Callable, TypeVar, Any, Optional, Iterator
 import yaml
 from notifypy import Notify
+import numpy as np
 import pandas as pd
+from helper_database import POOL, ensure_column, intern_values, update_rows, \
+    consolidate_databases, separate_databases, apply_schema, cast_columns, \
+    SCHEMA_VERSIONS
+from helper_storage import Storage, SQLiteStorage
+from helper_heartbeat import HeartbeatBoard, HEARTBEATS
+from helper_changes import ChangeBoard
+from helper_session import SessionJournal
+from helper_hot import HotTier, HOT_COLUMNS
+from helper_partitions import refresh_partitions, load_partitions, \
+    route_partitions
+from helper_archive import write_archive, read_archive, archive_files, \
+    sum_archive, ARCHIVE_COLUMNS
+from helper_writer import WRITERS
+from helper_trace import TRACER
+from helper_samples import SampleLog, fold_samples, SESSION_COLUMNS
+from helper_snapshot import SnapshotPool, SNAPSHOTS, SNAPSHOT_DATABASES, \
+    snapshot_path, snapshot_database, prune_snapshots
 
 log_path = join(dirname(dirname(abspath(__file__))), "logs")
 logger1 = logging.getLogger('retry')
@@ -35,7 +57,72 @@ file_handler2.setFormatter(
     logging.Formatter('%(asctime)s - %(message)s', datefmt='%H:%M:%S'))
 logger2.addHandler(file_handler2)
 
+logger3 = logging.getLogger('queries')
+logger3.setLevel(logging.DEBUG)
+file_handler3 = RotatingFileHandler(
+    join(log_path, 'queries.log'), maxBytes=1024*512, backupCount=3)
+file_handler3.setLevel(logging.DEBUG)
+file_handler3.setFormatter(
+    logging.Formatter('%(asctime)s - %(message)s', datefmt='%H:%M:%S'))
+logger3.addHandler(file_handler3)
+
 T = TypeVar('T')
+CONFIG_CHECK_INTERVAL = 0.5
+CHUNK_SIZE = 20000
+BOARD = HeartbeatBoard(
+    join(dirname(dirname(abspath(__file__))), "data/heartbeat.bin"))
+CHANGES = ChangeBoard(
+    join(dirname(dirname(abspath(__file__))), "data/changes.bin"))
+STORAGE: Storage = SQLiteStorage(POOL)
+JOURNAL = SessionJournal(
+    join(dirname(dirname(abspath(__file__))), "data/activity.journal"))
+SAMPLES = SampleLog(join(dirname(dirname(abspath(__file__))), "data/samples"))
+HOT = HotTier()
+DIMENSIONS = ("app", "info", "process_name", "url", "domain")
+SNAPSHOT_TABLES = ("activity", "categories", "categories_partial")
+SEARCH_QUERY = """
+    SELECT v.day, v.start_time, v.end_time, v.process_name, v.info, v.url,
+        v.domain, v.duration, s.rank
+    FROM activity_search s
+    JOIN activity_view v ON v.rowid = s.rowid
+    WHERE activity_search MATCH ? AND v.day >= ? AND v.day <= ?
+    ORDER BY s.rank
+    LIMIT ? OFFSET ?
+"""
+SEARCH_DAYS_QUERY = """
+    SELECT a.day, COUNT(*) AS events, SUM(a.total) AS total
+    FROM activity_search s
+    JOIN activity a ON a.rowid = s.rowid
+    WHERE activity_search MATCH ? AND a.day >= ? AND a.day <= ?
+    GROUP BY a.day
+    ORDER BY a.day DESC
+"""
+DIMENSION_IDS: dict[str, dict[str, int]] = {col: {} for col in DIMENSIONS}
+CATEGORY_TYPES = {
+    "process_name": "category", "day": "category", "subtitle": "category",
+    "category": "category", "method": "category", "total": np.float32,
+    "duration": "category"
+}
+TABLE_TYPES: dict[str, dict[str, Any]] = {
+    "activity": {
+        "start_time": np.int64, "end_time": np.int64, "app_id": np.int64,
+        "info_id": np.int64, "process_name_id": np.int64,
+        "url_id": np.int64, "domain_id": np.int64, "duration": np.int64,
+        "total": np.float32, "day": "category"
+    },
+    "activity_view": {
+        "start_time": np.int64, "end_time": np.int64, "duration": np.int64,
+        "total": np.float32, "process_name": "category",
+        "domain": "category", "day": "category"
+    },
+    "categories": CATEGORY_TYPES,
+    "categories_partial": CATEGORY_TYPES,
+    "totals": {
+        "day": "category", "Neutral": np.float32, "Personal": np.float32,
+        "Work": np.float32, "days_since": np.int64, "weekday": "category",
+        "weekday_num": "category"
+    },
+}
 
 
 def retry(
@@ -125,6 +212,20 @@ def load_yaml(name: str) -> dict:
     Returns:
         dict: Configuration file.
     """
+    return read_yaml(name)[1]
+
+
+def read_yaml(name: str) -> tuple[bytes, dict]:
+    """
+    Reads yaml file with the provided name using workspace as base dir.
+    Retries while the file is being rewritten and does not parse to a dict.
+
+    Args:
+        name (str): Partial path string.
+
+    Returns:
+        tuple[bytes, dict]: Raw file contents and parsed file.
+    """
     workspace = dirname(dirname(abspath(__file__)))
     path = join(workspace, name)
     if not exists(path):
@@ -132,81 +233,197 @@ def load_yaml(name: str) -> dict:
         sys.exit()
 
     for _ in range(5):
-        with open(path, "r", encoding="utf-8") as file:
-            config = yaml.safe_load(file)
+        with open(path, "rb") as file:
+            raw = file.read()
+        config = yaml.safe_load(raw)
         if isinstance(config, dict):
             break
         time.sleep(0.1)
     else:
         print(f"{name} file failed to load\033[00m")
         sys.exit()
-    return config
+    return raw, config
 
 
-def load_config() -> dict[str, Any]:
+class YamlCache:
+    """
+    Parsed yaml file that is only parsed again when the file changes.
+    The file is checked at most once every CONFIG_CHECK_INTERVAL seconds
+    and its contents are hashed, so rewrites with the same content
+    (or a touch) do not trigger a new parse.
     """
-    Loads the configuration file.
 
-    Returns:
-        dict[str, Any]: Dictionary config file.
+    def __init__(
+        self, name: str, derive: Optional[Callable[[dict], None]] = None
+    ) -> None:
+        self.name = name
+        self.derive = derive
+        self.lock = threading.Lock()
+        self.value: Optional[dict[str, Any]] = None
+        self.signature: Optional[tuple[int, int, int]] = None
+        self.digest = b""
+        self.checked = 0.0
+
+    def get(self) -> dict[str, Any]:
+        """
+        Gets the parsed file, reloading it if it changed on disk.
+
+        Returns:
+            dict[str, Any]: Dictionary config file.
+        """
+        value = self.value
+        if value is not None and \
+                time.monotonic() - self.checked < CONFIG_CHECK_INTERVAL:
+            return value
+
+        with self.lock:
+            path = join(dirname(dirname(abspath(__file__))), self.name)
+            try:
+                file_stat = stat(path)
+            except FileNotFoundError:
+                print("\033[93mPath does not exist error\033[00m")
+                sys.exit()
+            signature = (
+                file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino)
+
+            if self.value is None or signature != self.signature:
+                raw, config = read_yaml(self.name)
+                digest = hashlib.blake2b(raw, digest_size=16).digest()
+                if self.value is None or digest != self.digest:
+                    if self.derive is not None:
+                        self.derive(config)
+                    self.value = config
+                    self.digest = digest
+                self.signature = signature
+            self.checked = time.monotonic()
+            assert self.value is not None, "Config is None"
+            return self.value
+
+    def invalidate(self) -> None:
+        """Forces the file to be parsed again on the next access."""
+        with self.lock:
+            self.value = None
+
+
+def derive_config(config: dict[str, Any]) -> None:
     """
-    workspace = dirname(dirname(abspath(__file__)))
-    config = load_yaml("config/config.yml")
+    Adds the values derived from the configuration file to it
+    and applies its storage mode to the connection pool.
 
+    Args:
+        config (dict[str, Any]): Parsed configuration file.
+    """
+    workspace = dirname(dirname(abspath(__file__)))
     config["WORKSPACE"] = workspace
     config["ASSETS"] = join(workspace, "assets/")
     config["BACKUP"] = join(workspace, "backup/")
     config["FLASHCARDS"] = join(workspace, "flashcards/")
-    app_name = "Productivity Dashboard - Study Advisor"
-    config["NOTIFICATION"] = Notify(
-        default_notification_application_name=app_name,
-        default_notification_icon=join(
-            workspace, join(workspace, "assets/sprout.gif")
-        ),
-    )
+    config["ARCHIVE"] = join(workspace, "archive/")
+    config["SNAPSHOTS"] = join(workspace, "data/snapshots/")
     config["SECTION_STYLE"] = {
         'margin-left': f"{config['SIDE_PADDING']}px",
         'margin-right': f"{config['SIDE_PADDING']}px",
         'margin-bottom': f"{config['DIVISION_PADDING']}px",
         'margin-top': f"{config['DIVISION_PADDING']}px"
     }
-    return config
+    if config.get("TIMEZONE"):
+        config["TZINFO"] = ZoneInfo(config["TIMEZONE"])
+        config["TZNAME"] = config["TIMEZONE"]
+    else:
+        config["TZINFO"] = timezone(timedelta(hours=config["GMT_OFFSET"]))
+        config["TZNAME"] = f"GMT{config['GMT_OFFSET']:+}"
+    POOL.configure(
+        bool(config.get("WAL_MODE", False)),
+        bool(config.get("CONSOLIDATED_MODE", False))
+    )
+    TRACER.configure(
+        bool(config.get("QUERY_TRACING", False)),
+        config.get("SLOW_QUERY_MS", 100) / 1000, logger3
+    )
+
+
+CONFIG = YamlCache("config/config.yml", derive_config)
+CATEGORIES = YamlCache("config/categories.yml")
+
+
+def load_config() -> dict[str, Any]:
+    """
+    Loads the configuration file. The parsed file is cached and shared,
+    so it should not be modified by the caller.
+
+    Returns:
+        dict[str, Any]: Dictionary config file.
+    """
+    return CONFIG.get()
 
 
 def load_categories() -> dict[str, Any]:
     """
-    Loads the categories configuration file.
+    Loads the categories configuration file. The parsed file is cached
+    and shared, so it should not be modified by the caller.
 
     Returns:
         dict[str, Any]: Dictionary config file.
     """
-    return load_yaml("config/categories.yml")
+    return CATEGORIES.get()
+
+
+def use_storage(storage: Storage) -> Storage:
+    """
+    Switches the engine used by every input and output routine.
+
+    Args:
+        storage (Storage): New storage engine.
+
+    Returns:
+        Storage: Previous storage engine, so it can be restored.
+    """
+    global STORAGE
+    previous, STORAGE = STORAGE, storage
+    for cache in DIMENSION_IDS.values():
+        cache.clear()
+    HOT.clear()
+    return previous
+
+
+def change_token(*tables: str) -> str:
+    """
+    Identifies the state of tables, so page updates can be skipped when
+    it did not change. The day and configuration are included, since
+    views and graphs also depend on them.
+
+    Args:
+        *tables (str): Names of tables.
+
+    Returns:
+        str: Token that changes whenever one of the tables changes.
+    """
+    load_config()
+    versions = [str(CHANGES.version(table)[0]) for table in tables]
+    if getattr(STORAGE, "snapshots", None) is not None:
+        # Reads see the tables as of the latest snapshot
+        versions.append(str(CHANGES.version(SNAPSHOTS)[0]))
+    return ":".join([local_day(), CONFIG.digest.hex()] + versions)
 
 
 @retry(wait=0.3, log_args=True)
 def load_latest_row(name: str) -> pd.DataFrame:
     """
-    Loads latest row of a given dataframe.
+    Loads latest row of a given dataframe. The latest activity row
+    includes the live end of the open session.
 
     Returns:
         pd.DataFrame: Accessed dataframe.
     """
-    # Check if file does not exists
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], f"data/{name}.db")
-    if not exists(path):
-        print("\033[93mPath does not exist error\033[00m")
-        sys.exit()
-
-    # Access database
-    conn = sql.connect(path)
-    assert conn is not None, "conn is None"
-    dataframe = pd.read_sql(
-        f"SELECT *, rowid FROM {name} ORDER BY rowid DESC LIMIT 1", conn
-    )
+    if name == "activity":
+        # Activity strings live in dimension tables, the view joins them
+        dataframe = STORAGE.load_latest(name, "activity_view", False)
+    else:
+        dataframe = STORAGE.load_latest(name, name)
     assert isinstance(dataframe, pd.DataFrame), "Not a dataframe"
     assert not dataframe.empty, "Empty dataframe"
-    conn.close()
+    if name == "activity":
+        dataframe = JOURNAL.merge(dataframe)
     return dataframe
 
 
@@ -219,26 +436,17 @@ def load_day_total(day: int) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Accessed dataframe.
     """
-    # Check if file does not exists
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], "data/activity.db")
-    if not exists(path):
-        print("\033[93mPath does not exist error\033[00m")
-        sys.exit()
     if (day > 363) or not isinstance(day, int):
         print("\033[93mInvalid argument error\033[00m")
         sys.exit()
 
-    # Access database
-    conn = sql.connect(path)
-    assert conn is not None, "conn is None"
-    dataframe = pd.read_sql(
-        f"SELECT Neutral, Personal, Work \
-            FROM totals WHERE days_since = '{day}'", conn
-    )
+    with STORAGE.read("activity", live=True) as conn:
+        dataframe = pd.read_sql(
+            "SELECT Neutral, Personal, Work FROM totals WHERE days_since = ?",
+            conn, params=[day]
+        )
     assert isinstance(dataframe, pd.DataFrame), "Not a dataframe"
     assert not dataframe.empty, "Empty dataframe"
-    conn.close()
     return dataframe
 
 
@@ -254,30 +462,14 @@ def modify_latest_row(
         new_row (pd.DataFrame): New row of database.
         columns_to_update (list[str]): List of columns to update.
     """
-    # Check if file does not exists
     if not isinstance(new_row, pd.DataFrame):
         print("\033[93mWrong argument passed\033[00m")
         sys.exit()
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], f"data/{name}.db")
-    if not exists(path):
-        print("\033[93mPath does not exist error\033[00m")
-        sys.exit()
 
-    # Access database
-    conn = sql.connect(path)
-    assert conn is not None, "conn is None"
-    cursor = conn.cursor()
-    for col in columns_to_update:
-        rowid = new_row.loc[0, "rowid"]
-        val = new_row.loc[0, col]
-        if isinstance(val, str):
-            val = f'"{val}"'
-        cursor.execute(
-            f"UPDATE {name} SET {col} = {val} WHERE rowid = {rowid}"
-        )
-    conn.commit()
-    conn.close()
+    rowid = int(new_row.loc[0, "rowid"])
+    values = {col: new_row.loc[0, col] for col in columns_to_update}
+    STORAGE.update(name, name, rowid, values)
+    CHANGES.publish(name, rowid)
 
 
 @retry(wait=0.1)
@@ -293,16 +485,86 @@ def append_to_database(name: str, new_row: pd.DataFrame) -> None:
         print("\033[93mWrong argument passed\033[00m")
         sys.exit()
 
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], f"data/{name}.db")
-    if not exists(path):
-        print("\033[93mPath does not exist error\033[00m")
+    STORAGE.append(name, name, new_row)
+    CHANGES.publish(name)
+
+
+@retry(wait=0.1)
+def append_activity(new_row: pd.DataFrame) -> None:
+    """
+    Appends rows to the activity database, storing their strings as ids
+    of the dimension tables. Ids are cached, so known strings cost no
+    extra queries. Rows of the day held in memory are added to it.
+
+    Args:
+        new_row (pd.DataFrame): New rows with the activity view columns.
+    """
+    if not isinstance(new_row, pd.DataFrame):
+        print("\033[93mWrong argument passed\033[00m")
         sys.exit()
 
-    conn = sql.connect(path)
-    assert conn is not None, "conn is None"
-    new_row.to_sql(name, conn, if_exists="append", index=False)
-    conn.close()
+    rows = new_row.drop(columns=list(DIMENSIONS))
+    interned = {}
+    with STORAGE.connect("activity") as conn:
+        for col in DIMENSIONS:
+            cache = DIMENSION_IDS[col]
+            values = new_row[col].astype(str)
+            missing = [val for val in values.unique() if val not in cache]
+            found = intern_values(conn, f"dim_{col}", missing)
+            interned[col] = found
+            rows[f"{col}_id"] = values.map(
+                lambda value, cache=cache, found=found:
+                    cache[value] if value in cache else found[value]
+            )
+        rows.to_sql("activity", conn, if_exists="append", index=False)
+        last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        conn.commit()
+
+    # Only committed ids are cached
+    for col, found in interned.items():
+        DIMENSION_IDS[col].update(found)
+    first = last - len(new_row) + 1
+    HOT.append(new_row.assign(rowid=range(first, last + 1)))
+    CHANGES.publish("activity", last)
+
+
+@retry(wait=0.1)
+def load_hot_activity(day: str) -> pd.DataFrame:
+    """
+    Sums the time of the events of a day from the in-memory tier,
+    filling it from the activity database when the day rolls over.
+
+    Args:
+        day (str): Day of the events yyyy-mm-dd.
+
+    Returns:
+        pd.DataFrame: Total and duration by process name, domain,
+            window title and day.
+    """
+    if HOT.day != day:
+        rows = load_dataframe(
+            "activity", True, "activity_view", False,
+            [("day", "=", day)] + route_activity("day", day, day),
+            HOT_COLUMNS
+        )
+        HOT.fill(day, JOURNAL.merge(rows))
+    return HOT.sums()
+
+
+@retry(wait=0.1)
+def load_dimensions() -> dict[str, pd.Series]:
+    """
+    Loads the dimension tables of the activity database.
+
+    Returns:
+        dict[str, pd.Series]: Strings indexed by id, by column name.
+    """
+    dimensions = {}
+    with STORAGE.read("activity", live=True) as conn:
+        for col in DIMENSIONS:
+            dimension = pd.read_sql(f"SELECT id, value FROM dim_{col}", conn)
+            dimensions[col] = dimension.set_index("id")["value"]
+    return dimensions
 
 
 @retry(wait=0.1)
@@ -320,34 +582,25 @@ def load_activity_between(
         pd.DataFrame: Accessed dataframe.
         name (str, optional): database name. Defaults to "activity".
     """
-    # Check if file does not exists
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], f"data/{name}.db")
-    if not exists(path):
-        print("\033[93mPath does not exist error\033[00m")
-        sys.exit()
-
-    # Access database
-    conn = sql.connect(path)
-    assert conn is not None, "conn is None"
-    dataframe = pd.read_sql(
-        f"SELECT *, rowid FROM {name}\
-            WHERE start_time >= {start} AND end_time <= {end}",
-        conn,
-    )
+    dataframe = STORAGE.load_range(name, name, start, end)
     assert isinstance(dataframe, pd.DataFrame), "Not a dataframe"
     assert not dataframe.empty, "Empty dataframe"
-    conn.close()
     return dataframe
 
 
 @retry(wait=0.1)
 def load_dataframe(
     name: str, can_be_empty=False, table: Optional[str] = None,
-    load_rowid=True, where_cond: Optional[tuple] = None
+    load_rowid=True, where_cond: Optional[tuple | list[tuple]] = None,
+    columns: Optional[list[str]] = None,
+    group_by: Optional[list[str]] = None,
+    order_by: Optional[list[str]] = None,
+    limit: Optional[int] = None, offset: Optional[int] = None
 ) -> pd.DataFrame:
     """
-    Loads entire database with the provided name.
+    Loads database with the provided name, letting SQLite do the
+    projection, filtering, grouping and ordering. Columns are cast to
+    the types of TABLE_TYPES, aggregates only if aliased to a column.
 
     Args:
         name (str): Database name.
@@ -355,62 +608,219 @@ def load_dataframe(
         table (str, optional): Table name, otherwise use database name to
             access it. Defaults to None.
         load_rowid (bool, optional): Select rowid. Defaults to True.
-        where_cond (tuple, optional): Used for WHERE clause. Defaults to True.
-            "count > 3" should be passed as ("count", ">", 3)
+        where_cond (tuple | list[tuple], optional): Used for WHERE clause,
+            values are bound parameters. Defaults to None.
+            "count > 3" should be passed as ("count", ">", 3), several
+            conditions as a list of such tuples.
+        columns (list[str], optional): Columns or aggregates such as
+            "SUM(total) AS total". Defaults to all columns.
+        group_by (list[str], optional): GROUP BY columns. Defaults to None.
+        order_by (list[str], optional): ORDER BY columns, optionally
+            followed by ASC or DESC. Defaults to None.
+        limit (int, optional): Maximum number of rows. Defaults to None.
+        offset (int, optional): Number of rows to skip. Defaults to None.
 
     Returns:
         pd.DataFrame: Accessed dataframe.
     """
-    # Check if file does not exists
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], f"data/{name}.db")
-    if not exists(path):
-        print("\033[93mPath does not exist error\033[00m")
-        sys.exit()
-
-    # Access database
     table = name if table is None else table
+    if isinstance(where_cond, tuple):
+        where_cond = [where_cond]
 
-    query = f"SELECT *{', rowid' if load_rowid else ''} "
-    query += f"FROM {table} "
-    if isinstance(where_cond, tuple) and len(where_cond) == 3:
-        query += f"WHERE {where_cond[0]} {where_cond[1]} '{where_cond[2]}'"
-
-    conn = sql.connect(path)
-    dataframe = pd.read_sql(query, conn)
+    dataframe = STORAGE.load(
+        name, table, columns, where_cond, group_by, order_by,
+        limit, offset, load_rowid
+    )
     assert isinstance(dataframe, pd.DataFrame), "Not a dataframe"
     if not can_be_empty:
         assert not dataframe.empty, "Empty dataframe"
-    conn.close()
-    return dataframe
+    return cast_columns(dataframe, TABLE_TYPES.get(table))
+
+
+@retry(wait=0.1)
+def load_columns(
+    name: str, table: Optional[str] = None,
+    where_cond: Optional[tuple | list[tuple]] = None,
+    columns: Optional[list[str]] = None,
+    order_by: Optional[list[str]] = None, limit: Optional[int] = None,
+    as_frame: bool = False
+) -> dict[str, Any] | pd.DataFrame:
+    """
+    Loads a table by column with the types of TABLE_TYPES, so numbers
+    arrive as typed NumPy arrays and strings dictionary encoded.
+
+    Args:
+        name (str): Database name.
+        table (str, optional): Table name, otherwise use database name to
+            access it. Defaults to None.
+        where_cond (tuple | list[tuple], optional): Used for WHERE clause,
+            same format as load_dataframe. Defaults to None.
+        columns (list[str], optional): Columns to load, aggregates are
+            not typed. Defaults to all columns.
+        order_by (list[str], optional): ORDER BY columns, optionally
+            followed by ASC or DESC. Defaults to None.
+        limit (int, optional): Maximum number of rows. Defaults to None.
+        as_frame (bool, optional): Return a dataframe. Defaults to False.
+
+    Returns:
+        dict[str, Any] | pd.DataFrame: Arrays by column name, or the
+            dataframe made of them.
+    """
+    table = name if table is None else table
+    if isinstance(where_cond, tuple):
+        where_cond = [where_cond]
+
+    arrays = STORAGE.load_columns(
+        name, table, columns, where_cond, order_by, limit,
+        TABLE_TYPES.get(table)
+    )
+    assert isinstance(arrays, dict), "Not a dictionary"
+    return pd.DataFrame(arrays, copy=False) if as_frame else arrays
+
+
+@retry(wait=0.1)
+def load_activity_columns(
+    where_cond: Optional[tuple | list[tuple]] = None, as_frame: bool = False
+) -> dict[str, Any] | pd.DataFrame:
+    """
+    Loads activity events by column, with the strings of the dimension
+    tables as categoricals built from the stored ids. No string is
+    copied per event.
+
+    Args:
+        where_cond (tuple | list[tuple], optional): Used for WHERE clause,
+            same format as load_dataframe. Defaults to None.
+        as_frame (bool, optional): Return a dataframe. Defaults to False.
+
+    Returns:
+        dict[str, Any] | pd.DataFrame: Arrays by column name of the
+            activity view, or the dataframe made of them.
+    """
+    arrays = load_columns("activity", "activity", where_cond)
+    assert isinstance(arrays, dict), "Not a dictionary"
+    for col, dimension in load_dimensions().items():
+        ids = arrays.pop(f"{col}_id")
+        positions = np.full(
+            int(dimension.index.max()) + 1 if len(dimension) else 0, -1)
+        positions[dimension.index.to_numpy()] = np.arange(len(dimension))
+        arrays[col] = pd.Categorical.from_codes(
+            positions[ids], pd.Index(dimension.to_numpy()))
+    return pd.DataFrame(arrays, copy=False) if as_frame else arrays
+
+
+def iter_dataframe(
+    name: str, table: Optional[str] = None,
+    where_cond: Optional[tuple | list[tuple]] = None,
+    columns: Optional[list[str]] = None, chunk_size: int = CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams a table in chunks of bounded size, paging on rowid so the
+    connection is only borrowed while each chunk is read. Views have no
+    rowid, so the underlying table must be used. Chunks have the types
+    of TABLE_TYPES.
+
+    Args:
+        name (str): Database name.
+        table (str, optional): Table name, otherwise use database name to
+            access it. Defaults to None.
+        where_cond (tuple | list[tuple], optional): Used for WHERE clause,
+            same format as load_dataframe. Defaults to None.
+        columns (list[str], optional): Columns to load, aggregates are not
+            allowed. Defaults to all columns.
+        chunk_size (int, optional): Maximum rows per chunk.
+            Defaults to CHUNK_SIZE.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the table, in rowid order.
+    """
+    table = name if table is None else table
+    if isinstance(where_cond, tuple):
+        where_cond = [where_cond]
+    last_rowid = -(2 ** 63)
+    while True:
+        chunk = STORAGE.load(
+            name, table, columns,
+            [("rowid", ">", last_rowid)] + (where_cond or []),
+            order_by=["rowid"], limit=chunk_size
+        )
+        if chunk.empty:
+            return
+        last_rowid = int(chunk["rowid"].iloc[-1])
+        yield cast_columns(
+            chunk.drop(columns="rowid"), TABLE_TYPES.get(table))
+        if chunk.shape[0] < chunk_size:
+            return
 
 
 @retry(wait=0.1)
-def save_dataframe(df: pd.DataFrame, name: str, table: Optional[str] = None):
+def save_dataframe(
+    df: pd.DataFrame, name: str, table: Optional[str] = None
+) -> bool:
     """
     Saves dataframe to .db file.
 
     Args:
         dataframe (pd.DataFrame): Dataframe to be saved.
         path (str): Location the dataframe will be saved.
+
+    Returns:
+        bool: True once saved, the retry decorator returns None if
+            every attempt failed.
     """
     if not isinstance(df, pd.DataFrame):
         print("\033[93mWrong argument passed\033[00m")
         sys.exit()
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], f"data/{name}.db")
     table = name if table is None else table
 
-    conn = sql.connect(path)
-    assert conn is not None, "conn is None"
-    conn.execute("BEGIN EXCLUSIVE")
-    df.to_sql(table, conn, if_exists="replace", index=False)
-    conn.close()
+    STORAGE.replace(name, table, df)
+    CHANGES.publish(table)
+    return True
+
+
+def write_dataframe(df: pd.DataFrame, name: str, table: str) -> None:
+    """
+    Saves a queued dataframe in the writer thread, raising if every
+    attempt failed so the writer counts the failure.
+
+    Args:
+        df (pd.DataFrame): Dataframe to be saved.
+        name (str): Name of database.
+        table (str): Table name.
+    """
+    if not save_dataframe(df, name, table):
+        raise RuntimeError(f"Could not save {table} to {name}")
+
+
+def queue_dataframe(
+    df: pd.DataFrame, name: str, table: Optional[str] = None
+) -> bool:
+    """
+    Queues a dataframe to be saved by the writer thread of its database.
+    A newer dataframe for the same table supersedes one still queued.
+
+    Args:
+        df (pd.DataFrame): Dataframe to be saved.
+        name (str): Name of database.
+        table (str, optional): Table name, otherwise use database name to
+            access it. Defaults to None.
+
+    Returns:
+        bool: If the dataframe was queued.
+    """
+    table = name if table is None else table
+    writer = WRITERS.get(name)
+    queued = writer.submit(
+        write_dataframe, df, name, table, key=("replace", table))
+    if not queued:
+        print(f"\033[93mWrite queue of {name} is full, dropped {table}, "
+              f"{writer.stats()}\033[00m")
+    return queued
 
 
 def load_input_time(name: str) -> int:
     """
     Will return the time of last input from path.
+    Heartbeat signals are read from the shared heartbeat board.
 
     Args:
         path (str): Path of last input dataframe.
@@ -418,6 +828,8 @@ def load_input_time(name: str) -> int:
     Returns:
         int: Time of latest input from path.
     """
+    if name in BOARD.slots:
+        return BOARD.load(name)
     device = load_latest_row(name)
     if device is None:
         return -1
@@ -425,6 +837,18 @@ def load_input_time(name: str) -> int:
     return recorded_time
 
 
+def save_input_time(name: str, value: Optional[int] = None) -> None:
+    """
+    Stores the time of the latest input in the heartbeat board.
+
+    Args:
+        name (str): Name of heartbeat signal.
+        value (int, optional): Time of input. Defaults to now.
+    """
+    cfg = load_config()
+    BOARD.beat(name, value, cfg["HEARTBEAT_FLUSH_INTERVAL"])
+
+
 @retry(wait=0.1)
 def load_url(page_title: str) -> pd.DataFrame:
     """
@@ -436,28 +860,20 @@ def load_url(page_title: str) -> pd.DataFrame:
     Returns:
         str: URL of the page.
     """
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], "data/urls.db")
-    if not exists(path):
-        print("\033[93mPath does not exist error\033[00m")
-        sys.exit()
-
     # Load the file and output list of URLs
     query = """
         SELECT *, rowid FROM urls
         WHERE title = ?
     """
-    conn = sql.connect(path)
-    assert conn is not None, "conn is None"
-    url = pd.read_sql(query, conn, params=[page_title])
+    with STORAGE.read("urls", live=True) as conn:
+        url = pd.read_sql(query, conn, params=[page_title])
     assert isinstance(url, pd.DataFrame), "Not a URL dataframe"
-    conn.close()
     return url
 
 
 @retry(wait=0.1)
 def set_idle():
-    """Function that sets all input databases to idle state."""
+    """Function that sets all input heartbeats to idle state."""
     time.sleep(1)
     cfg = load_config()
     now = int(time.time())
@@ -465,11 +881,8 @@ def set_idle():
     inputs = ["mouse", "keyboard", "audio"]
 
     for input_name in inputs:
-        input_dataframe = load_latest_row(input_name)
-        assert input_dataframe is not None, "Failed to get latest row"
-        if now - int(input_dataframe.at[0, "time"]) < idle_time:
-            input_dataframe.loc[0, "time"] = now - idle_time
-            modify_latest_row(input_name, input_dataframe, ["time"])
+        if now - load_input_time(input_name) < idle_time:
+            save_input_time(input_name, now - idle_time)
 
 
 def timestamp_to_day(values: pd.Series) -> pd.Series:
@@ -484,12 +897,302 @@ def timestamp_to_day(values: pd.Series) -> pd.Series:
     """
     cfg = load_config()
     dates = pd.Series(
-        pd.to_datetime(values, unit="s")
-        + pd.Timedelta(cfg["GMT_OFFSET"], unit="h")
-    ).dt.date
+        pd.to_datetime(values, unit="s", utc=True)
+    ).dt.tz_convert(cfg["TZINFO"]).dt.date
     return dates
 
 
+def local_day(timestamp: Optional[float] = None) -> str:
+    """
+    Converts a timestamp into the local date yyyy-mm-dd.
+
+    Args:
+        timestamp (float, optional): Timestamp. Defaults to now.
+
+    Returns:
+        str: Local date.
+    """
+    cfg = load_config()
+    timestamp = time.time() if timestamp is None else timestamp
+    return datetime.fromtimestamp(timestamp, cfg["TZINFO"]).strftime(
+        "%Y-%m-%d")
+
+
+def utc_offset(zone: tzinfo, timestamp: Optional[float] = None) -> int:
+    """
+    Gets the UTC offset of a timezone at the given time in minutes.
+
+    Args:
+        zone (tzinfo): Timezone.
+        timestamp (float, optional): Timestamp. Defaults to now.
+
+    Returns:
+        int: UTC offset in minutes.
+    """
+    timestamp = time.time() if timestamp is None else timestamp
+    offset = datetime.fromtimestamp(timestamp, zone).utcoffset()
+    assert offset is not None, "Timezone without offset"
+    return int(offset.total_seconds() // 60)
+
+
+@retry(wait=0.1)
+def update_activity_days(full: bool = False) -> int:
+    """
+    Stores the local day of activity events that do not have one yet,
+    or of every event when full is True (timezone changes).
+
+    Args:
+        full (bool, optional): Recompute all days. Defaults to False.
+
+    Returns:
+        int: Number of updated events.
+    """
+    cfg = load_config()
+    query = "SELECT rowid, start_time FROM activity"
+    query += "" if full else " WHERE day = ''"
+    with STORAGE.connect("activity") as conn:
+        events = pd.read_sql(query, conn)
+        events["day"] = timestamp_to_day(events["start_time"]).astype(str)
+        update_rows(conn, "activity", events[["day", "rowid"]], ["rowid"])
+        conn.execute(
+            "INSERT OR REPLACE INTO settings (label, value) VALUES (?, ?)",
+            ("day_timezone", cfg["TZNAME"]))
+        conn.commit()
+    CHANGES.publish("activity")
+    if full:
+        refresh_activity_partitions(True)
+    return len(events)
+
+
+@retry(wait=0.1)
+def refresh_activity_partitions(full: bool = False) -> pd.DataFrame:
+    """
+    Records the ranges of the partitions of the activity database,
+    reading every event when full is True or the size of the
+    partitions changed.
+
+    Args:
+        full (bool, optional): Read every event. Defaults to False.
+
+    Returns:
+        pd.DataFrame: Partitions ordered by period.
+    """
+    months = int(load_config()["ACTIVITY_PARTITION_MONTHS"])
+    with STORAGE.connect("activity") as conn:
+        setting = conn.execute(
+            "SELECT value FROM settings WHERE label = 'partition_months'"
+        ).fetchone()
+        full |= setting is None or int(setting[0]) != months
+        refresh_partitions(conn, months, full)
+        conn.execute(
+            "INSERT OR REPLACE INTO settings (label, value) VALUES (?, ?)",
+            ("partition_months", months))
+        conn.commit()
+        return load_partitions(conn, months)
+
+
+@retry(wait=0.1)
+def route_activity(
+    column: str, low: Optional[Any] = None, high: Optional[Any] = None
+) -> list[tuple]:
+    """
+    Routes a range of the activity database to its partitions, so
+    queries only read the rowids of the partitions that overlap it.
+
+    Args:
+        column (str): "start" for start times or "day" for days.
+        low (Any, optional): First start time or day. Defaults to None.
+        high (Any, optional): Last start time or day. Defaults to None.
+
+    Returns:
+        list[tuple]: Predicates on rowid, same format as load_dataframe.
+    """
+    months = int(load_config()["ACTIVITY_PARTITION_MONTHS"])
+    with STORAGE.read("activity") as conn:
+        partitions = load_partitions(conn, months)
+    return route_partitions(partitions, column, low, high)
+
+
+@retry(wait=0.1)
+def archive_activity(
+    days: Optional[int] = None, folder: Optional[str] = None
+) -> int:
+    """
+    Moves the events of days older than ARCHIVE_AFTER_DAYS from the
+    activity database to monthly Parquet files, one month at a time.
+    Files are written before events are deleted, so an interrupted run
+    only leaves copies that the next run archives again.
+
+    Args:
+        days (int, optional): Days kept in the activity database, 0
+            disables archiving. Defaults to ARCHIVE_AFTER_DAYS.
+        folder (str, optional): Archive folder. Defaults to ARCHIVE.
+
+    Returns:
+        int: Number of archived events.
+    """
+    cfg = load_config()
+    days = cfg["ARCHIVE_AFTER_DAYS"] if days is None else days
+    folder = cfg["ARCHIVE"] if folder is None else folder
+    if days <= 0:
+        return 0
+    cutoff = local_day(time.time() - days * 86400)
+    with STORAGE.connect("activity") as conn:
+        months = conn.execute(
+            "SELECT DISTINCT substr(day, 1, 7) FROM activity "
+            "WHERE day != '' AND day < ?", (cutoff,)
+        ).fetchall()
+
+    archived = 0
+    for (month,) in months:
+        events = load_dataframe(
+            "activity", True, "activity_view", False, [
+                ("day", ">=", month), ("day", "LIKE", f"{month}-%"),
+                ("day", "<", cutoff)
+            ] + route_activity("day", month, cutoff), ARCHIVE_COLUMNS
+        )
+        assert events is not None
+        if events.empty:
+            continue
+        write_archive(folder, events)
+        bulk_delete("activity", events[["rowid"]])
+        archived += events.shape[0]
+    if archived:
+        refresh_activity_partitions(True)
+    return archived
+
+
+@retry(wait=0.1)
+def load_activity_history(
+    first_day: Optional[str] = None, last_day: Optional[str] = None,
+    columns: Optional[list[str]] = None, folder: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Loads the events of a range of days from both the archive and the
+    activity database, with the columns of the activity view.
+
+    Args:
+        first_day (str, optional): First day yyyy-mm-dd. Defaults to None.
+        last_day (str, optional): Last day yyyy-mm-dd. Defaults to None.
+        columns (list[str], optional): Columns to load.
+            Defaults to ARCHIVE_COLUMNS.
+        folder (str, optional): Archive folder. Defaults to ARCHIVE.
+
+    Returns:
+        pd.DataFrame: Events of archived days first, then live events.
+    """
+    folder = load_config()["ARCHIVE"] if folder is None else folder
+    columns = ARCHIVE_COLUMNS if columns is None else columns
+    loaded = columns + ([] if "rowid" in columns else ["rowid"])
+    where = [("day", ">=", first_day)] if first_day else []
+    where += [("day", "<=", last_day)] if last_day else []
+    live = load_dataframe(
+        "activity", True, "activity_view", False,
+        where + route_activity("day", first_day, last_day), loaded
+    )
+    archived = read_archive(folder, first_day, last_day, loaded)
+    frames = [frame for frame in (archived, live) if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    # Events of an interrupted archive run are in both places
+    dataframe = pd.concat(frames, ignore_index=True)
+    dataframe = dataframe.drop_duplicates("rowid", keep="last")
+    return dataframe[columns].reset_index(drop=True)
+
+
+def load_archive_files() -> dict[str, tuple[int, int]]:
+    """
+    Lists the archived months of activity.
+
+    Returns:
+        dict[str, tuple[int, int]]: File signature by month yyyy-mm.
+    """
+    return archive_files(load_config()["ARCHIVE"])
+
+
+@retry(wait=0.1)
+def load_archive_sums(month: str) -> pd.DataFrame:
+    """
+    Sums the time of the archived events of a month.
+
+    Args:
+        month (str): Month yyyy-mm.
+
+    Returns:
+        pd.DataFrame: Total and duration by process name, domain,
+            window title and day.
+    """
+    return sum_archive(load_config()["ARCHIVE"], month)
+
+
+@retry(wait=0.1)
+def publish_snapshots(folder: Optional[str] = None) -> int:
+    """
+    Publishes read-only copies of the SNAPSHOT_DATABASES when their
+    tables changed since the last copy. Readers switch to a version once
+    the change board announces it, and old versions are deleted.
+
+    Args:
+        folder (str, optional): Snapshot folder. Defaults to SNAPSHOTS.
+
+    Returns:
+        int: Version of the published snapshots, 0 if nothing changed.
+    """
+    folder = load_config()["SNAPSHOTS"] if folder is None else folder
+    if not isinstance(STORAGE, SQLiteStorage) or \
+            not CHANGES.poll(SNAPSHOTS, SNAPSHOT_TABLES):
+        return 0
+    makedirs(folder, exist_ok=True)
+    version = time.time_ns()
+    for name in SNAPSHOT_DATABASES:
+        snapshot_database(STORAGE.pool, name, snapshot_path(
+            folder, STORAGE.pool.resolve(name), version))
+    CHANGES.publish(SNAPSHOTS, version)
+    CHANGES.ack(SNAPSHOTS)
+    prune_snapshots(folder)
+    return version
+
+
+def use_snapshots(folder: Optional[str] = None) -> None:
+    """
+    Serves the heavy reads of this process from the published snapshots,
+    for processes that read the activity but never write it. Reads use
+    the live databases until a snapshot at most three intervals old is
+    published.
+
+    Args:
+        folder (str, optional): Snapshot folder. Defaults to SNAPSHOTS.
+    """
+    cfg = load_config()
+    folder = cfg["SNAPSHOTS"] if folder is None else folder
+    if cfg["SNAPSHOT_INTERVAL"] <= 0 or not isinstance(STORAGE, SQLiteStorage):
+        return
+    use_storage(SQLiteStorage(STORAGE.pool, SnapshotPool(
+        folder, CHANGES, 3 * cfg["SNAPSHOT_INTERVAL"], STORAGE.pool)))
+
+
+@retry(wait=0.1)
+def update_day_settings() -> None:
+    """
+    Stores the current UTC offset used by the totals view and recomputes
+    the stored days of all events if the timezone changed.
+    """
+    cfg = load_config()
+    offset = utc_offset(cfg["TZINFO"])
+    with STORAGE.connect("activity") as conn:
+        setting = conn.execute(
+            "SELECT value FROM settings WHERE label = 'day_timezone'"
+        ).fetchall()
+        q = "INSERT OR REPLACE INTO settings (label, value) VALUES (?, ?)"
+        conn.execute(
+            q, ("total_offset", f"{offset} minutes"))
+        conn.execute(
+            q, ("gmt_offset", str(int(offset // 60))))
+        conn.commit()
+    update_activity_days(not setting or setting[0][0] != cfg["TZNAME"])
+
+
 def send_notification(
     title: str, message: str, audio: str = "notification"
 ) -> None:
@@ -503,7 +1206,12 @@ def send_notification(
         audio (str): Desired audio to play.
     """
     cfg = load_config()
-    notification = cfg["NOTIFICATION"]
+    notification = Notify(
+        default_notification_application_name=(
+            "Productivity Dashboard - Study Advisor"),
+        default_notification_icon=join(
+            cfg["WORKSPACE"], "assets/sprout.gif"),
+    )
     notification.title = title
     notification.message = message
     notification.audio = join(cfg["WORKSPACE"], "assets", audio + ".wav")
@@ -518,10 +1226,7 @@ def check_dataframe(name: str) -> bool:
     Returns:
         bool: If the dataframe exists.
     """
-    # Check if file does not exists
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], f"data/{name}.db")
-    return exists(path)
+    return STORAGE.exists(name)
 
 
 @retry(wait=0.1)
@@ -534,58 +1239,318 @@ def delete_from_dataframe(name: str, column: str, values: list) -> None:
         column (str): Column of database.
         values (list): List of values to delete.
     """
-    cfg = load_config()
-    path = join(cfg["WORKSPACE"], f"data/{name}.db")
-    if not exists(path):
-        print("\033[93mPath does not exist error\033[00m")
-        sys.exit()
+    STORAGE.delete(name, name, column, values)
+    CHANGES.publish(name)
 
-    query = f"DELETE FROM {name} \
-        WHERE {column} \
-            IN ({', '.join('?' for _ in values)})"
 
-    conn = sql.connect(path)
-    assert conn is not None, "conn is None"
-    cursor = conn.cursor()
-    cursor.execute(query, values)
-    conn.commit()
-    conn.close()
+@retry(wait=0.1)
+def bulk_delete(
+    name: str, keys: pd.DataFrame, table: Optional[str] = None
+) -> int:
+    """
+    Deletes the rows whose columns match any row of keys. Keys are
+    staged in a temporary table, so their number is not limited.
 
+    Args:
+        name (str): Name of database.
+        keys (pd.DataFrame): Values of the key columns to delete.
+        table (str, optional): Table name, otherwise use database name to
+            access it. Defaults to None.
 
-def start_databases() -> None:
-    """Initializes databases with proper schema."""
+    Returns:
+        int: Number of deleted rows.
+    """
+    table = name if table is None else table
+    deleted = STORAGE.delete_rows(name, table, keys)
+    CHANGES.publish(table)
+    return deleted
+
+
+@retry(wait=0.1)
+def bulk_update(
+    name: str, dataframe: pd.DataFrame, keys: list[str],
+    table: Optional[str] = None
+) -> int:
+    """
+    Updates the rows matching the key columns of the dataframe with its
+    other columns, in a single transaction.
+
+    Args:
+        name (str): Name of database.
+        dataframe (pd.DataFrame): Key and new values of each row.
+        keys (list[str]): Columns that identify a row.
+        table (str, optional): Table name, otherwise use database name to
+            access it. Defaults to None.
+
+    Returns:
+        int: Number of updated rows.
+    """
+    table = name if table is None else table
+    updated = STORAGE.update_rows(name, table, dataframe, keys)
+    CHANGES.publish(table)
+    return updated
+
+
+@retry(wait=0.1)
+def bulk_upsert(
+    name: str, dataframe: pd.DataFrame, keys: list[str],
+    table: Optional[str] = None
+) -> int:
+    """
+    Updates the rows matching the key columns of the dataframe and
+    inserts the others, in a single transaction.
+
+    Args:
+        name (str): Name of database.
+        dataframe (pd.DataFrame): Rows to be written.
+        keys (list[str]): Columns that identify a row.
+        table (str, optional): Table name, otherwise use database name to
+            access it. Defaults to None.
+
+    Returns:
+        int: Number of updated and inserted rows.
+    """
+    table = name if table is None else table
+    written = STORAGE.upsert_rows(name, table, dataframe, keys)
+    CHANGES.publish(table)
+    return written
+
+
+@retry(wait=0.1)
+def recover_session() -> None:
+    """
+    Writes the open session end left in the journal to the database,
+    so an interrupted tracker loses at most one journal append.
+    """
+    latest = JOURNAL.latest()
+    if latest is not None:
+        rowid, end_time = latest
+        with STORAGE.connect("activity") as conn:
+            conn.execute(
+                "UPDATE activity SET end_time = ? "
+                "WHERE rowid = ? AND end_time < ?",
+                (end_time, rowid, end_time)
+            )
+            conn.commit()
+    JOURNAL.clear()
+
+
+def replay_sessions(
+    since: Optional[int] = None, until: Optional[int] = None,
+    idle_time: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Rebuilds activity sessions from the logged samples, for example to
+    compare them under another idle time. Nothing is written.
+
+    Args:
+        since (int, optional): Only samples after this time.
+            Defaults to None.
+        until (int, optional): Only samples up to this time.
+            Defaults to None.
+        idle_time (int, optional): Seconds without samples that end a
+            session. Defaults to IDLE_TIME.
+
+    Returns:
+        pd.DataFrame: Sessions with the activity view columns.
+    """
     cfg = load_config()
-    for schema_file in listdir(join(cfg["WORKSPACE"], "schema")):
-        database, table = schema_file.split("-")
-        table = table.split(".")[0]
-        path = join(cfg["WORKSPACE"], f"data/{database}.db")
-        conn = sql.connect(path)
-        assert conn is not None, "conn is None"
-        cursor = conn.cursor()
+    idle_time = cfg["IDLE_TIME"] if idle_time is None else idle_time
+    sessions = fold_samples(
+        SAMPLES.read(since, until), None, idle_time, local_day)
+    return pd.DataFrame(sessions, columns=SESSION_COLUMNS)
+
+
+def apply_schemas() -> list[str]:
+    """
+    Creates the tables and views of the schema files that changed since
+    they were last applied to their database. Unchanged derived tables
+    keep their contents across restarts.
+
+    Returns:
+        list[str]: Names of the applied schema files.
+    """
+    cfg = load_config()
+    applied = []
+    # Sorted, so tables come before the triggers and views that use them
+    for schema_file in sorted(listdir(join(cfg["WORKSPACE"], "schema"))):
+        database = schema_file.split("-")[0]
         schema_path = join(cfg["WORKSPACE"], f'schema/{schema_file}')
         with open(schema_path, 'r', encoding='utf-8') as file:
             schema = file.read()
-        cursor.executescript(schema)
+        with STORAGE.connect(database, create=True) as conn:
+            if apply_schema(conn, schema_file, schema):
+                applied.append(schema_file)
+    return applied
+
+
+def detach_legacy_activity() -> bool:
+    """
+    Renames an activity table that still stores its strings inline,
+    so the schema can create the dimension layout next to it. Applied
+    schema versions are forgotten, so every schema file runs again.
+
+    Returns:
+        bool: If a legacy table was renamed.
+    """
+    with STORAGE.connect("activity") as conn:
+        info = conn.execute('PRAGMA table_info("activity")').fetchall()
+        if "process_name" not in [row[1] for row in info]:
+            return False
+        indexes = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'activity' AND sql IS NOT NULL"
+        ).fetchall()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute('DROP VIEW IF EXISTS "activity_view"')
+        for (index,) in indexes:
+            conn.execute(f'DROP INDEX "{index}"')
+        conn.execute('ALTER TABLE "activity" RENAME TO "activity_legacy"')
+        conn.execute(f'DROP TABLE IF EXISTS "{SCHEMA_VERSIONS}"')
         conn.commit()
-        conn.close()
-
-    conn = sql.connect(join(cfg["WORKSPACE"], "data/activity.db"))
-    assert conn is not None, "conn is None"
-    cursor = conn.cursor()
-    q = "INSERT OR REPLACE INTO settings (label, value) VALUES (?, ?)"
-    cursor.execute(
-        q, ("total_offset", f"{cfg['GMT_OFFSET']} hours"))
-    cursor.execute(
-        q, ("gmt_offset", str(cfg['GMT_OFFSET'])))
-    conn.commit()
-    conn.close()
+    return True
+
+
+def migrate_legacy_activity() -> None:
+    """
+    Moves the rows of a renamed legacy activity table into the
+    dimension layout, keeping their rowids.
+    """
+    with STORAGE.connect("activity") as conn:
+        legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+            "AND name = 'activity_legacy'"
+        ).fetchone()
+        if legacy is None:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        for col in DIMENSIONS:
+            conn.execute(
+                f"INSERT OR IGNORE INTO dim_{col} (value) "
+                f"SELECT DISTINCT {col} FROM activity_legacy"
+            )
+        ids = ", ".join(f"{col}_id" for col in DIMENSIONS)
+        values = ", ".join(
+            f"(SELECT id FROM dim_{col} WHERE value = t.{col})"
+            for col in DIMENSIONS
+        )
+        conn.execute(
+            f"INSERT INTO activity (rowid, start_time, end_time, {ids}, day) "
+            f"SELECT t.rowid, t.start_time, t.end_time, {values}, t.day "
+            "FROM activity_legacy t ORDER BY t.rowid"
+        )
+        conn.execute('DROP TABLE "activity_legacy"')
+        conn.commit()
+    for cache in DIMENSION_IDS.values():
+        cache.clear()
+
+
+@retry(wait=0.1)
+def rebuild_search_index() -> None:
+    """Indexes every activity event for full-text search again."""
+    with STORAGE.connect("activity") as conn:
+        conn.execute(
+            "INSERT INTO activity_search (activity_search) VALUES ('rebuild')")
+        conn.commit()
+
+
+def search_terms(text: str) -> str:
+    """
+    Turns free text into a full-text query of quoted prefix terms,
+    so user input can not use or break the query syntax.
+
+    Args:
+        text (str): Text to search for.
+
+    Returns:
+        str: Full-text query matching events that have every term.
+    """
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+@retry(wait=0.1)
+def search_activity(
+    text: str, first_day: Optional[str] = None,
+    last_day: Optional[str] = None, limit: int = 50, offset: int = 0
+) -> pd.DataFrame:
+    """
+    Searches the titles, URLs and domains of activity events.
+
+    Args:
+        text (str): Text to search for.
+        first_day (str, optional): First day yyyy-mm-dd. Defaults to None.
+        last_day (str, optional): Last day yyyy-mm-dd. Defaults to None.
+        limit (int, optional): Maximum number of events. Defaults to 50.
+        offset (int, optional): Number of events to skip. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: Matching events, best matches first.
+    """
+    params = [
+        search_terms(text), first_day or "", last_day or "9999-12-31",
+        limit, offset
+    ]
+    with STORAGE.read("activity") as conn:
+        dataframe = pd.read_sql(SEARCH_QUERY, conn, params=params)
+    assert isinstance(dataframe, pd.DataFrame), "Not a dataframe"
+    return dataframe
+
+
+@retry(wait=0.1)
+def search_activity_days(
+    text: str, first_day: Optional[str] = None,
+    last_day: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Counts the activity events that match a search on each day.
+
+    Args:
+        text (str): Text to search for.
+        first_day (str, optional): First day yyyy-mm-dd. Defaults to None.
+        last_day (str, optional): Last day yyyy-mm-dd. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Events and hours of matches by day, latest first.
+    """
+    params = [search_terms(text), first_day or "", last_day or "9999-12-31"]
+    with STORAGE.read("activity") as conn:
+        dataframe = pd.read_sql(SEARCH_DAYS_QUERY, conn, params=params)
+    assert isinstance(dataframe, pd.DataFrame), "Not a dataframe"
+    return dataframe
+
+
+def start_databases() -> None:
+    """Initializes databases with proper schema."""
+    if POOL.consolidated:
+        consolidate_databases()
+    else:
+        separate_databases()
+    if check_dataframe("activity"):
+        with STORAGE.connect("activity") as conn:
+            ensure_column(conn, "activity", "day", 'TEXT DEFAULT "" NOT NULL')
+        detach_legacy_activity()
+    with STORAGE.connect("activity", create=True) as conn:
+        indexed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'activity_search'"
+        ).fetchone() is not None
+
+    apply_schemas()
+    migrate_legacy_activity()
+    if not indexed:
+        rebuild_search_index()
+    update_day_settings()
+    refresh_activity_partitions(True)
+    archive_activity()
+    recover_session()
+    SAMPLES.prune(load_config()["SAMPLE_LOG_DAYS"], int(time.time()))
+    with STORAGE.connect("activity") as conn:
+        conn.execute("PRAGMA optimize").fetchall()
 
     # Start these to prevent errors from last interruption
-    save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'mouse')
-    save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'keyboard')
-    save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'frontend')
-    save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'backend')
-    save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'audio')
+    for name in HEARTBEATS:
+        save_input_time(name)
+    BOARD.flush()
 
 
 def format_deck(lines: list, deck_name: str) -> list:
@@ -705,12 +1670,15 @@ def update_flashcard(
     ] = [new_interval, new_ef]
     flashcards.loc[index[0], 'next_access'] = int(time.time()) + new_interval
     flashcards.loc[index[0], 'last_access'] = int(time.time())
+    bulk_update("flashcards", flashcards.loc[[index[0]], [
+        'access_interval', 'ease_factor', 'next_access', 'last_access',
+        'deck_name', 'question'
+    ]], ['deck_name', 'question'])
 
     flashcards = flashcards.sort_values(
         by=["next_access", "last_access", "ease_factor"],
         ascending=[True, True, True]
     ).reset_index(drop=True)
-    save_dataframe(flashcards, "flashcards", "flashcards")
     return flashcards
 
 
@@ -732,6 +1700,11 @@ def update_flashcards_database() -> pd.DataFrame:
             "question", "deck_name", "last_access",
             "access_interval", "ease_factor", "next_access", "answer"])
 
+    # Cards whose question left the files are deleted
+    keys = ['question', 'deck_name']
+    stale = cards[keys].merge(loaded_cards[keys], how='left', indicator=True)
+    stale = stale.loc[stale['_merge'] == 'left_only', keys]
+
     # Merge the new flashcards with the old ones
     cards = cards.merge(
         loaded_cards, on=['question', 'deck_name'], how='right'
@@ -752,5 +1725,7 @@ def update_flashcards_database() -> pd.DataFrame:
         by=["next_access", "last_access", "ease_factor"],
         ascending=[True, True, True]
     ).reset_index(drop=True)
-    save_dataframe(cards, "flashcards", "flashcards")
+    if not stale.empty:
+        bulk_delete("flashcards", stale)
+    bulk_upsert("flashcards", cards, keys)
     return cards
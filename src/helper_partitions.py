@@ -0,0 +1,129 @@
+"""
+Collection of helper functions for the time partitions of activity.
+"""
+import sqlite3 as sql
+from datetime import datetime, timezone
+from typing import Any, Optional
+import numpy as np
+import pandas as pd
+
+PARTITIONS = "activity_partitions"
+PERIOD = """(
+    CAST(strftime('%Y', start_time, 'unixepoch') AS INTEGER) * 12
+    + CAST(strftime('%m', start_time, 'unixepoch') AS INTEGER) - 1
+) / {months}"""
+REFRESH_QUERY = """
+    INSERT INTO activity_partitions
+    SELECT {period} AS period, MIN(rowid), MAX(rowid), MIN(start_time),
+        MAX(start_time), MIN(day), MAX(day)
+    FROM activity
+    WHERE rowid >= ?
+    GROUP BY period
+    ON CONFLICT (period) DO UPDATE SET
+        first_rowid = MIN(first_rowid, excluded.first_rowid),
+        last_rowid = MAX(last_rowid, excluded.last_rowid),
+        first_start = MIN(first_start, excluded.first_start),
+        last_start = MAX(last_start, excluded.last_start),
+        first_day = MIN(first_day, excluded.first_day),
+        last_day = MAX(last_day, excluded.last_day)
+"""
+
+
+def period_start(period: int, months: int) -> int:
+    """
+    Gets the first UTC timestamp of a partition.
+
+    Args:
+        period (int): Number of the partition since year 0.
+        months (int): Months in each partition.
+
+    Returns:
+        int: Timestamp of the first second of the partition.
+    """
+    month = period * months
+    start = datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp())
+
+
+def refresh_partitions(
+    conn: sql.Connection, months: int, full: bool = False
+) -> None:
+    """
+    Records the rowid, start time and day ranges of each partition of
+    activity. Events are appended in time order, so only the latest
+    partition and the events after it are read, unless full is True.
+    The caller commits.
+
+    Args:
+        conn (sql.Connection): Connection to the activity database.
+        months (int): Months in each partition.
+        full (bool, optional): Read every event. Defaults to False.
+    """
+    latest = None if full else conn.execute(
+        f"SELECT first_rowid FROM {PARTITIONS} ORDER BY period DESC LIMIT 1"
+    ).fetchone()
+    if latest is None:
+        conn.execute(f"DELETE FROM {PARTITIONS}")
+        latest = (-(2 ** 63),)
+    period = PERIOD.format(months=int(months))
+    conn.execute(REFRESH_QUERY.format(period=period), latest)
+
+
+def load_partitions(conn: sql.Connection, months: int) -> pd.DataFrame:
+    """
+    Loads the partitions of activity with their time bounds. The
+    latest partition is open, it has no end and takes every new event.
+    Closed partitions do not hold the newest event, so they no longer
+    change.
+
+    Args:
+        conn (sql.Connection): Connection to the activity database.
+        months (int): Months in each partition.
+
+    Returns:
+        pd.DataFrame: Partitions ordered by period.
+    """
+    partitions = pd.read_sql(
+        f"SELECT * FROM {PARTITIONS} ORDER BY period", conn)
+    periods = partitions["period"].astype(int)
+    partitions["low"] = [period_start(p, months) for p in periods]
+    partitions["high"] = [period_start(p + 1, months) for p in periods]
+    partitions["latest"] = np.arange(len(partitions)) == len(partitions) - 1
+    partitions["closed"] = ~partitions["latest"] & (
+        partitions["last_rowid"] < partitions["last_rowid"].max())
+    return partitions
+
+
+def route_partitions(
+    partitions: pd.DataFrame, column: str, low: Optional[Any] = None,
+    high: Optional[Any] = None
+) -> list[tuple]:
+    """
+    Routes a range of start times or days to the partitions that
+    overlap it.
+
+    Args:
+        partitions (pd.DataFrame): Partitions ordered by period.
+        column (str): "start" for start times or "day" for days.
+        low (Any, optional): First start time or day. Defaults to None.
+        high (Any, optional): Last start time or day. Defaults to None.
+
+    Returns:
+        list[tuple]: Predicates on rowid in the format of select_query,
+            none when there are no partitions yet.
+    """
+    if partitions.empty:
+        return []
+    latest = np.arange(len(partitions)) == len(partitions) - 1
+    overlap = np.ones(len(partitions), dtype=bool)
+    if high is not None:
+        overlap &= (partitions[f"first_{column}"] <= high).to_numpy()
+    if low is not None:
+        overlap &= (partitions[f"last_{column}"] >= low).to_numpy() | latest
+    if not overlap.any():
+        return [("rowid", "IS", None)]
+    routed = partitions[overlap]
+    predicates = [("rowid", ">=", int(routed["first_rowid"].min()))]
+    if not overlap[-1]:
+        predicates.append(("rowid", "<=", int(routed["last_rowid"].max())))
+    return predicates
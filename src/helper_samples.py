@@ -0,0 +1,279 @@
+"""
+Collection of helper functions for the binary log of tracker samples.
+"""
+# pylint: disable=too-many-arguments
+import os
+import struct
+import threading
+from datetime import datetime, timezone
+from os.path import exists, join
+from typing import Callable, Optional
+import numpy as np
+import pandas as pd
+
+RECORD = struct.Struct("<qB3xIIII")
+DTYPE = np.dtype([
+    ("time", "<i8"), ("flags", "u1"), ("pad", "V3"), ("info", "<u4"),
+    ("process_name", "<u4"), ("url", "<u4"), ("domain", "<u4")
+])
+LENGTH = struct.Struct("<I")
+IDLE = 1
+UNKNOWN = 2
+IDLE_WINDOW = ("Time not counted", "IDLE TIME", "", "")
+SESSION_COLUMNS = [
+    "start_time", "end_time", "app", "info", "process_name", "url",
+    "domain", "day"
+]
+STRINGS = "strings.bin"
+
+
+def sample_day(timestamp: int) -> str:
+    """
+    Gets the UTC day of a sample, which names its log file.
+
+    Args:
+        timestamp (int): Time of the sample.
+
+    Returns:
+        str: UTC day yyyy-mm-dd.
+    """
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+class SampleLog:
+    """
+    Append-only files of fixed size sample records, one file per UTC
+    day. Window strings are interned into an append-only strings file
+    and records hold their ids, so the tracker appends 28 bytes to a
+    buffer on every tick. Buffers are written by flush, strings first,
+    so every written record can be decoded.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.strings: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.offset = 0
+        self.pending_strings = bytearray()
+        self.pending: dict[str, bytearray] = {}
+
+    def load_strings(self) -> list[str]:
+        """
+        Reads the strings added to the strings file since the last call.
+        A torn string at the end of the file is dropped.
+
+        Returns:
+            list[str]: Strings by id.
+        """
+        path = join(self.folder, STRINGS)
+        if not exists(path):
+            return self.strings
+        with open(path, "rb") as file:
+            file.seek(self.offset)
+            data = file.read()
+        position = 0
+        while position + LENGTH.size <= len(data):
+            (size,) = LENGTH.unpack_from(data, position)
+            end = position + LENGTH.size + size
+            if end > len(data):
+                break
+            value = data[position + LENGTH.size:end].decode(
+                "utf-8", "surrogatepass")
+            self.ids[value] = len(self.strings)
+            self.strings.append(value)
+            position = end
+        self.offset += position
+        return self.strings
+
+    def intern(self, value: str) -> int:
+        """
+        Gets the id of a string, adding it to the strings file if new.
+
+        Args:
+            value (str): Window string.
+
+        Returns:
+            int: Id of the string.
+        """
+        found = self.ids.get(value)
+        if found is not None:
+            return found
+        if not self.strings:
+            self.load_strings()
+            if value in self.ids:
+                return self.ids[value]
+        encoded = value.encode("utf-8", "surrogatepass")
+        self.pending_strings += LENGTH.pack(len(encoded)) + encoded
+        self.ids[value] = len(self.strings)
+        self.strings.append(value)
+        return self.ids[value]
+
+    def append(
+        self, timestamp: int, flags: int, info: str, process_name: str,
+        url: str, domain: str
+    ) -> None:
+        """
+        Buffers a sample of the active window.
+
+        Args:
+            timestamp (int): Time of the sample.
+            flags (int): IDLE and UNKNOWN bits.
+            info (str): Window title.
+            process_name (str): Process name.
+            url (str): URL of the tab.
+            domain (str): Domain of the tab.
+        """
+        with self.lock:
+            record = RECORD.pack(
+                timestamp, flags, self.intern(info),
+                self.intern(process_name), self.intern(url),
+                self.intern(domain)
+            )
+            day = sample_day(timestamp)
+            self.pending.setdefault(day, bytearray()).extend(record)
+
+    def flush(self) -> None:
+        """Writes the buffered strings and samples to their files."""
+        with self.lock:
+            if not self.pending and not self.pending_strings:
+                return
+            os.makedirs(self.folder, exist_ok=True)
+            if self.pending_strings:
+                with open(join(self.folder, STRINGS), "ab") as file:
+                    # Drop a torn string so new ids stay aligned
+                    if file.tell() > self.offset:
+                        file.truncate(self.offset)
+                    file.write(self.pending_strings)
+                self.offset += len(self.pending_strings)
+                self.pending_strings = bytearray()
+            for day, records in self.pending.items():
+                path = join(self.folder, f"samples-{day}.bin")
+                with open(path, "ab") as file:
+                    # Drop a torn record left by an interrupted write
+                    size = file.tell()
+                    if size % RECORD.size:
+                        file.truncate(size - size % RECORD.size)
+                    file.write(records)
+            self.pending = {}
+
+    def days(self) -> list[str]:
+        """
+        Lists the days with a log file.
+
+        Returns:
+            list[str]: UTC days yyyy-mm-dd, oldest first.
+        """
+        if not exists(self.folder):
+            return []
+        return sorted(
+            file[8:18] for file in os.listdir(self.folder)
+            if file.startswith("samples-") and file.endswith(".bin")
+        )
+
+    def read(
+        self, since: Optional[int] = None, until: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Reads the written samples after a time, with their strings.
+
+        Args:
+            since (int, optional): Only samples after this time.
+                Defaults to None.
+            until (int, optional): Only samples up to this time.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame: Samples in time order, strings as categories.
+        """
+        first = None if since is None else sample_day(since)
+        last = None if until is None else sample_day(until)
+        arrays = []
+        for day in self.days():
+            if (first and day < first) or (last and day > last):
+                continue
+            data = np.fromfile(
+                join(self.folder, f"samples-{day}.bin"), dtype=np.uint8)
+            usable = data.size - data.size % DTYPE.itemsize
+            arrays.append(data[:usable].view(DTYPE))
+        records = np.concatenate(arrays) if arrays else np.empty(0, DTYPE)
+        keep = np.ones(records.size, dtype=bool)
+        if since is not None:
+            keep &= records["time"] > since
+        if until is not None:
+            keep &= records["time"] <= until
+        records = records[keep]
+
+        with self.lock:
+            strings = list(self.load_strings())
+        samples = pd.DataFrame({
+            "time": records["time"], "flags": records["flags"]})
+        for col in ("info", "process_name", "url", "domain"):
+            samples[col] = pd.Categorical.from_codes(
+                records[col].astype(np.int64), categories=strings
+            ) if strings else pd.Categorical([], categories=[])
+        return samples.sort_values("time", kind="stable").reset_index(
+            drop=True)
+
+    def prune(self, days: int, now: int) -> int:
+        """
+        Deletes the log files of days older than the retention. The
+        strings file is kept, ids never change.
+
+        Args:
+            days (int): Days of samples kept, 0 keeps every day.
+            now (int): Current time.
+
+        Returns:
+            int: Number of deleted files.
+        """
+        if days <= 0:
+            return 0
+        cutoff = sample_day(now - days * 86400)
+        old = [day for day in self.days() if day < cutoff]
+        for day in old:
+            os.remove(join(self.folder, f"samples-{day}.bin"))
+        return len(old)
+
+
+def fold_samples(
+    samples: pd.DataFrame, session: Optional[list], idle_time: int,
+    day_of: Callable[[int], str]
+) -> list[list]:
+    """
+    Folds samples into activity sessions with the rules of the tracker.
+    A sample extends the open session when it shows the same window on
+    the same day less than idle_time after it ends. Otherwise it starts
+    a session at that end, or one second before itself after a gap.
+    Samples that the open session already covers are skipped, so
+    folding the same samples twice changes nothing.
+
+    Args:
+        samples (pd.DataFrame): Samples in time order, see SampleLog.read.
+        session (list, optional): Open session, as values of the
+            SESSION_COLUMNS. It is extended in place.
+        idle_time (int): Seconds without samples that end a session.
+        day_of (Callable[[int], str]): Local day of a timestamp.
+
+    Returns:
+        list[list]: Open session first if given, then the new sessions.
+    """
+    sessions = [] if session is None else [session]
+    for timestamp, flags, info, process_name, url, domain in samples[[
+        "time", "flags", "info", "process_name", "url", "domain"
+    ]].itertuples(index=False, name=None):
+        window = IDLE_WINDOW if flags else (info, process_name, url, domain)
+        identity = [window[0].split(" - ")[-1], *window]
+        timestamp = int(timestamp)
+        start = timestamp - 1
+        if sessions:
+            last = sessions[-1]
+            if timestamp <= last[1]:
+                continue
+            if timestamp - last[1] < idle_time:
+                if last[2:7] == identity and last[7] == day_of(timestamp):
+                    last[1] = timestamp
+                    continue
+                start = last[1]
+        sessions.append([start, timestamp, *identity, day_of(start)])
+    return sessions
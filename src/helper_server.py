@@ -745,7 +745,9 @@ def make_trend_graphs() -> Optional[dbc.Col]:
             for interval in intervals[::-1]:
                 _totals = totals.iloc[-interval:, :]
                 if acc == "weekday":
-                    _totals = _totals.groupby(['weekday', 'weekday_num']).agg(
+                    _totals = _totals.groupby(
+                        ['weekday', 'weekday_num'], observed=True
+                    ).agg(
                         {"Neutral": "sum", "Personal": "sum", "Work": "sum"}
                     ).reset_index().sort_values('weekday_num')
                     _totals["Work"] /= interval
@@ -0,0 +1,92 @@
+"""
+Collection of helper functions for the open activity session journal.
+"""
+import os
+import struct
+import threading
+from typing import Optional
+import pandas as pd
+
+RECORD = struct.Struct("<qq")
+
+
+class SessionJournal:
+    """
+    Append-only file of (rowid, end_time) records for the open activity
+    session. The tracker appends a record on every extension and clears
+    the file after writing the session to the database, so the last
+    complete record is the live end of the session until the next flush.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fd: Optional[int] = None
+
+    def append(self, rowid: int, end_time: int) -> None:
+        """
+        Appends the current end of the open session.
+
+        Args:
+            rowid (int): Rowid of the session in the activity table.
+            end_time (int): Latest end time of the session.
+        """
+        with self.lock:
+            if self.fd is None:
+                self.fd = os.open(
+                    self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            os.write(self.fd, RECORD.pack(rowid, end_time))
+
+    def latest(self) -> Optional[tuple[int, int]]:
+        """
+        Loads the last complete record of the journal.
+
+        Returns:
+            tuple[int, int] | None: Rowid and end time of the open
+                session, None if the journal is empty.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                if size < RECORD.size:
+                    return None
+                file.seek(size - size % RECORD.size - RECORD.size)
+                return RECORD.unpack(file.read(RECORD.size))
+        except FileNotFoundError:
+            return None
+
+    def clear(self) -> None:
+        """Empties the journal once the session is in the database."""
+        with self.lock:
+            if self.fd is None:
+                if os.path.exists(self.path):
+                    os.truncate(self.path, 0)
+                return
+            os.ftruncate(self.fd, 0)
+
+    def merge(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Applies the live end of the open session to activity rows.
+
+        Args:
+            dataframe (pd.DataFrame): Activity rows with their rowid.
+
+        Returns:
+            pd.DataFrame: Same rows, with the open session extended.
+        """
+        latest = self.latest()
+        if latest is None or dataframe.empty:
+            return dataframe
+        rowid, end_time = latest
+        rows = (dataframe["rowid"] == rowid) & \
+            (dataframe["end_time"] < end_time)
+        if not rows.any():
+            return dataframe
+        dataframe.loc[rows, "end_time"] = end_time
+        if "duration" in dataframe.columns:
+            dataframe.loc[rows, "duration"] = \
+                end_time - dataframe.loc[rows, "start_time"]
+        if "total" in dataframe.columns:
+            dataframe.loc[rows, "total"] = \
+                dataframe.loc[rows, "duration"] / 3600.0
+        return dataframe
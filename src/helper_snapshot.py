@@ -0,0 +1,197 @@
+"""
+Collection of helper functions for the read-only snapshots of databases.
+"""
+import os
+import time
+import sqlite3 as sql
+from pathlib import Path
+from typing import Optional
+from os.path import exists, join
+from helper_database import ConnectionPool, PooledConnection, POOL, \
+    CACHED_STATEMENTS, PRAGMAS, connect
+from helper_changes import ChangeBoard
+
+SNAPSHOTS = "snapshots"
+SNAPSHOT_DATABASES = ("activity",)
+SNAPSHOT_KEEP = 3
+
+
+def snapshot_path(folder: str, file: str, version: int) -> str:
+    """
+    Gets the path of a version of the snapshot of a database file.
+
+    Args:
+        folder (str): Snapshot folder.
+        file (str): Name of the database file.
+        version (int): Version of the snapshot.
+
+    Returns:
+        str: Path of the snapshot.
+    """
+    return join(folder, f"{file}-{version}.db")
+
+
+def write_snapshot(conn: sql.Connection, path: str) -> None:
+    """
+    Copies a consistent state of a database with the backup API. The
+    copy is written next to its path and renamed when complete, so
+    readers never open a partial snapshot.
+
+    Args:
+        conn (sql.Connection): Connection to the live database.
+        path (str): Path of the snapshot.
+    """
+    partial = f"{path}.partial"
+    if exists(partial):
+        os.remove(partial)
+    target = sql.connect(partial)
+    try:
+        # One step, since steps restart whenever the tracker writes
+        conn.backup(target)
+        # Immutable readers cannot use the WAL of the source
+        target.execute("PRAGMA journal_mode = DELETE").fetchall()
+    finally:
+        target.close()
+    os.replace(partial, path)
+
+
+def snapshot_database(pool: ConnectionPool, name: str, path: str) -> None:
+    """
+    Writes the snapshot of a database from a short-lived connection of
+    its own, so the copy never holds the pooled writer connection.
+    Memory databases only live in their pooled connection, which is
+    borrowed instead.
+
+    Args:
+        pool (ConnectionPool): Pool of the live database.
+        name (str): Name of database.
+        path (str): Path of the snapshot.
+    """
+    if pool.memory:
+        with connect(name, pool=pool) as conn:
+            write_snapshot(conn, path)
+        return
+    source = sql.connect(pool.path(name))
+    try:
+        for pragma in PRAGMAS:
+            source.execute(pragma).fetchall()
+        write_snapshot(source, path)
+    finally:
+        source.close()
+
+
+def prune_snapshots(folder: str, keep: int = SNAPSHOT_KEEP) -> int:
+    """
+    Deletes all but the newest versions of each snapshot. Files still
+    open by readers on Windows are kept until the next attempt.
+
+    Args:
+        folder (str): Snapshot folder.
+        keep (int, optional): Versions to keep. Defaults to SNAPSHOT_KEEP.
+
+    Returns:
+        int: Number of deleted snapshots.
+    """
+    versions: dict[str, list[tuple[int, str]]] = {}
+    for file in os.listdir(folder) if exists(folder) else []:
+        name, _, version = file.removesuffix(".db").rpartition("-")
+        if file.endswith(".db") and version.isdigit():
+            versions.setdefault(name, []).append((int(version), file))
+    deleted = 0
+    for files in versions.values():
+        for _, file in sorted(files)[:-keep]:
+            try:
+                os.remove(join(folder, file))
+                deleted += 1
+            except OSError:
+                pass
+    return deleted
+
+
+class SnapshotPool(ConnectionPool):
+    """
+    Read-only connections to the latest published snapshots of the
+    SNAPSHOT_DATABASES. The publisher stores the version in the change
+    board, and readers of a new version open it immutable, so SQLite
+    skips the locks of the live databases. Readers of older versions
+    are closed once they are released.
+    """
+
+    def __init__(
+        self, folder: str, board: ChangeBoard, max_age: float,
+        pool: ConnectionPool = POOL
+    ) -> None:
+        super().__init__(readers=pool.readers)
+        self.folder = folder
+        self.board = board
+        self.max_age = max_age
+        self.pool = pool
+        self.version = 0
+
+    def available(self, name: str) -> bool:
+        """
+        Checks if a recent snapshot of the database is published,
+        switching to it if it is new.
+
+        Args:
+            name (str): Name of database.
+
+        Returns:
+            bool: If reads of the database can use the snapshot.
+        """
+        if name not in SNAPSHOT_DATABASES:
+            return False
+        published, version = self.board.version(SNAPSHOTS)
+        if not version or time.time_ns() - published > self.max_age * 1e9:
+            return False
+        self.version = version
+        return self.identity(self.resolve(name)) is not None
+
+    def resolve(self, name: str) -> str:
+        """
+        Maps a database name to the name of the live file it copies.
+
+        Args:
+            name (str): Name of database.
+
+        Returns:
+            str: Name of the database file.
+        """
+        return self.pool.resolve(name)
+
+    def identity(self, file: str) -> Optional[tuple]:
+        """
+        Identifies the current snapshot of a database file.
+
+        Args:
+            file (str): Name of the database file.
+
+        Returns:
+            Optional[tuple]: Version of the snapshot, None if it does not
+                exist.
+        """
+        version = self.version
+        if not exists(snapshot_path(self.folder, file, version)):
+            return None
+        return (version,)
+
+    def open_reader(self, file: str, identity: tuple) -> PooledConnection:
+        """
+        Opens an immutable connection to a snapshot.
+
+        Args:
+            file (str): Name of the database file.
+            identity (tuple): Version of the snapshot.
+
+        Returns:
+            PooledConnection: New reader connection.
+        """
+        path = snapshot_path(self.folder, file, identity[0])
+        conn = sql.connect(
+            f"{Path(path).as_uri()}?mode=ro&immutable=1", uri=True,
+            factory=PooledConnection, check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS
+        )
+        assert isinstance(conn, PooledConnection), "conn is None"
+        conn.inode = identity
+        return conn
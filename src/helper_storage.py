@@ -0,0 +1,396 @@
+"""
+Collection of storage engines behind the input and output routines.
+"""
+# pylint: disable=too-many-arguments, unused-argument
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from typing import Any, Optional
+import sqlite3 as sql
+import pandas as pd
+from helper_database import POOL, ConnectionPool, connect, connect_reader, \
+    replace_table, select_query, read_columns, delete_rows, update_rows, \
+    upsert_rows
+from helper_snapshot import SnapshotPool
+
+RANGE_QUERY = "SELECT *, rowid FROM {table} WHERE start_time >= ? \
+    AND start_time <= ? AND end_time <= ?"
+
+
+class Storage(ABC):
+    """
+    Persistence operations used by the input and output routines.
+    Tables are addressed by database name and table name, and every
+    loaded row carries its rowid so it can be updated later. Engines
+    must implement every abstract method to be created.
+    """
+
+    @abstractmethod
+    def connect(
+        self, name: str, create: bool = False
+    ) -> AbstractContextManager[sql.Connection]:
+        """
+        Borrows a SQL connection for schema and maintenance statements.
+
+        Args:
+            name (str): Name of database.
+            create (bool, optional): Create database if it does not
+                exist. Defaults to False.
+
+        Returns:
+            AbstractContextManager[sql.Connection]: Borrowed connection.
+        """
+        raise NotImplementedError
+
+    def read(
+        self, name: str, live: bool = False
+    ) -> AbstractContextManager[sql.Connection]:
+        """
+        Borrows a SQL connection for reads. Unless live, reads may lag
+        behind the latest writes, which engines can serve from a snapshot.
+
+        Args:
+            name (str): Name of database.
+            live (bool, optional): Read the latest writes.
+                Defaults to False.
+
+        Returns:
+            AbstractContextManager[sql.Connection]: Borrowed connection.
+        """
+        return self.connect(name)
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        """
+        Checks if the database with the provided name exists.
+
+        Args:
+            name (str): Name of database.
+
+        Returns:
+            bool: If the database exists.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def load(
+        self, name: str, table: str, columns: Optional[list[str]] = None,
+        where: Optional[list[tuple]] = None,
+        group_by: Optional[list[str]] = None,
+        order_by: Optional[list[str]] = None,
+        limit: Optional[int] = None, offset: Optional[int] = None,
+        load_rowid: bool = True
+    ) -> pd.DataFrame:
+        """
+        Loads rows of a table, see select_query for the arguments.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+
+        Returns:
+            pd.DataFrame: Accessed dataframe.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_columns(
+        self, name: str, table: str, columns: Optional[list[str]] = None,
+        where: Optional[list[tuple]] = None,
+        order_by: Optional[list[str]] = None, limit: Optional[int] = None,
+        dtypes: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        """
+        Loads rows of a table by column, see read_columns for the types.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+
+        Returns:
+            dict[str, Any]: Arrays by column name.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_latest(
+        self, name: str, table: str, load_rowid: bool = True
+    ) -> pd.DataFrame:
+        """
+        Loads the last inserted row of a table, always from the live
+        database.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            load_rowid (bool, optional): Load the rowid. Defaults to True.
+
+        Returns:
+            pd.DataFrame: Accessed dataframe.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_range(
+        self, name: str, table: str, start: int, end: int
+    ) -> pd.DataFrame:
+        """
+        Loads events that happened between the start and end timestamps.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            start (int): Start timestamp.
+            end (int): End timestamp.
+
+        Returns:
+            pd.DataFrame: Accessed dataframe.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def append(self, name: str, table: str, df: pd.DataFrame) -> None:
+        """
+        Appends rows to a table.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            df (pd.DataFrame): Rows to be appended.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(
+        self, name: str, table: str, rowid: int, values: dict
+    ) -> None:
+        """
+        Updates columns of a single row.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            rowid (int): Rowid of the row.
+            values (dict): New values by column name.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def replace(self, name: str, table: str, df: pd.DataFrame) -> None:
+        """
+        Replaces the contents of a table, creating it if needed.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            df (pd.DataFrame): New contents of the table.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(
+        self, name: str, table: str, column: str, values: list
+    ) -> None:
+        """
+        Deletes rows whose column matches one of the values.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            column (str): Name of column.
+            values (list): Values to delete.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_rows(self, name: str, table: str, keys: pd.DataFrame) -> int:
+        """
+        Deletes rows whose columns match any row of keys.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            keys (pd.DataFrame): Values of the key columns to delete.
+
+        Returns:
+            int: Number of deleted rows.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_rows(
+        self, name: str, table: str, df: pd.DataFrame, keys: list[str]
+    ) -> int:
+        """
+        Updates the rows matching the key columns of df.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            df (pd.DataFrame): Key and new values of each row.
+            keys (list[str]): Columns that identify a row.
+
+        Returns:
+            int: Number of updated rows.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_rows(
+        self, name: str, table: str, df: pd.DataFrame, keys: list[str]
+    ) -> int:
+        """
+        Updates the rows matching the key columns of df, inserting
+        the others.
+
+        Args:
+            name (str): Name of database.
+            table (str): Name of table.
+            df (pd.DataFrame): Rows to be written.
+            keys (list[str]): Columns that identify a row.
+
+        Returns:
+            int: Number of updated and inserted rows.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> None:
+        """Releases the resources of the engine."""
+        raise NotImplementedError
+
+
+class SQLiteStorage(Storage):
+    """
+    Default engine, one SQLite database per name in the data folder.
+    With snapshots, heavy reads use the published read-only copies.
+    """
+
+    def __init__(
+        self, pool: ConnectionPool = POOL,
+        snapshots: Optional[SnapshotPool] = None
+    ):
+        self.pool = pool
+        self.snapshots = snapshots
+
+    def connect(
+        self, name: str, create: bool = False
+    ) -> AbstractContextManager[sql.Connection]:
+        return connect(name, create, self.pool)
+
+    def read(
+        self, name: str, live: bool = False
+    ) -> AbstractContextManager[sql.Connection]:
+        if not live and self.snapshots is not None and \
+                self.snapshots.available(name):
+            return connect_reader(name, self.snapshots)
+        return connect_reader(name, self.pool)
+
+    def exists(self, name: str) -> bool:
+        return self.pool.exists(name)
+
+    def load(
+        self, name: str, table: str, columns: Optional[list[str]] = None,
+        where: Optional[list[tuple]] = None,
+        group_by: Optional[list[str]] = None,
+        order_by: Optional[list[str]] = None,
+        limit: Optional[int] = None, offset: Optional[int] = None,
+        load_rowid: bool = True
+    ) -> pd.DataFrame:
+        query, params = select_query(
+            table, columns, where, group_by, order_by,
+            limit, offset, load_rowid
+        )
+        with self.read(name) as conn:
+            return pd.read_sql(query, conn, params=params)
+
+    def load_columns(
+        self, name: str, table: str, columns: Optional[list[str]] = None,
+        where: Optional[list[tuple]] = None,
+        order_by: Optional[list[str]] = None, limit: Optional[int] = None,
+        dtypes: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        query, params = select_query(
+            table, columns, where, order_by=order_by, limit=limit)
+        with self.read(name) as conn:
+            return read_columns(conn, query, params, dtypes)
+
+    def load_latest(
+        self, name: str, table: str, load_rowid: bool = True
+    ) -> pd.DataFrame:
+        query, params = select_query(
+            table, order_by=["rowid DESC"], limit=1, load_rowid=load_rowid)
+        with self.read(name, live=True) as conn:
+            return pd.read_sql(query, conn, params=params)
+
+    def load_range(
+        self, name: str, table: str, start: int, end: int
+    ) -> pd.DataFrame:
+        # Events end after they start, so start_time bounds the index range
+        with self.read(name) as conn:
+            return pd.read_sql(
+                RANGE_QUERY.format(table=table), conn,
+                params=[start, end, end]
+            )
+
+    def append(self, name: str, table: str, df: pd.DataFrame) -> None:
+        with self.connect(name) as conn:
+            df.to_sql(table, conn, if_exists="append", index=False)
+            conn.commit()
+
+    def update(
+        self, name: str, table: str, rowid: int, values: dict
+    ) -> None:
+        row = pd.DataFrame({**values, "rowid": rowid}, index=[0])
+        self.update_rows(name, table, row, ["rowid"])
+
+    def replace(self, name: str, table: str, df: pd.DataFrame) -> None:
+        with self.connect(name, create=True) as conn:
+            if getattr(conn, "wal", False):
+                replace_table(conn, df, table)
+                return
+            conn.execute("BEGIN EXCLUSIVE")
+            df.to_sql(table, conn, if_exists="replace", index=False)
+            conn.commit()
+
+    def delete(
+        self, name: str, table: str, column: str, values: list
+    ) -> None:
+        self.delete_rows(name, table, pd.DataFrame({column: values}))
+
+    def delete_rows(self, name: str, table: str, keys: pd.DataFrame) -> int:
+        with self.connect(name) as conn:
+            deleted = delete_rows(conn, table, keys)
+            conn.commit()
+        return deleted
+
+    def update_rows(
+        self, name: str, table: str, df: pd.DataFrame, keys: list[str]
+    ) -> int:
+        with self.connect(name) as conn:
+            updated = update_rows(conn, table, df, keys)
+            conn.commit()
+        return updated
+
+    def upsert_rows(
+        self, name: str, table: str, df: pd.DataFrame, keys: list[str]
+    ) -> int:
+        with self.connect(name) as conn:
+            written = upsert_rows(conn, table, df, keys)
+            conn.commit()
+        return written
+
+    def close(self) -> None:
+        self.pool.close_all()
+        if self.snapshots is not None:
+            self.snapshots.close_all()
+
+
+class MemoryStorage(SQLiteStorage):
+    """
+    Engine that keeps every database in memory, for tests and benchmarks.
+    Databases only live as long as the engine and are not shared with
+    other processes.
+    """
+
+    def __init__(self):
+        super().__init__(ConnectionPool(memory=True))
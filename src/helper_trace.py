@@ -0,0 +1,290 @@
+"""
+Collection of helper functions for tracing slow SQL statements.
+"""
+# pylint: disable=too-many-arguments
+import os
+import time
+import inspect
+import logging
+import threading
+import sqlite3 as sql
+from collections import deque
+from datetime import datetime
+from os.path import basename, dirname, abspath
+from typing import Any, Optional
+
+SOURCE = dirname(abspath(__file__))
+DATABASE_LAYER = ("helper_database.py", "helper_storage.py", "helper_trace.py")
+CALLER_DEPTH = 2
+SLOW_QUERIES = 50
+EXPLAINED = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def find_caller(depth: int = CALLER_DEPTH) -> str:
+    """
+    Finds the functions of the project that issued a statement, skipping
+    the database layer and the wrappers of the retry decorator.
+
+    Args:
+        depth (int, optional): Functions to report.
+            Defaults to CALLER_DEPTH.
+
+    Returns:
+        str: Innermost function first, as module.function:line.
+    """
+    callers: list[str] = []
+    frame = inspect.currentframe()
+    while frame is not None and len(callers) < depth:
+        code = frame.f_code
+        name = basename(code.co_filename)
+        if abspath(code.co_filename).startswith(SOURCE) and \
+                name not in DATABASE_LAYER and code.co_name != "wrapper":
+            callers.append(f"{name[:-3]}.{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    del frame
+    return " < ".join(callers) or "unknown"
+
+
+class QueryTracer:
+    """
+    Statistics of the SQL statements of a process. Every statement adds
+    its latency and rows to the totals of its text, and statements slower
+    than the threshold are kept in a ring buffer with their query plan
+    and written to the log. Disabled tracers cost a flag check.
+    """
+
+    def __init__(self, size: int = SLOW_QUERIES) -> None:
+        self.enabled = False
+        self.threshold = 0.1
+        self.logger: Optional[logging.Logger] = None
+        self.lock = threading.Lock()
+        self.stats: dict[str, list] = {}
+        self.plans: dict[str, list[str]] = {}
+        self.slow: deque[dict[str, Any]] = deque(maxlen=size)
+
+    def configure(
+        self, enabled: bool, threshold: float,
+        logger: Optional[logging.Logger] = None
+    ) -> None:
+        """
+        Turns tracing on or off.
+
+        Args:
+            enabled (bool): Trace statements.
+            threshold (float): Seconds after which a statement is slow.
+            logger (logging.Logger, optional): Log of slow statements.
+                Defaults to None.
+        """
+        self.enabled = enabled
+        self.threshold = threshold
+        self.logger = logger
+
+    def explain(self, conn: sql.Connection, query: str, params: Any) -> list:
+        """
+        Loads the query plan of a statement once per statement text.
+
+        Args:
+            conn (sql.Connection): Connection that ran the statement.
+            query (str): SQL statement.
+            params (Any): Parameters of the statement.
+
+        Returns:
+            list: Details of each step of the plan.
+        """
+        plan = self.plans.get(query)
+        if plan is not None:
+            return plan
+        plan = []
+        if query.lstrip().upper().startswith(EXPLAINED):
+            try:
+                # Plain cursor, so the plan itself is not traced
+                plan = [row[3] for row in sql.Cursor(conn).execute(
+                    f"EXPLAIN QUERY PLAN {query}", params).fetchall()]
+            except (sql.Error, ValueError):
+                # Temporary tables of the statement may be gone already
+                pass
+        self.plans[query] = plan
+        return plan
+
+    def record(
+        self, conn: sql.Connection, query: str, params: Any,
+        seconds: float, rows: int, caller: str
+    ) -> None:
+        """
+        Adds a finished statement to the statistics.
+
+        Args:
+            conn (sql.Connection): Connection that ran the statement.
+            query (str): SQL statement.
+            params (Any): Parameters of the statement.
+            seconds (float): Time spent executing and fetching.
+            rows (int): Rows returned, or changed by writes.
+            caller (str): Functions that issued the statement.
+        """
+        with self.lock:
+            stats = self.stats.setdefault(query, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] += rows
+        if seconds < self.threshold:
+            return
+
+        plan = self.explain(conn, query, params)
+        entry = {
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "ms": round(seconds * 1000, 1), "rows": rows,
+            "caller": caller, "query": " ".join(query.split()),
+            "plan": plan, "pid": os.getpid()
+        }
+        with self.lock:
+            self.slow.append(entry)
+        if self.logger is not None:
+            self.logger.info(
+                "%.1f ms, %d rows, %s: %s | %s", entry["ms"], rows, caller,
+                entry["query"], "; ".join(plan))
+
+    def slowest(self) -> list[dict[str, Any]]:
+        """
+        Gets the slow statements in the ring buffer.
+
+        Returns:
+            list[dict[str, Any]]: Statements, slowest first.
+        """
+        with self.lock:
+            slow = list(self.slow)
+        return sorted(slow, key=lambda entry: -entry["ms"])
+
+    def summary(self) -> list[dict[str, Any]]:
+        """
+        Gets the totals of every traced statement text.
+
+        Returns:
+            list[dict[str, Any]]: Totals, most total time first.
+        """
+        with self.lock:
+            stats = list(self.stats.items())
+        return sorted((
+            {
+                "query": " ".join(query.split()), "calls": count,
+                "total_ms": round(total * 1000, 1),
+                "mean_ms": round(total * 1000 / count, 2),
+                "max_ms": round(worst * 1000, 1), "rows": rows
+            } for query, (count, total, worst, rows) in stats
+        ), key=lambda entry: -entry["total_ms"])
+
+    def reset(self) -> None:
+        """Clears the statistics, the slow statements and the plans."""
+        with self.lock:
+            self.stats.clear()
+            self.plans.clear()
+            self.slow.clear()
+
+
+TRACER = QueryTracer()
+
+
+class TracedCursor(sql.Cursor):
+    """
+    Cursor that reports each statement to the TRACER once its rows are
+    fetched, or once it is executed again, closed or collected. Time
+    spent fetching counts, since SQLite steps through rows lazily.
+    """
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.trace: Optional[list] = None
+
+    def start(self, query: str, params: Any) -> None:
+        """
+        Finishes the previous statement and starts tracing a new one.
+
+        Args:
+            query (str): SQL statement.
+            params (Any): Parameters of the statement.
+        """
+        self.finish()
+        self.trace = [query, params, find_caller(), 0.0, 0]
+
+    def finish(self) -> None:
+        """Reports the traced statement, if any."""
+        trace, self.trace = self.trace, None
+        if trace is None:
+            return
+        query, params, caller, seconds, rows = trace
+        if not rows and self.rowcount > 0:
+            rows = self.rowcount
+        TRACER.record(self.connection, query, params, seconds, rows, caller)
+
+    def timed(self, method: Any, *args: Any) -> Any:
+        """
+        Calls a method of the cursor, adding its time to the statement.
+
+        Args:
+            method (Any): Unbound method of sql.Cursor.
+            *args (Any): Arguments of the method.
+
+        Returns:
+            Any: Result of the method.
+        """
+        start = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            if self.trace is not None:
+                self.trace[3] += time.perf_counter() - start
+
+    def execute(self, query: str, params: Any = (), /) -> "TracedCursor":
+        """Executes a statement, tracing it."""
+        self.start(query, params)
+        return self.timed(sql.Cursor.execute, query, params)
+
+    def executemany(self, query: str, params: Any, /) -> "TracedCursor":
+        """Executes a statement for each set of parameters, tracing it."""
+        self.start(query, ())
+        return self.timed(sql.Cursor.executemany, query, params)
+
+    def fetchone(self) -> Any:
+        """Fetches the next row, finishing the statement after the last."""
+        row = self.timed(sql.Cursor.fetchone)
+        if row is None:
+            self.finish()
+        elif self.trace is not None:
+            self.trace[4] += 1
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> list:
+        """Fetches the next rows, finishing the statement after the last."""
+        rows = self.timed(
+            sql.Cursor.fetchmany, self.arraysize if size is None else size)
+        if self.trace is not None:
+            self.trace[4] += len(rows)
+            if not rows:
+                self.finish()
+        return rows
+
+    def fetchall(self) -> list:
+        """Fetches the remaining rows and finishes the statement."""
+        rows = self.timed(sql.Cursor.fetchall)
+        if self.trace is not None:
+            self.trace[4] += len(rows)
+        self.finish()
+        return rows
+
+    def __next__(self) -> Any:
+        try:
+            row = self.timed(sql.Cursor.__next__)
+        except StopIteration:
+            self.finish()
+            raise
+        if self.trace is not None:
+            self.trace[4] += 1
+        return row
+
+    def close(self) -> None:
+        """Finishes the statement and closes the cursor."""
+        self.finish()
+        super().close()
+
+    def __del__(self) -> None:
+        self.finish()
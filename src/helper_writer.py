@@ -0,0 +1,171 @@
+"""
+Collection of helper functions for background database writes.
+"""
+import os
+import time
+import queue
+import threading
+from itertools import count
+from typing import Any, Callable, Hashable, Optional
+
+QUEUE_SIZE = 16
+
+
+class DatabaseWriter:
+    """
+    Long-lived thread that runs the writes of one database in order.
+    Writes with the same key coalesce while queued, so a newer payload
+    supersedes an older one that was not written yet. Writes submitted
+    while the bounded queue is full are dropped.
+    """
+
+    def __init__(self, name: str, maxsize: int = QUEUE_SIZE):
+        self.name = name
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.pending: dict[Hashable, tuple[Callable, tuple]] = {}
+        self.lock = threading.Lock()
+        self.ids = count()
+        self.metrics = {
+            "submitted": 0, "written": 0, "superseded": 0,
+            "dropped": 0, "failed": 0
+        }
+        self.thread = threading.Thread(
+            target=self.run, name=f"writer-{name}", daemon=True)
+        self.thread.start()
+
+    def submit(
+        self, function: Callable, *args: Any, key: Optional[Hashable] = None
+    ) -> bool:
+        """
+        Queues a write to be run by the writer thread.
+
+        Args:
+            function (Callable): Function that does the write.
+            *args (Any): Arguments of the function.
+            key (Hashable, optional): Writes with the same key supersede
+                each other while queued, None never coalesces.
+                Defaults to None.
+
+        Returns:
+            bool: If the write was queued or merged into a queued one.
+        """
+        with self.lock:
+            self.metrics["submitted"] += 1
+            if key is not None and key in self.pending:
+                self.pending[key] = (function, args)
+                self.metrics["superseded"] += 1
+                return True
+            slot = ("once", next(self.ids)) if key is None else key
+            try:
+                self.queue.put_nowait(slot)
+            except queue.Full:
+                self.metrics["dropped"] += 1
+                return False
+            self.pending[slot] = (function, args)
+            return True
+
+    def run(self) -> None:
+        """Runs queued writes forever."""
+        while True:
+            slot = self.queue.get()
+            with self.lock:
+                function, args = self.pending.pop(slot)
+            try:
+                function(*args)
+                self.metrics["written"] += 1
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.metrics["failed"] += 1
+            finally:
+                self.queue.task_done()
+
+    def flush(self, timeout: float = 5) -> bool:
+        """
+        Waits for the queued writes to finish.
+
+        Args:
+            timeout (float, optional): Maximum wait in seconds.
+                Defaults to 5.
+
+        Returns:
+            bool: If every queued write finished.
+        """
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """
+        Gets the queue depth and write counters.
+
+        Returns:
+            dict[str, int]: Metrics of the writer.
+        """
+        with self.lock:
+            return {"depth": self.queue.qsize(), **self.metrics}
+
+
+class WriterPool:
+    """Per-process set of database writers, created on first use."""
+
+    def __init__(self, maxsize: int = QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.writers: dict[str, DatabaseWriter] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str) -> DatabaseWriter:
+        """
+        Gets the writer of the given database.
+
+        Args:
+            name (str): Name of database.
+
+        Returns:
+            DatabaseWriter: Writer of the database.
+        """
+        writer = self.writers.get(name)
+        if writer is not None:
+            return writer
+        with self.lock:
+            if name not in self.writers:
+                self.writers[name] = DatabaseWriter(name, self.maxsize)
+            return self.writers[name]
+
+    def flush(self, timeout: float = 5) -> bool:
+        """
+        Waits for the queued writes of every database to finish.
+
+        Args:
+            timeout (float, optional): Maximum wait in seconds for each
+                database. Defaults to 5.
+
+        Returns:
+            bool: If every queued write finished.
+        """
+        finished = True
+        for writer in list(self.writers.values()):
+            finished &= writer.flush(timeout)
+        return finished
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        Gets the metrics of every writer.
+
+        Returns:
+            dict[str, dict[str, int]]: Metrics by database name.
+        """
+        return {
+            name: writer.stats() for name, writer in self.writers.items()
+        }
+
+    def reset_after_fork(self) -> None:
+        """Forgets inherited writers, whose threads did not survive."""
+        self.lock = threading.Lock()
+        self.writers = {}
+
+
+WRITERS = WriterPool()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=WRITERS.reset_after_fork)
@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from helper_io import load_dataframe, load_config
 
 CFG = load_config()
+TABLE_ROWS = 5000
 
 
 layout = html.Div([
@@ -55,8 +56,15 @@ def update_activity(_1):
     """Makes activity graph."""
     global CFG
     CFG = load_config()
-    dataframe = load_dataframe('activity', False, 'activity_view', False)
-    dataframe = dataframe.iloc[::-1]
+    dataframe = load_dataframe(
+        'activity', False, 'activity_view', False,
+        order_by=['rowid DESC'], limit=TABLE_ROWS
+    ).drop(columns='rowid')
+    stats = load_dataframe(
+        'activity', False, 'activity', False, columns=[
+            'COUNT(*) AS rows', 'COUNT(DISTINCT process_name_id) AS names'
+        ]
+    )
 
     table = go.Table(
         header={
@@ -73,7 +81,7 @@ def update_activity(_1):
         margin={'b': 0, 't': 0, 'l': 0, 'r': 0}
     )
     title = f'Last update: {datetime.now().strftime("%H:%M:%S")}'
-    info = f'Rows: {dataframe.shape[0]}, '
+    info = f'Rows: {stats.loc[0, "rows"]}, '
     info += f'Columns: {dataframe.shape[1]}, '
-    info += f'Process_names: {dataframe["process_name"].nunique()}'
+    info += f'Process_names: {stats.loc[0, "names"]}'
     return fig, html.H2(title), html.H3(info)
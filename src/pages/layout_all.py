@@ -5,7 +5,6 @@ from os.path import dirname, abspath
 import sys
 from dash import html, dcc, Input, Output, callback
 import dash_bootstrap_components as dbc
-import pandas as pd
 
 sys.path.append(dirname(dirname(abspath(__file__))))
 sys.path.append(dirname(abspath(__file__)))
@@ -42,16 +41,20 @@ layout = html.Div([
 )
 def update_element_list(_1):
     """Generates the event cards."""
-    dataframe = load_dataframe('activity', False, 'categories')
-    dataframe = dataframe.groupby(
-        ['process_name', 'subtitle', 'category', 'method']
-    ).agg({'total': 'sum'}).reset_index()
-    dataframe = dataframe.sort_values(by=['total'], ascending=False)
+    groups = ['process_name', 'subtitle', 'category', 'method']
+    dataframe = load_dataframe(
+        'activity', False, 'categories', False,
+        columns=groups + ['SUM(total) AS total'],
+        group_by=groups, order_by=['total DESC']
+    )
     dataframe.loc[:, 'duration'] = dataframe['total'] * 3600
     dataframe.loc[:, 'duration'] = dataframe['duration'].apply(
         format_long_duration)
-    totals = pd.DataFrame(
-        load_dataframe('activity', False, 'totals', False).sum(axis=0)
-    ).transpose()
+    totals = load_dataframe(
+        'activity', False, 'totals', False,
+        columns=[
+            f'SUM({cat}) AS {cat}' for cat in ('Work', 'Personal', 'Neutral')
+        ]
+    )
     cards = generate_cards(dataframe, totals)
     return cards
@@ -7,11 +7,12 @@ from datetime import datetime
 from dash import html, dcc, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
+import pandas as pd
 import layout_menu
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from helper_io import load_dataframe, load_config
+from helper_io import load_columns, load_config
 
 CFG = load_config()
 
@@ -55,7 +56,8 @@ def update_categories(_1):
     """Makes categories graph."""
     global CFG
     CFG = load_config()
-    dataframe = load_dataframe('activity', False, 'categories')
+    dataframe = load_columns('activity', 'categories', as_frame=True)
+    assert isinstance(dataframe, pd.DataFrame), "Not a dataframe"
 
     table = go.Table(
         header={
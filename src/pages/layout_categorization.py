@@ -11,7 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import layout_menu
-from helper_io import load_config, load_categories
+from helper_io import load_config, load_categories, CATEGORIES
 from helper_server import make_listpicker
 
 CFG = load_config()
@@ -73,7 +73,7 @@ layout = html.Div([
 def input_value(_, _2, *args):
     """Updates the saved values using the config file."""
     global CFG2
-    CFG2 = load_categories()
+    CFG2 = dict(load_categories())
 
     raw_ctx = callback_context.triggered[0]['prop_id'].split('.')[0]
     ctx = raw_ctx[7:]
@@ -95,6 +95,7 @@ def input_value(_, _2, *args):
 
         with open(path, 'w', encoding='utf-8') as file:
             yaml.dump(CFG2, file)
+        CATEGORIES.invalidate()
         return buttons + tuple(values) + tuple(inputs) + tuple(values)
 
     # Reset values
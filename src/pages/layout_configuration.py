@@ -11,7 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import layout_menu
-from helper_io import load_config
+from helper_io import load_config, CONFIG
 from helper_server import make_colorpicker, make_valuepicker, \
     rgb_to_hex, hex_to_rgb
 
@@ -257,4 +257,5 @@ def change_config(n_clicks, _2, *args):
 
     with open(path, 'w', encoding='utf-8') as file:
         yaml.dump(data, file)
+    CONFIG.invalidate()
     return invalid + [n_clicks]
@@ -57,9 +57,12 @@ def update_conflicts(_1):
     global CFG
     CFG = load_config()
     cfg2 = load_categories()
-    activity = load_dataframe("activity")
+    activity = load_dataframe(
+        "activity", table="activity_view", load_rowid=False,
+        columns=["process_name", "domain", "COUNT(*) AS events"],
+        group_by=["process_name", "domain"]
+    )
     assert (activity is not None) and (not activity.empty)
-    activity = activity.loc[:, ["process_name", "domain"]]
     activity['work_matches'] = activity['process_name'].str.extract(
         f'(?i)({"|".join(cfg2["WORK_APPS"])})', expand=False).combine(
             activity['domain'].str.extract(
@@ -85,5 +88,6 @@ def update_conflicts(_1):
         margin={'b': 0, 't': 0, 'l': 0, 'r': 0}
     )
     title = f'Last update: {datetime.now().strftime("%H:%M:%S")}'
-    info = f'{activity.shape[0]} conflict{"" if activity.shape[0] == 1 else "s"}'
+    events = int(activity['events'].sum())
+    info = f'{events} conflict{"" if events == 1 else "s"}'
     return fig, html.H2(title), html.H3(info)
@@ -5,8 +5,7 @@
 import os
 import sys
 import time
-import pandas as pd
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, Input, Output, State, callback
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
 
@@ -16,8 +15,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import layout_menu
 from helper_server import generate_cards, make_crown, \
     make_totals_graph, make_info_row, make_heatmap
-from helper_io import save_dataframe, load_dataframe, \
-    load_config, set_idle, load_latest_row, load_day_total
+from helper_io import save_input_time, load_dataframe, \
+    load_config, set_idle, load_latest_row, load_day_total, local_day, \
+    change_token
 
 CFG = load_config()
 
@@ -59,16 +59,38 @@ layout = html.Div([
     html.Div(
         html.H1("User is currently idle", id='idle_warning_style', style={}),
         id='idle_warning', className=''
-    )
+    ),
+    dcc.Store(id='category_token'),
+    dcc.Store(id='heatmap_token'),
+    dcc.Store(id='list_token'),
+    dcc.Store(id='idle_token')
 ])
 
 
+def check_token(token: str, *tables: str) -> str:
+    """
+    Skips the update of a graph when its tables did not change since
+    the token of its last update.
+
+    Args:
+        token (str): Token of the last update, None before the first one.
+        *tables (str): Names of the tables of the graph.
+
+    Returns:
+        str: Token of the current update.
+    """
+    current = change_token(*tables)
+    if token == current:
+        raise PreventUpdate
+    return current
+
+
 @callback(
     Output('goals_title', 'children'),
     Input('title_interval', 'n_intervals')
 )
 def update_title(_1):
-    """Updates title."""
+    """Updates title, with the clock and heartbeat ages of every tick."""
     global CFG
     CFG = load_config()
     data = load_day_total(0).transpose()
@@ -82,11 +104,14 @@ def update_title(_1):
     Output('category_row', 'children'),
     Output('category_row', 'style'),
     Output('streak_crowns', 'children'),
-    Input('category_interval', 'n_intervals')
+    Output('category_token', 'data'),
+    Input('category_interval', 'n_intervals'),
+    State('category_token', 'data')
 )
-def update_category(_1):
+def update_category(_1, token):
     """Makes total time by category graph."""
     global CFG
+    token = check_token(token, 'categories')
     CFG = load_config()
 
     # Main categories graph
@@ -113,17 +138,20 @@ def update_category(_1):
     card = dbc.Card([dbc.CardBody([
         dcc.Graph(figure=fig, config={'displayModeBar': False}),
     ], style=cardbody_style)], style=card_style)
-    return card, CFG["SECTION_STYLE"], crowns
+    return card, CFG["SECTION_STYLE"], crowns, token
 
 
 @callback(
     Output('heatmap_row', 'children'),
     Output('heatmap_row', 'style'),
-    Input('heatmap_interval', 'n_intervals')
+    Output('heatmap_token', 'data'),
+    Input('heatmap_interval', 'n_intervals'),
+    State('heatmap_token', 'data')
 )
-def update_heatmap_graph(_1):
+def update_heatmap_graph(_1, token):
     """Makes heatmap graph."""
     global CFG
+    token = check_token(token, 'categories')
     CFG = load_config()
 
     fig = make_heatmap()
@@ -141,37 +169,44 @@ def update_heatmap_graph(_1):
     return dbc.Row(
         dcc.Graph(figure=fig, config={'displayModeBar': False}),
         style=card_style
-    ), style
+    ), style, token
 
 
 @callback(
     Output('categorized_list', 'children'),
     Output('categorized_list', 'style'),
+    Output('list_token', 'data'),
     Input('activity_check_interval', 'n_intervals'),
+    State('list_token', 'data'),
     prevent_initial_call=True
 )
-def update_element_list(_1):
+def update_element_list(_1, token):
     """Generates the event cards."""
-    dataframe = load_dataframe('activity', False, 'categories_partial')
-    dataframe = dataframe[
-        dataframe['day'] == str(pd.to_datetime('today').date())]
-    save_dataframe(pd.DataFrame({'time': [int(time.time())]}), 'frontend')
+    save_input_time('frontend')
+    token = check_token(token, 'categories_partial')
+    dataframe = load_dataframe(
+        'activity', False, 'categories_partial',
+        where_cond=('day', '=', local_day())
+    )
     cards = generate_cards(dataframe)
-    return cards, CFG["SECTION_STYLE"]
+    return cards, CFG["SECTION_STYLE"], token
 
 
 @callback(
     Output('idle_warning', 'className'),
     Output('idle_warning_style', 'style'),
-    Input('activity_check_interval', 'n_intervals')
+    Output('idle_token', 'data'),
+    Input('activity_check_interval', 'n_intervals'),
+    State('idle_token', 'data')
 )
-def update_info_row(_1):
+def update_info_row(_1, token):
     """Updates idle modal."""
+    token = check_token(token, 'activity')
     last_row = load_latest_row('activity')
     idle = last_row.loc[0, "process_name"] == "IDLE TIME"
     if idle:
-        return 'blinking-warning', {'opacity': 0.5}
-    return '', {'opacity': 0, 'pointer-events': 'none'}
+        return 'blinking-warning', {'opacity': 0.5}, token
+    return '', {'opacity': 0, 'pointer-events': 'none'}, token
 
 
 @callback(
@@ -1,4 +1,4 @@
-"""Page that shows the raw input databases."""
+"""Page that shows the raw input heartbeats."""
 # pylint: disable=wrong-import-position, import-error, global-statement
 # flake8: noqa: F401
 import os
@@ -7,11 +7,12 @@ from datetime import datetime
 from dash import html, dcc, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
+import pandas as pd
 import layout_menu
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from helper_io import load_dataframe, load_config
+from helper_io import load_input_time, load_config
 
 CFG = load_config()
 
@@ -46,12 +47,12 @@ def create_table(name: str) -> go.Table:
     Creates table for inputs.
 
     Args:
-        name (str): Name of database.
+        name (str): Name of heartbeat signal.
 
     Returns:
-        go.Table: Input table from transposed database.
+        go.Table: Input table from transposed heartbeat.
     """
-    dataframe = load_dataframe(name)
+    dataframe = pd.DataFrame({'time': [load_input_time(name)]})
     dataframe = dataframe.T
 
     table = go.Table(
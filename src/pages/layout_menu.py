@@ -9,6 +9,7 @@ menu_items = [
     dbc.DropdownMenuItem("Analytics pages", header=True),
     dbc.DropdownMenuItem("Trends page", href="/trends"),
     dbc.DropdownMenuItem("All events page", href="/all"),
+    dbc.DropdownMenuItem("Search page", href="/search"),
     dbc.DropdownMenuItem(divider=True),
     dbc.DropdownMenuItem("Customization pages", header=True),
     dbc.DropdownMenuItem("Configuration page", href="/configuration"),
@@ -22,6 +23,7 @@ menu_items = [
     dbc.DropdownMenuItem("Input tables", href="/inputs"),
     dbc.DropdownMenuItem("Milestones table", href="/milestones"),
     dbc.DropdownMenuItem("Conflicts page", href="/conflicts"),
+    dbc.DropdownMenuItem("Query tracing", href="/queries"),
     dbc.DropdownMenuItem(divider=True),
     dbc.DropdownMenuItem("Credits", header=True),
     dbc.DropdownMenuItem("Attributions page", href="/credits"),
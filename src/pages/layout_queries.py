@@ -0,0 +1,126 @@
+"""Page that shows the slow SQL statements of the dashboard."""
+# pylint: disable=wrong-import-position, import-error, global-statement
+# flake8: noqa: F401
+import os
+import sys
+from datetime import datetime
+from dash import html, dcc, Input, Output, callback, ctx
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+import pandas as pd
+import layout_menu
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helper_io import load_config
+from helper_trace import TRACER
+
+CFG = load_config()
+
+
+layout = html.Div([
+    dbc.Row([
+        layout_menu.layout,
+        dbc.Col(id='queries_update_time'),
+        dbc.Col(id='queries_data'),
+        dbc.Col([
+            html.Button(
+                "Update table", id='queries_refresh_button',
+                style={
+                    'width': '45%', 'border-radius': '4px',
+                    'background-color': CFG['BACKGROUND'],
+                    'margin-top': '5px', 'color': CFG['TEXT_COLOR']
+                }
+            ),
+            html.Button(
+                "Reset", id='queries_reset_button',
+                style={
+                    'width': '45%', 'border-radius': '4px',
+                    'background-color': CFG['BACKGROUND'],
+                    'margin-top': '5px', 'margin-left': '5px',
+                    'color': CFG['TEXT_COLOR']
+                }
+            ),
+        ])
+    ], style=CFG["SECTION_STYLE"]),
+    dbc.Row([
+        html.H3("Slowest statements"),
+        dcc.Graph(
+            id='queries_slow_table',
+            style={'width': '100%'},
+            config={'displayModeBar': False}
+        ),
+        html.H3("Statements by total time"),
+        dcc.Graph(
+            id='queries_summary_table',
+            style={'width': '100%'},
+            config={'displayModeBar': False}
+        )
+    ], style={
+        'margin-left': f"{CFG['SIDE_PADDING']}px",
+        'margin-right': f"{CFG['SIDE_PADDING']}px",
+        'margin-bottom': f"{CFG['DIVISION_PADDING']}px"
+    })
+])
+
+
+def create_table(dataframe: pd.DataFrame, widths: list[int]) -> go.Figure:
+    """
+    Creates table for traced statements.
+
+    Args:
+        dataframe (pd.DataFrame): Traced statements.
+        widths (list[int]): Relative width of each column.
+
+    Returns:
+        go.Figure: Table of the statements.
+    """
+    table = go.Table(
+        columnwidth=widths,
+        header={'values': dataframe.columns},
+        cells={
+            'values': [dataframe[col] for col in dataframe.columns],
+            'align': 'left'
+        }
+    )
+
+    fig = go.Figure(data=table)
+    fig.update_layout(
+        height=CFG['TROUBLESHOOTING_HEIGHT'] // 2,
+        margin={'b': 0, 't': 0, 'l': 0, 'r': 0}
+    )
+    return fig
+
+
+@callback(
+    Output('queries_slow_table', 'figure'),
+    Output('queries_summary_table', 'figure'),
+    Output('queries_update_time', 'children'),
+    Output('queries_data', 'children'),
+    Input('queries_refresh_button', 'n_clicks'),
+    Input('queries_reset_button', 'n_clicks'))
+def update_queries(_1, _2):
+    """Makes query tracing tables."""
+    global CFG
+    CFG = load_config()
+    if ctx.triggered_id == 'queries_reset_button':
+        TRACER.reset()
+
+    slow = pd.DataFrame(
+        TRACER.slowest(), columns=[
+            'time', 'ms', 'rows', 'caller', 'query', 'plan', 'pid'])
+    slow['plan'] = slow['plan'].str.join('<br>')
+    summary = pd.DataFrame(
+        TRACER.summary(), columns=[
+            'query', 'calls', 'total_ms', 'mean_ms', 'max_ms', 'rows'])
+
+    title = f'Last update: {datetime.now().strftime("%H:%M:%S")}'
+    if not TRACER.enabled:
+        info = 'Set QUERY_TRACING to true to trace statements'
+    else:
+        info = f'{int(summary["calls"].sum())} statements traced'
+    return (
+        create_table(slow, [2, 2, 2, 6, 16, 10, 2]),
+        create_table(summary, [20, 2, 2, 2, 2, 2]),
+        html.H2(title), html.H3(info)
+    )
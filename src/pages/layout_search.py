@@ -0,0 +1,127 @@
+"""Page that searches the titles and URLs of the activity database."""
+# pylint: disable=wrong-import-position, import-error, global-statement
+# flake8: noqa: F401
+import os
+import sys
+from datetime import datetime
+from dash import html, dcc, Input, Output, State, callback
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+import layout_menu
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helper_io import load_config, search_activity, search_activity_days
+
+CFG = load_config()
+PAGE_SIZE = 50
+
+
+layout = html.Div([
+    dbc.Row([
+        layout_menu.layout,
+        dbc.Col(dcc.Input(
+            id='search_text', type='text', debounce=True,
+            placeholder='Search titles, URLs and domains',
+            style={'width': '100%', 'margin-top': '5px'}
+        )),
+        dbc.Col(dcc.DatePickerRange(
+            id='search_dates', clearable=True,
+            display_format='YYYY-MM-DD'
+        ), width='auto'),
+        dbc.Col(dcc.Input(
+            id='search_page', type='number', min=1, step=1, value=1,
+            style={'width': '80px', 'margin-top': '5px'}
+        ), width='auto'),
+        dbc.Col(
+            html.Button(
+                "Search", id='search_button',
+                style={
+                    'width': '100%', 'border-radius': '4px',
+                    'background-color': CFG['CARD_COLOR'],
+                    'margin-top': '5px', 'color': CFG['TEXT_COLOR']
+                }
+            ), width=2
+        )
+    ], style=CFG["SECTION_STYLE"]),
+    dbc.Row([
+        dbc.Col(id='search_update_time'),
+        dbc.Col(id='search_data'),
+    ], style=CFG["SECTION_STYLE"]),
+    dbc.Row([
+        dcc.Graph(
+            id='search_days',
+            style={'width': '100%'},
+            config={'displayModeBar': False}
+        ),
+        dcc.Graph(
+            id='search_table',
+            style={'width': '100%'},
+            config={'displayModeBar': False}
+        )
+    ], style={
+        'margin-left': f"{CFG['SIDE_PADDING']}px",
+        'margin-right': f"{CFG['SIDE_PADDING']}px",
+        'margin-bottom': f"{CFG['DIVISION_PADDING']}px"
+    })
+])
+
+
+@callback(
+    Output('search_table', 'figure'),
+    Output('search_days', 'figure'),
+    Output('search_update_time', 'children'),
+    Output('search_data', 'children'),
+    Input('search_button', 'n_clicks'),
+    Input('search_text', 'value'),
+    Input('search_page', 'value'),
+    State('search_dates', 'start_date'),
+    State('search_dates', 'end_date'),
+    prevent_initial_call=True)
+def update_search(_1, text, page, first_day, last_day):
+    """Makes search graphs, only the requested page of events is loaded."""
+    global CFG
+    CFG = load_config()
+    title = f'Last update: {datetime.now().strftime("%H:%M:%S")}'
+    if not text or not text.strip():
+        return go.Figure(), go.Figure(), html.H2(title), html.H3(
+            "Type something to search")
+
+    page = max(int(page or 1), 1)
+    events = search_activity(
+        text, first_day, last_day, PAGE_SIZE, (page - 1) * PAGE_SIZE)
+    days = search_activity_days(text, first_day, last_day)
+    assert (events is not None) and (days is not None)
+    events = events.assign(
+        start_time=events['start_time'].map(datetime.fromtimestamp),
+        rank=(-events['rank']).round(2)
+    ).rename(columns={'rank': 'score'})
+
+    table = go.Table(
+        header={'values': events.columns},
+        cells={'values': [events[col] for col in events.columns]}
+    )
+    fig = go.Figure(data=table)
+    fig.update_layout(
+        height=CFG['TROUBLESHOOTING_HEIGHT'],
+        margin={'b': 0, 't': 0, 'l': 0, 'r': 0}
+    )
+
+    fig_days = go.Figure(data=go.Bar(
+        x=days['day'], y=days['total'], customdata=days['events'],
+        marker_color=CFG['TEXT_COLOR'],
+        hovertemplate='%{x}<br>%{y:.2f} hours<br>%{customdata} events'
+    ))
+    fig_days.update_layout(
+        plot_bgcolor=CFG['CARD_COLOR'],
+        paper_bgcolor=CFG['CARD_COLOR'],
+        font_color=CFG['TEXT_COLOR'],
+        height=CFG['CATEGORY_HEIGHT'],
+        margin={'l': 0, 'r': 0, 't': 0, 'b': 0}
+    )
+
+    matches = int(days['events'].sum())
+    pages = max((matches + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+    info = f'Matches: {matches}, Days: {days.shape[0]}, '
+    info += f'Page: {page}/{pages}'
+    return fig, fig_days, html.H2(title), html.H3(info)
@@ -4,14 +4,15 @@ Study advisor, sends realtime messages to support user.
 # pylint: disable=global-variable-not-assigned
 import time
 from typing import Optional
-from datetime import datetime, timedelta
 import pandas as pd
 from helper_io import load_config, send_notification, load_day_total, \
-    load_dataframe, save_dataframe, check_dataframe, retry
+    load_dataframe, save_dataframe, check_dataframe, retry, local_day, \
+    change_token
 
 
 MESSAGES = {}
 TITLES = {}
+CHECKED = {"token": None}
 
 
 def load_messages():
@@ -63,10 +64,7 @@ def fix_milestones() -> Optional[pd.DataFrame]:
     Returns:
         pd.DataFrame: Correct milestones dataframe.
     """
-    cfg = load_config()
-    day = datetime.utcfromtimestamp(int(time.time()))
-    day += timedelta(hours=cfg["GMT_OFFSET"])
-    day = day.strftime('%Y-%m-%d')
+    day = local_day()
     dataframe = pd.DataFrame({
         'day': [day],
         'work_100': [0],
@@ -100,10 +98,14 @@ def fix_milestones() -> Optional[pd.DataFrame]:
 
 
 @retry(wait=0.5)
-def check_milestones() -> None:
+def check_milestones() -> bool:
     """
     Function to check for goal milestones.
     Sends a desktop notification when milestone is achieved.
+
+    Returns:
+        bool: True once milestones are checked, the retry decorator
+            returns None if every attempt failed.
     """
     global MESSAGES, TITLES
     cfg = load_config()
@@ -168,15 +170,21 @@ def check_milestones() -> None:
     # Update milestones dataframe
     save_dataframe(milestones, "milestones")
     time.sleep(5)
+    return True
 
 
 def study_advisor():
     """
     Main study advisor functions that coordinates all functionality.
+    Milestones are only checked when the day totals, the day or the
+    configuration changed.
     """
     while True:
         cfg = load_config()
-        load_messages()
-        check_milestones()
+        token = change_token("categories")
+        if CHECKED["token"] != token:
+            load_messages()
+            if check_milestones():
+                CHECKED["token"] = token
 
         time.sleep(cfg["ADVISOR_CHECK_INTERVAL"])
@@ -5,6 +5,8 @@ import sqlite3 as sql
 import re
 import pandas as pd
 from helper_io import load_config
+from helper_storage import RANGE_QUERY
+from helper_database import explain_query
 
 CFG = load_config()
 
@@ -27,3 +29,27 @@ def test_database_schema() -> None:
     #         schema = re.sub(r'\s+', ' ', file.read()).strip()
     #     assert schema == re.sub(r'\s+', ' ', row["sql"]).strip(), row["name"]
     assert True  # TODO fix
+
+
+def test_activity_indexes() -> None:
+    """Tests if activity queries use the activity indexes."""
+    schema_path = os.path.join(
+        CFG["WORKSPACE"], 'schema/activity-activity.sql')
+    with open(schema_path) as file:
+        schema = file.read()
+    conn = sql.connect(':memory:')
+    conn.executescript(schema)
+
+    plan = explain_query(
+        conn, RANGE_QUERY.format(table='activity'), (1, 9, 9))
+    assert any('idx_activity_start_time' in step for step in plan), plan
+    plan = explain_query(
+        conn, "SELECT * FROM activity WHERE process_name_id = ?", (1,))
+    assert any('idx_activity_process_name' in step for step in plan), plan
+    plan = explain_query(
+        conn, "SELECT * FROM activity WHERE domain_id = ?", (1,))
+    assert any('idx_activity_domain' in step for step in plan), plan
+    plan = explain_query(
+        conn, "SELECT * FROM activity WHERE end_time > ?", (1,))
+    assert any('idx_activity_end_time' in step for step in plan), plan
+    conn.close()
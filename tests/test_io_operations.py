@@ -1,11 +1,39 @@
 """Test input and output functions."""
 # pylint: disable=import-error
 import os
+import sqlite3 as sql
+import multiprocessing
+import time
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import pytest
+import numpy as np
 import pandas as pd
-from helper_io import save_dataframe, load_dataframe, load_input_time, \
-    load_config, load_latest_row, \
+from helper_io import save_dataframe, load_dataframe, iter_dataframe, \
+    load_input_time, load_config, load_latest_row, \
     modify_latest_row, append_to_database, load_activity_between, \
-    load_categories
+    load_categories, YamlCache, local_day, timestamp_to_day, utc_offset, \
+    use_storage, apply_schemas, update_day_settings, load_day_total, \
+    delete_from_dataframe, check_dataframe, queue_dataframe, \
+    append_activity, load_dimensions, DIMENSION_IDS, search_activity, \
+    search_activity_days, load_hot_activity, HOT, load_columns, \
+    load_activity_columns, bulk_delete, bulk_update, bulk_upsert, \
+    refresh_activity_partitions, route_activity, archive_activity, \
+    load_activity_history, change_token, CHANGES, publish_snapshots, \
+    TABLE_TYPES
+from helper_database import POOL, ConnectionPool, connect, connect_reader, \
+    select_query, read_columns, consolidate_databases, separate_databases, \
+    apply_schema, cast_columns
+from helper_heartbeat import HeartbeatBoard
+from helper_changes import ChangeBoard
+from helper_archive import archive_files, write_archive, sum_archive
+from helper_session import SessionJournal
+from helper_samples import SampleLog, fold_samples, IDLE, RECORD
+from helper_snapshot import SnapshotPool, prune_snapshots, snapshot_database
+from helper_storage import Storage, MemoryStorage, SQLiteStorage
+from helper_writer import DatabaseWriter, WRITERS
+from helper_trace import TRACER, TracedCursor
 
 CFG = load_config()
 
@@ -168,6 +196,209 @@ def test_load_activity_between() -> None:
     os.remove(path)
 
 
+def test_load_dataframe_query() -> None:
+    """Tests projection, predicates, grouping and limits of queries."""
+    dataframe = pd.DataFrame({
+        'name': ['a', 'b', 'a', 'c', 'a'],
+        'count': [1, 2, 3, 4, 5]
+    })
+    save_dataframe(dataframe, '__test11__')
+
+    loaded = load_dataframe(
+        '__test11__', load_rowid=False, columns=['count'],
+        where_cond=[('name', '=', 'a'), ('count', '>', 1)]
+    )
+    assert loaded['count'].tolist() == [3, 5]
+
+    loaded = load_dataframe(
+        '__test11__', load_rowid=False,
+        columns=['name', 'SUM(count) AS total'], group_by=['name'],
+        order_by=['total DESC'], limit=2, offset=1
+    )
+    assert loaded.values.tolist() == [['c', 4], ['b', 2]]
+
+    loaded = load_dataframe(
+        '__test11__', True, where_cond=('name', 'IN', ["b", "c'"]))
+    assert loaded['name'].tolist() == ['b']
+
+    # Names are validated, values are always bound
+    query, params = select_query(
+        'activity', where=[('day', '=', "'; DROP TABLE x; --")])
+    assert query == "SELECT * FROM activity WHERE day = ?"
+    assert params == ["'; DROP TABLE x; --"]
+    for kwargs in [
+        {'columns': ['name; DROP TABLE x']},
+        {'where': [('name', 'OR 1 =', 1)]},
+        {'order_by': ['name DESC, 1']}
+    ]:
+        try:
+            select_query('activity', **kwargs)
+            assert False, "Invalid query was built"
+        except AssertionError as error:
+            assert str(error).startswith("Invalid")
+
+    # Clean files
+    POOL.discard('__test11__')
+    os.remove(os.path.join(CFG["WORKSPACE"], 'data/__test11__.db'))
+
+
+def test_iter_dataframe() -> None:
+    """Tests that tables are streamed in bounded chunks."""
+    dataframe = pd.DataFrame({'col1': range(10), 'col2': list("abcdeabcde")})
+    save_dataframe(dataframe, '__test12__')
+
+    chunks = list(iter_dataframe('__test12__', chunk_size=4))
+    assert [chunk.shape[0] for chunk in chunks] == [4, 4, 2]
+    assert dataframe.equals(pd.concat(chunks, ignore_index=True))
+
+    chunks = list(iter_dataframe(
+        '__test12__', where_cond=('col2', '=', 'a'),
+        columns=['col1'], chunk_size=1
+    ))
+    assert [chunk['col1'].tolist() for chunk in chunks] == [[0], [5]]
+    assert not list(iter_dataframe('__test12__', where_cond=('col1', '<', 0)))
+
+    # Clean files
+    POOL.discard('__test12__')
+    os.remove(os.path.join(CFG["WORKSPACE"], 'data/__test12__.db'))
+
+
+def test_memory_storage() -> None:
+    """Tests the tracker and dashboard routines on the memory engine."""
+    # Engines must implement every operation
+    with pytest.raises(TypeError):
+        type('Partial', (Storage,), {})()
+
+    previous = use_storage(MemoryStorage())
+    try:
+        assert not check_dataframe('activity')
+        apply_schemas()
+        update_day_settings()
+        now = int(time.time())
+        for title in ['a - app', 'b - app']:
+            append_activity(pd.DataFrame({
+                'start_time': [now - 60], 'end_time': [now - 30],
+                'app': ['app'], 'info': [title], 'process_name': ['test.exe'],
+                'url': [''], 'domain': [''], 'day': [local_day(now)]
+            }))
+        row = load_latest_row('activity')
+        assert row.loc[0, 'info'] == 'b - app'
+        row.loc[0, 'end_time'] = now
+        modify_latest_row('activity', row, ['end_time'])
+        row = load_activity_between(now - 60, now)
+        assert row['duration'].tolist() == [30, 60]
+
+        # Repeated strings are stored once
+        dimensions = load_dimensions()
+        assert dimensions['process_name'].tolist() == ['test.exe']
+        assert sorted(dimensions['info']) == ['a - app', 'b - app']
+        assert row.loc[0, 'process_name_id'] == \
+            DIMENSION_IDS['process_name']['test.exe']
+
+        save_dataframe(pd.DataFrame({
+            'process_name': ['test.exe'], 'day': [local_day(now)],
+            'subtitle': [''], 'category': ['Work'], 'method': ['(A)'],
+            'total': [1 / 60], 'duration': ['1m']
+        }), 'activity', 'categories')
+        assert load_day_total(0).loc[0, 'Work'] == 1 / 60
+
+        delete_from_dataframe('activity', 'day', [local_day(now)])
+        assert load_dataframe('activity', True).empty
+        save_dataframe(pd.DataFrame({'col1': [1]}), '__test14__')
+        assert check_dataframe('__test14__')
+    finally:
+        use_storage(previous).close()
+    assert not os.path.exists(
+        os.path.join(CFG["WORKSPACE"], 'data/__test14__.db'))
+
+
+def test_database_writer() -> None:
+    """Tests that queued replace writes coalesce into the latest one."""
+    started, gate = threading.Event(), threading.Event()
+    written = []
+    writer = DatabaseWriter('__test15__', 2)
+    writer.submit(lambda: started.set() or gate.wait())
+    assert started.wait(5)
+    for value in range(4):
+        writer.submit(written.append, value, key='table')
+    writer.submit(written.append, 'other', key='other')
+    assert not writer.submit(written.append, 'full', key='full')
+    assert writer.stats()['depth'] == 2
+    gate.set()
+    assert writer.flush()
+    assert written == [3, 'other']
+    assert writer.stats() == {
+        'depth': 0, 'submitted': 7, 'written': 3,
+        'superseded': 3, 'dropped': 1, 'failed': 0
+    }
+
+    previous = use_storage(MemoryStorage())
+    try:
+        assert queue_dataframe(pd.DataFrame({'col1': [1]}), '__test15__')
+        assert queue_dataframe(pd.DataFrame({'col1': [2]}), '__test15__')
+        WRITERS.flush()
+        assert load_dataframe('__test15__')['col1'].tolist() == [2]
+
+        # Saves that fail every attempt are counted as failed
+        saved = WRITERS.get('__test15__').stats()['written']
+        assert queue_dataframe(pd.DataFrame({'col1': [{}]}), '__test15__')
+        WRITERS.flush()
+        stats = WRITERS.get('__test15__').stats()
+        assert (stats['written'], stats['failed']) == (saved, 1)
+    finally:
+        use_storage(previous).close()
+
+
+def test_connection_pool() -> None:
+    """Tests that connections are reused until the file is replaced."""
+    dataframe = pd.DataFrame({'col1': [1]})
+    save_dataframe(dataframe, '__test7__')
+    conn = POOL.get('__test7__')
+    load_dataframe('__test7__')
+    assert POOL.get('__test7__') is conn
+
+    # Recreated files must not be served by the stale connection
+    path = os.path.join(CFG["WORKSPACE"], 'data/__test7__.db')
+    os.remove(path)
+    dataframe = pd.DataFrame({'col1': [2]})
+    save_dataframe(dataframe, '__test7__')
+    assert POOL.get('__test7__') is not conn
+    loaded_dataframe = load_dataframe('__test7__')
+    assert dataframe.equals(loaded_dataframe.drop('rowid', axis=1))
+
+    # Reads borrow read-only connections and never wait for the writer
+    with connect_reader('__test7__') as first, \
+            connect_reader('__test7__') as second:
+        assert first is not second and first is not POOL.get('__test7__')
+        with pytest.raises(sql.OperationalError):
+            first.execute("DELETE FROM __test7__")
+    with connect_reader('__test7__') as reader:
+        assert reader in (first, second)
+    loaded = []
+    with connect('__test7__'):
+        thread = threading.Thread(
+            target=lambda: loaded.append(load_dataframe('__test7__')))
+        thread.start()
+        thread.join(5)
+    assert len(loaded) == 1
+
+    # Clean files
+    POOL.discard('__test7__')
+    os.remove(path)
+
+
+def test_local_day() -> None:
+    """Tests local day conversions."""
+    timestamps = pd.Series([0, 86399, 86400, int(time.time())])
+    days = timestamp_to_day(timestamps).astype(str)
+    assert days.tolist() == [local_day(t) for t in timestamps]
+
+    # Offsets follow daylight saving time
+    zone = ZoneInfo("America/New_York")
+    assert utc_offset(zone, 1704067200) == -300  # 2024-01-01
+    assert utc_offset(zone, 1719792000) == -240  # 2024-07-01
+
+
 def test_load_config() -> None:
     """Tests the load_config function."""
     config = load_config()
@@ -177,6 +408,117 @@ def test_load_config() -> None:
     assert config["WORKSPACE"] == workspace
 
 
+def test_heartbeat_board() -> None:
+    """Tests that heartbeats are shared through the mapped file."""
+    path = os.path.join(CFG["WORKSPACE"], 'data/__test10__.bin')
+    writer = HeartbeatBoard(path, ('mouse', 'keyboard'))
+    reader = HeartbeatBoard(path, ('mouse', 'keyboard'))
+    writer.beat('mouse', 45)
+    writer.beat('keyboard', 12, flush_interval=1)
+    assert reader.load('mouse') == 45
+    assert reader.snapshot() == {'mouse': 45, 'keyboard': 12}
+
+    writer.beat('mouse')
+    assert abs(reader.load('mouse') - time.time()) <= 1
+
+    # Clean files
+    os.remove(path)
+
+
+def test_session_journal() -> None:
+    """Tests that the live session end is merged into activity rows."""
+    path = os.path.join(CFG["WORKSPACE"], 'data/__test13__.journal')
+    journal = SessionJournal(path)
+    assert journal.latest() is None
+    journal.append(7, 100)
+    journal.append(7, 160)
+    assert journal.latest() == (7, 160)
+
+    # Torn trailing records are ignored
+    with open(path, 'ab') as file:
+        file.write(b'123')
+    assert journal.latest() == (7, 160)
+
+    rows = pd.DataFrame({
+        'start_time': [0, 40], 'end_time': [40, 100],
+        'duration': [40, 60], 'total': [40 / 3600, 60 / 3600],
+        'rowid': [6, 7]
+    })
+    rows = journal.merge(rows)
+    assert rows['end_time'].tolist() == [40, 160]
+    assert rows['duration'].tolist() == [40, 120]
+    assert rows.loc[1, 'total'] == 120 / 3600
+
+    journal.clear()
+    assert journal.latest() is None
+    journal.append(8, 10)
+    assert journal.latest() == (8, 10)
+
+    # Clean files
+    os.close(journal.fd)
+    os.remove(path)
+
+
+def test_wal_storage_mode() -> None:
+    """Tests in-place table replacement of the WAL storage mode."""
+    POOL.configure(True)
+    try:
+        dataframe = pd.DataFrame({'col1': [1, 2], 'col2': ["a", None]})
+        save_dataframe(dataframe, '__test9__')
+        loaded_dataframe = load_dataframe('__test9__')
+        assert dataframe.equals(loaded_dataframe.drop('rowid', axis=1))
+
+        # Same columns are refilled, new columns recreate the table
+        dataframe = pd.DataFrame({'col1': [3], 'col2': ["b"]})
+        save_dataframe(dataframe, '__test9__')
+        loaded_dataframe = load_dataframe('__test9__')
+        assert dataframe.equals(loaded_dataframe.drop('rowid', axis=1))
+
+        dataframe = pd.DataFrame({'col3': [4.5]})
+        save_dataframe(dataframe, '__test9__')
+        loaded_dataframe = load_dataframe('__test9__')
+        assert dataframe.equals(loaded_dataframe.drop('rowid', axis=1))
+
+        with connect('__test9__') as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+    finally:
+        POOL.configure(False)
+
+    # Clean files
+    POOL.discard('__test9__')
+    path = os.path.join(CFG["WORKSPACE"], 'data/__test9__.db')
+    for suffix in ['', '-wal', '-shm']:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def test_yaml_cache() -> None:
+    """Tests that cached yaml files are only parsed again on change."""
+    path = os.path.join(CFG["WORKSPACE"], 'data/__test8__.yml')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("VALUE: 1\n")
+    cache = YamlCache('data/__test8__.yml')
+    config = cache.get()
+    assert config == {'VALUE': 1}
+    assert cache.get() is config
+
+    # Same content must not be parsed again
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("VALUE: 1\n")
+    cache.checked = 0.0
+    assert cache.get() is config
+
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("VALUE: 22\n")
+    cache.checked = 0.0
+    assert cache.get() == {'VALUE': 22}
+
+    # Clean files
+    os.remove(path)
+    assert load_config() is load_config()
+
+
 def test_load_categories() -> None:
     """Tests the load_categories function."""
     categories = load_categories()
@@ -188,3 +530,603 @@ def test_load_categories() -> None:
     assert "PERSONAL_DOMAINS" in categories
     assert "WORK_KEYWORDS" in categories
     assert "PERSONAL_KEYWORDS" in categories
+
+
+def test_search_activity() -> None:
+    """Tests the full-text search of titles, URLs and domains."""
+    previous = use_storage(MemoryStorage())
+    try:
+        apply_schemas()
+        events = [
+            ('2024-01-01', 'Python docs - Chrome', 'docs.python.org'),
+            ('2024-01-01', 'Python python python', ''),
+            ('2024-01-02', 'Inbox - Mail', 'mail.example.com'),
+        ]
+        for day, title, domain in events:
+            append_activity(pd.DataFrame({
+                'start_time': [0], 'end_time': [3600], 'app': ['app'],
+                'info': [title], 'process_name': ['test.exe'],
+                'url': [f'https://{domain}/' if domain else ''],
+                'domain': [domain], 'day': [day]
+            }))
+        found = search_activity('pyth')
+        assert found['info'].tolist() == [
+            'Python python python', 'Python docs - Chrome']
+        assert search_activity('mail', '2024-01-02')['day'].tolist() == \
+            ['2024-01-02']
+        assert search_activity('mail', None, '2024-01-01').empty
+        # Query syntax in the input is searched for as plain text
+        assert len(search_activity('"python" OR -(*', limit=1)) == 1
+
+        days = search_activity_days('python')
+        assert days['day'].tolist() == ['2024-01-01']
+        assert days.loc[0, 'events'] == 2 and days.loc[0, 'total'] == 2
+
+        delete_from_dataframe('activity', 'day', ['2024-01-01'])
+        assert search_activity('python').empty
+    finally:
+        use_storage(previous).close()
+
+
+def test_hot_tier() -> None:
+    """Tests that today's events in memory match the activity database."""
+    previous = use_storage(MemoryStorage())
+    try:
+        apply_schemas()
+
+        def add(title: str, start: int, end: int, day: str) -> None:
+            append_activity(pd.DataFrame({
+                'start_time': [start], 'end_time': [end], 'app': ['app'],
+                'info': [title], 'process_name': ['test.exe'], 'url': [''],
+                'domain': [''], 'day': [day]
+            }))
+
+        add('a', 0, 60, '2024-01-01')
+        add('b', 60, 120, '2024-01-02')
+        sums = load_hot_activity('2024-01-02')
+        assert HOT.day == '2024-01-02' and HOT.due(3600)
+        assert sums['info'].tolist() == ['b']
+        HOT.checkpoint()
+        assert not HOT.due(3600)
+
+        # New events and session extensions only touch memory
+        add('a', 120, 150, '2024-01-02')
+        add('c', 150, 160, '2024-01-03')
+        HOT.extend(4, 200)
+        sums = load_hot_activity('2024-01-02')
+        assert sums['info'].tolist() == ['a', 'b']
+        assert sums['duration'].tolist() == [30, 60]
+        assert sums['total'].tolist() == [30 / 3600, 60 / 3600]
+
+        # Day rollover fills the tier from disk again
+        sums = load_hot_activity('2024-01-03')
+        assert sums['duration'].tolist() == [10] and HOT.due(3600)
+    finally:
+        use_storage(previous).close()
+    assert HOT.day is None
+
+
+def test_load_columns() -> None:
+    """Tests that the columnar reader matches the dataframe reader."""
+    storage = MemoryStorage()
+    previous = use_storage(storage)
+    try:
+        apply_schemas()
+        for title, domain in [('a', ''), ('b', 'b.com'), ('a', '')]:
+            append_activity(pd.DataFrame({
+                'start_time': [0], 'end_time': [60], 'app': ['app'],
+                'info': [title], 'process_name': ['test.exe'],
+                'url': [''], 'domain': [domain], 'day': ['2024-01-01']
+            }))
+        arrays = load_columns('activity', where_cond=('info_id', '=', 1))
+        assert isinstance(arrays, dict)
+        assert arrays['start_time'].dtype == 'int64'
+        assert arrays['total'].dtype == 'float32'
+        assert arrays['day'].categories.tolist() == ['2024-01-01']
+
+        # Dimension ids become categoricals of the same strings
+        columns = load_activity_columns(as_frame=True)
+        view = load_dataframe('activity', False, 'activity_view', False)
+        assert isinstance(columns, pd.DataFrame)
+        assert columns['info'].dtype == 'category'
+        for col in view.columns.drop('rowid'):
+            assert columns[col].tolist() == view[col].tolist()
+
+        with storage.connect('activity') as conn:
+            empty = read_columns(
+                conn, 'SELECT start_time, day FROM activity WHERE 0',
+                dtypes={'start_time': 'int64', 'day': 'category'}
+            )
+        assert empty['start_time'].dtype == 'int64'
+        assert len(empty['day']) == 0
+    finally:
+        use_storage(previous).close()
+
+
+def test_bulk_mutations() -> None:
+    """Tests bulk deletes, updates and upserts past the variable limit."""
+    previous = use_storage(MemoryStorage())
+    try:
+        save_dataframe(pd.DataFrame({
+            'deck': ['a', 'b'] * 1500, 'card': range(3000), 'score': 0.0
+        }), '__test16__')
+        keys = pd.DataFrame({'card': range(0, 3000, 2)})
+        assert bulk_delete('__test16__', keys) == 1500
+        assert bulk_delete('__test16__', keys) == 0
+        assert load_dataframe('__test16__')['deck'].unique().tolist() == ['b']
+
+        rows = pd.DataFrame({'deck': 'b', 'card': [1, 3, 4], 'score': 1.0})
+        assert bulk_update('__test16__', rows, ['deck', 'card']) == 2
+        rows['score'] = 2.0
+        assert bulk_upsert('__test16__', rows, ['deck', 'card']) == 3
+        dataframe = load_dataframe(
+            '__test16__', where_cond=('score', '>', 0), order_by=['card'])
+        assert dataframe['card'].tolist() == [1, 3, 4]
+        assert dataframe['score'].tolist() == [2.0] * 3
+        assert load_dataframe('__test16__').shape[0] == 1501
+    finally:
+        use_storage(previous).close()
+
+
+def test_consolidated_layout() -> None:
+    """Tests that consolidated databases share one file and connection."""
+    names = ['__test17a__', '__test17b__']
+    save_dataframe(pd.DataFrame({'col1': [1, 2]}), names[0])
+    save_dataframe(pd.DataFrame({'col2': ['a']}), names[1])
+    assert consolidate_databases(names, '__test17__') == names
+    assert consolidate_databases(names, '__test17__') == []
+    assert load_dataframe('__test17__', table=names[0])['col1'].sum() == 3
+    assert load_dataframe('__test17__', table=names[1])['col2'][0] == 'a'
+    assert separate_databases(names, '__test17__') == names
+
+    # Writes made with the layout off are consolidated again
+    time.sleep(0.05)
+    save_dataframe(pd.DataFrame({'col1': [1, 2, 3]}), names[0])
+    assert consolidate_databases(names, '__test17__') == names
+    assert load_dataframe('__test17__', table=names[0])['col1'].sum() == 6
+
+    # Writes made in the layout are kept when it is turned off
+    time.sleep(0.05)
+    save_dataframe(pd.DataFrame({'col2': ['b']}), '__test17__', names[1])
+    assert separate_databases(names, '__test17__') == names
+    assert separate_databases(names, '__test17__') == []
+    assert load_dataframe(names[1])['col2'].tolist() == ['b']
+    with connect(names[0]) as conn:
+        assert conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).fetchall() == [(names[0],)]
+
+    pool = ConnectionPool(memory=True)
+    pool.configure(False, True)
+    previous = use_storage(SQLiteStorage(pool))
+    try:
+        apply_schemas()
+        save_dataframe(pd.DataFrame({'title': ['a'], 'url': ['b']}), 'urls')
+        assert check_dataframe('urls') and check_dataframe('flashcards')
+        assert not check_dataframe('milestones')
+        assert pool.get('urls') is pool.get('activity')
+        assert list(pool.connections) == ['autotracker']
+    finally:
+        use_storage(previous).close()
+
+    # Clean files
+    for name in names + ['__test17__']:
+        POOL.discard(name)
+        os.remove(os.path.join(CFG["WORKSPACE"], f'data/{name}.db'))
+
+
+def test_schema_versions() -> None:
+    """Tests that unchanged schema files keep their derived tables."""
+    storage = MemoryStorage()
+    previous = use_storage(storage)
+    try:
+        assert 'activity-categories.sql' in apply_schemas()
+        save_dataframe(pd.DataFrame({
+            'process_name': ['test.exe'], 'day': ['2024-01-01'],
+            'subtitle': [''], 'category': ['Work'], 'method': ['(A)'],
+            'total': [1.0], 'duration': ['1h']
+        }), 'activity', 'categories')
+        assert not apply_schemas()
+        assert load_dataframe('activity', False, 'categories').shape[0] == 1
+
+        # Changed scripts run again and bump their version
+        query = "SELECT version FROM schema_versions WHERE name = ?"
+        with storage.connect('activity') as conn:
+            script = 'activity-categories.sql'
+            assert apply_schema(conn, script, 'SELECT 1')
+            assert not apply_schema(conn, script, 'SELECT 1')
+            assert conn.execute(
+                query, ('activity-categories.sql',)).fetchone() == (2,)
+
+            # Failed scripts leave neither their changes nor a version
+            with pytest.raises(sql.OperationalError):
+                apply_schema(conn, 'bad.sql', 'CREATE TABLE t (a); SELECT x')
+            assert conn.execute(query, ('bad.sql',)).fetchone() is None
+            assert not storage.exists('t') and not conn.in_transaction
+    finally:
+        use_storage(previous).close()
+
+
+def test_activity_partitions() -> None:
+    """Tests that activity ranges are routed to overlapping partitions."""
+    previous = use_storage(MemoryStorage())
+    try:
+        apply_schemas()
+        assert route_activity('day', '2024-02-10', '2024-02-10') == []
+
+        def add(day: str) -> None:
+            start = int(datetime.fromisoformat(
+                f'{day}T12:00:00+00:00').timestamp())
+            append_activity(pd.DataFrame({
+                'start_time': [start], 'end_time': [start + 60],
+                'app': ['app'], 'info': [day], 'process_name': ['test.exe'],
+                'url': [''], 'domain': [''], 'day': [day]
+            }))
+
+        # A late event of january shares the rowid range of february
+        for day in ['2024-01-10', '2024-01-20', '2024-02-10', '2024-01-30',
+                    '2024-02-20', '2024-03-10']:
+            add(day)
+        partitions = refresh_activity_partitions()
+        assert partitions['first_rowid'].tolist() == [1, 3, 6]
+        assert partitions['last_rowid'].tolist() == [4, 5, 6]
+        assert partitions['closed'].tolist() == [True, True, False]
+
+        assert route_activity('day', '2024-02-10', '2024-02-15') == [
+            ('rowid', '>=', 3), ('rowid', '<=', 5)]
+        assert route_activity('day', '2024-01-25', '2024-02-15') == [
+            ('rowid', '>=', 1), ('rowid', '<=', 5)]
+        assert route_activity('day', '2023-12-01', '2023-12-31') == [
+            ('rowid', 'IS', None)]
+        assert route_activity('day', '2024-05-01') == [('rowid', '>=', 6)]
+
+        # Every event belongs to exactly one partition
+        days = []
+        for part in partitions.itertuples(index=False):
+            where = [('rowid', '>=', part.first_rowid),
+                     ('start_time', '>=', part.low)]
+            if not part.latest:
+                where += [('rowid', '<=', part.last_rowid),
+                          ('start_time', '<', part.high)]
+            days += load_dataframe('activity', True, where_cond=where)[
+                'day'].tolist()
+        assert sorted(days) == sorted(load_dataframe('activity')['day'])
+
+        # Only the open partition and new events are read again
+        add('2024-04-10')
+        partitions = refresh_activity_partitions()
+        assert partitions['last_day'].tolist() == [
+            '2024-01-30', '2024-02-20', '2024-03-10', '2024-04-10']
+        assert partitions['closed'].tolist() == [True, True, True, False]
+        assert load_hot_activity('2024-03-10')['info'].tolist() == [
+            '2024-03-10']
+    finally:
+        use_storage(previous).close()
+
+
+def test_archive_activity(tmp_path) -> None:
+    """Tests that old days move to the archive and are read back."""
+    previous = use_storage(MemoryStorage())
+    folder = str(tmp_path)
+    try:
+        apply_schemas()
+        update_day_settings()
+        today = local_day()
+        for day in ['2020-01-05', '2020-01-20', '2020-02-03', today]:
+            start = int(datetime.fromisoformat(
+                f'{day}T12:00:00+00:00').timestamp())
+            append_activity(pd.DataFrame({
+                'start_time': [start], 'end_time': [start + 60],
+                'app': ['app'], 'info': [day], 'process_name': ['test.exe'],
+                'url': [''], 'domain': [''], 'day': [day]
+            }))
+
+        assert archive_activity(0, folder) == 0
+        assert archive_activity(30, folder) == 3
+        assert archive_activity(30, folder) == 0
+        assert list(archive_files(folder)) == ['2020-01', '2020-02']
+        assert load_dataframe('activity', False, 'activity_view')[
+            'day'].tolist() == [today]
+        assert sum_archive(folder, '2020-01')['duration'].tolist() == [60, 60]
+
+        # Archive and live events are read as one history
+        history = load_activity_history(folder=folder)
+        assert history['info'].tolist() == [
+            '2020-01-05', '2020-01-20', '2020-02-03', today]
+        history = load_activity_history(
+            '2020-01-10', '2020-02-10', ['info', 'total'], folder)
+        assert history.columns.tolist() == ['info', 'total']
+        assert history['info'].tolist() == ['2020-01-20', '2020-02-03']
+
+        # Events left by an interrupted run are only read once
+        write_archive(folder, load_activity_history(today, folder=folder))
+        assert load_activity_history(folder=folder).shape[0] == 4
+    finally:
+        use_storage(previous).close()
+
+
+def publish_rowids(path: str, first: int) -> None:
+    """Publishes every other rowid from first, for test_change_board."""
+    board = ChangeBoard(path, ('activity', 'categories'))
+    for rowid in range(first, 4000, 2):
+        board.publish('activity', rowid)
+
+
+def test_change_board() -> None:
+    """Tests that subscribers only see changes they did not handle."""
+    path = os.path.join(CFG["WORKSPACE"], 'data/__test21__.bin')
+    writer = ChangeBoard(path, ('activity', 'categories'))
+    reader = ChangeBoard(path, ('activity', 'categories'))
+    assert reader.poll('sub', ['activity', 'categories']) == {
+        'activity': 0, 'categories': 0}
+    reader.ack('sub')
+    assert not reader.poll('sub', ['activity', 'categories'])
+
+    writer.publish('activity', 7)
+    writer.publish('activity', 5)
+    writer.publish('urls')
+    assert reader.poll('sub', ['activity', 'categories']) == {'activity': 7}
+    assert reader.poll('other', ['categories']) == {'categories': 0}
+
+    # Changes published after a poll are reported again after the ack
+    writer.publish('activity', 9)
+    reader.ack('sub')
+    assert reader.poll('sub', ['activity']) == {'activity': 9}
+    reader.ack('sub')
+    assert not reader.poll('sub', ['activity'])
+
+    # Writers of other processes keep the latest rowid
+    processes = [
+        multiprocessing.Process(target=publish_rowids, args=(path, first))
+        for first in (10, 11)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    assert reader.version('activity')[1] == 3999
+
+    # Clean files
+    os.remove(path)
+
+    # Writes of the input and output routines are published
+    previous = use_storage(MemoryStorage())
+    try:
+        apply_schemas()
+        token = change_token('activity', 'categories')
+        assert change_token('activity', 'categories') == token
+        append_activity(pd.DataFrame({
+            'start_time': [0], 'end_time': [60], 'app': ['app'],
+            'info': ['a'], 'process_name': ['test.exe'], 'url': [''],
+            'domain': [''], 'day': ['2024-01-01']
+        }))
+        assert CHANGES.version('activity')[1] >= 1
+        assert change_token('activity', 'categories') != token
+        token = change_token('activity', 'categories')
+        save_dataframe(pd.DataFrame({'a': [1]}), 'activity', 'categories')
+        assert change_token('activity', 'categories') != token
+    finally:
+        use_storage(previous).close()
+
+
+def test_query_tracing() -> None:
+    """Tests that traced statements report their latency, rows and plan."""
+    storage = MemoryStorage()
+    previous = use_storage(storage)
+    try:
+        with storage.connect('__test22__', True) as conn:
+            assert not isinstance(conn.cursor(), TracedCursor)
+        TRACER.configure(True, 0.0)
+        save_dataframe(pd.DataFrame({'a': range(5)}), '__test22__')
+        assert load_dataframe('__test22__').shape[0] == 5
+        with storage.connect('__test22__') as conn:
+            assert isinstance(conn.cursor(), TracedCursor)
+            assert conn.execute(
+                "SELECT a FROM __test22__ WHERE a > ?", (1,)
+            ).fetchone() == (2,)
+
+        # Every statement is counted with the rows it returned
+        summary = {row['query']: row for row in TRACER.summary()}
+        assert summary['SELECT *, rowid FROM __test22__']['rows'] == 5
+        query = 'SELECT a FROM __test22__ WHERE a > ?'
+        assert summary[query] == {**summary[query], 'calls': 1, 'rows': 1}
+
+        # Slow statements keep their caller and query plan
+        slow = [row for row in TRACER.slowest() if row['query'] == query]
+        assert slow and slow[0]['plan'] and slow[0]['caller'] == 'unknown'
+        loads = [
+            row for row in TRACER.slowest()
+            if row['query'] == 'SELECT *, rowid FROM __test22__']
+        assert loads[0]['caller'].startswith('helper_io.load_dataframe')
+        TRACER.reset()
+        assert not TRACER.summary() and not TRACER.slowest()
+    finally:
+        TRACER.configure(False, 0.1)
+        TRACER.reset()
+        use_storage(previous).close()
+
+
+def test_snapshots(tmp_path) -> None:
+    """Tests that snapshot readers see published versions only."""
+    live = MemoryStorage()
+    previous = use_storage(live)
+    try:
+        apply_schemas()
+        event = {
+            'start_time': [0], 'end_time': [60], 'app': ['app'],
+            'info': ['snapshot title'], 'process_name': ['test.exe'],
+            'url': [''], 'domain': [''], 'day': ['2024-01-01']
+        }
+        append_activity(pd.DataFrame(event))
+        version = publish_snapshots(str(tmp_path))
+        assert version and publish_snapshots(str(tmp_path)) == 0
+
+        # Heavy reads use the snapshot, latest rows the live database
+        reader = SQLiteStorage(live.pool, SnapshotPool(
+            str(tmp_path), CHANGES, 60, live.pool))
+        use_storage(reader)
+        append_activity(pd.DataFrame({**event, 'start_time': [60]}))
+        assert load_dataframe('activity', True, 'activity_view').shape[0] == 1
+        assert load_latest_row('activity')['start_time'].iloc[0] == 60
+        assert search_activity('snapshot').shape[0] == 1
+        with reader.read('activity') as conn:
+            with pytest.raises(sql.OperationalError):
+                conn.execute("DELETE FROM activity")
+
+        # New versions are swapped in, old ones are deleted
+        use_storage(live)
+        assert publish_snapshots(str(tmp_path)) > version
+        use_storage(reader)
+        assert load_dataframe('activity', True, 'activity_view').shape[0] == 2
+        assert publish_snapshots(str(tmp_path)) == 0
+        for start in (120, 180, 240):
+            use_storage(live)
+            append_activity(pd.DataFrame({**event, 'start_time': [start]}))
+            publish_snapshots(str(tmp_path))
+        assert len(os.listdir(tmp_path)) == 3
+        assert prune_snapshots(str(tmp_path), 1) == 2
+
+        # Stale snapshots are ignored
+        reader.snapshots.max_age = 0
+        assert not reader.snapshots.available('activity')
+        reader.close()
+    finally:
+        use_storage(previous).close()
+
+    # File databases are copied without their pooled connection
+    save_dataframe(pd.DataFrame({'col1': [1, 2]}), '__test23__')
+    held, done = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        with connect('__test23__'):
+            held.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+    path = str(tmp_path / 'copy.db')
+    snapshot_database(POOL, '__test23__', path)
+    done.set()
+    thread.join()
+    with sql.connect(path) as conn:
+        assert conn.execute('SELECT SUM(col1) FROM __test23__').fetchone() \
+            == (3,)
+    POOL.discard('__test23__')
+    os.remove(os.path.join(CFG["WORKSPACE"], 'data/__test23__.db'))
+
+
+def test_sample_log(tmp_path) -> None:
+    """Tests that logged samples fold into the sessions of the tracker."""
+    log = SampleLog(str(tmp_path))
+    day = 1704070800
+    for offset in (0, 1, 2):
+        log.append(day + offset, 0, 'a - Doc', 'app.exe', '', '')
+    log.append(day + 3, 0, 'b - Doc', 'app.exe', '', '')
+    log.append(day + 4, IDLE, 'b - Doc', 'app.exe', '', '')
+    log.append(day + 500, 0, 'b - Doc', 'app.exe', '', '')
+    assert log.read().empty
+    log.flush()
+
+    # Strings are stored once and read back by new readers
+    with open(tmp_path / 'samples-2024-01-01.bin', 'ab') as file:
+        file.write(b'torn')
+    reader = SampleLog(str(tmp_path))
+    samples = reader.read()
+    assert samples.shape[0] == 6 and reader.strings == log.strings
+    assert samples['info'].tolist()[2:4] == ['a - Doc', 'b - Doc']
+    assert reader.read(day + 3).shape[0] == 2
+    log.append(day + 501, 0, 'c', 'app.exe', '', '')
+    log.flush()
+    assert os.path.getsize(tmp_path / 'samples-2024-01-01.bin') == \
+        7 * RECORD.size
+    assert reader.read(day + 500)['info'].tolist() == ['c']
+
+    # Same windows join, idle samples and gaps start new sessions
+    def day_of(timestamp):
+        return str(timestamp // 86400)
+    sessions = fold_samples(reader.read(until=day + 500), None, 120, day_of)
+    assert [row[:4] for row in sessions] == [
+        [day - 1, day + 2, 'Doc', 'a - Doc'],
+        [day + 2, day + 3, 'Doc', 'b - Doc'],
+        [day + 3, day + 4, 'Time not counted', 'Time not counted'],
+        [day + 499, day + 500, 'Doc', 'b - Doc'],
+    ]
+    assert len(fold_samples(reader.read(), None, 1000, day_of)) == 5
+
+    # Folding continues the open session and skips covered samples
+    session = sessions[-1]
+    new = fold_samples(reader.read(day + 400), session, 120, day_of)
+    assert new[0] is session and session[1] == day + 500
+    assert new[1][:4] == [day + 500, day + 501, 'c', 'c']
+    assert reader.prune(1, day + 86400 * 3) == 1 and reader.read().empty
+
+    # A torn string is dropped before new strings are written
+    with open(tmp_path / 'strings.bin', 'ab') as file:
+        file.write(b'\x09\x00\x00\x00torn')
+    writer = SampleLog(str(tmp_path))
+    writer.append(day + 502, 0, 'd', 'app.exe', '', '')
+    writer.flush()
+    assert SampleLog(str(tmp_path)).load_strings() == writer.strings
+    assert reader.read(day + 501)['info'].tolist() == ['d']
+
+
+def test_table_types() -> None:
+    """Tests the types of loaded frames and their savings on a year."""
+    previous = use_storage(MemoryStorage())
+    try:
+        apply_schemas()
+        append_activity(pd.DataFrame({
+            'start_time': [0], 'end_time': [60], 'app': ['app'],
+            'info': ['a'], 'process_name': ['test.exe'], 'url': [''],
+            'domain': [''], 'day': ['2024-01-01']
+        }))
+        save_dataframe(pd.DataFrame({
+            'process_name': ['test.exe'], 'day': ['2024-01-01'],
+            'subtitle': [''], 'category': ['Work'], 'method': ['(A)'],
+            'total': [1 / 60], 'duration': ['1m']
+        }), 'activity', 'categories')
+        view = load_dataframe('activity', False, 'activity_view', False)
+        assert view['end_time'].dtype == 'int64'
+        assert view['total'].dtype == 'float32'
+        assert view['domain'].dtype == 'category'
+        assert view['info'].dtype == 'object'
+        categories = load_dataframe(
+            'activity', False, 'categories', False,
+            columns=['category', 'SUM(total) AS total'],
+            group_by=['category']
+        )
+        assert categories['category'].dtype == 'category'
+        assert categories['total'].dtype == 'float32'
+        totals = load_dataframe('activity', False, 'totals', False)
+        assert totals['Work'].dtype == 'float32'
+        assert totals['weekday'].dtype == 'category'
+    finally:
+        use_storage(previous).close()
+
+    # A year of events, 1000 a day, as read row by row
+    rng = np.random.default_rng(0)
+    rows = 365 * 1000
+    start = np.sort(rng.integers(1704067200, 1735689600, rows))
+    duration = rng.integers(1, 600, rows)
+    days = pd.date_range('2024-01-01', periods=366).strftime('%Y-%m-%d')
+    year = pd.DataFrame({
+        'start_time': start.astype(object),
+        'end_time': (start + duration).astype(object),
+        'process_name': [f'app{i}.exe' for i in rng.integers(0, 40, rows)],
+        'domain': [f'site{i}.com' for i in rng.integers(0, 200, rows)],
+        'day': days[(start - 1704067200) // 86400].to_numpy(dtype=object),
+        'duration': duration, 'total': duration / 3600
+    })
+    typed = cast_columns(year, TABLE_TYPES['activity_view'])
+    assert typed.memory_usage(deep=True).sum() * 5 < \
+        year.memory_usage(deep=True).sum()
+    keys = ['process_name', 'domain', 'day']
+    expected = year.groupby(keys)['duration'].sum()
+    result = typed.groupby(keys, observed=True)['duration'].sum()
+    assert result.to_dict() == expected.to_dict()
+
+    # Integer columns holding NULL are left as loaded
+    frame = cast_columns(
+        pd.DataFrame({'start_time': [1.0, None]}), {'start_time': 'int64'})
+    assert frame['start_time'].dtype == 'float64'
@@ -28,6 +28,90 @@ def test_flake8_helper_io() -> None:
     assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
 
 
+def test_flake8_helper_database() -> None:
+    """Ensures helper_database passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_database.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_heartbeat() -> None:
+    """Ensures helper_heartbeat passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_heartbeat.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_session() -> None:
+    """Ensures helper_session passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_session.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_storage() -> None:
+    """Ensures helper_storage passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_storage.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_writer() -> None:
+    """Ensures helper_writer passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_writer.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_hot() -> None:
+    """Ensures helper_hot passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_hot.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_partitions() -> None:
+    """Ensures helper_partitions passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_partitions.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_archive() -> None:
+    """Ensures helper_archive passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_archive.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_changes() -> None:
+    """Ensures helper_changes passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_changes.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_trace() -> None:
+    """Ensures helper_trace passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_trace.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_snapshot() -> None:
+    """Ensures helper_snapshot passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_snapshot.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_helper_samples() -> None:
+    """Ensures helper_samples passes flake8 specifications."""
+    file = os.path.join(src_folder, "helper_samples.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
 def test_flake8_helper_server() -> None:
     """Ensures helper_server passes flake8 specifications."""
     file = os.path.join(src_folder, "helper_server.py")
@@ -84,6 +168,20 @@ def test_flake8_layout_inputs() -> None:
     assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
 
 
+def test_flake8_layout_search() -> None:
+    """Ensures layout_search passes flake8 specifications."""
+    file = os.path.join(pages_folder, "layout_search.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
+def test_flake8_layout_queries() -> None:
+    """Ensures layout_queries passes flake8 specifications."""
+    file = os.path.join(pages_folder, "layout_queries.py")
+    result = flake8.get_style_guide().check_files([file])
+    assert result.total_errors == 0, result.get_statistics(('F', 'E', 'W'))
+
+
 def test_flake8_layout_dashboard() -> None:
     """Ensures layout_dashboard passes flake8 specifications."""
     file = os.path.join(pages_folder, "layout_dashboard.py")
@@ -28,6 +28,90 @@ def test_pylint_helper_io() -> None:
     assert result.global_note == 10, result.by_msg
 
 
+def test_pylint_helper_database() -> None:
+    """Ensures helper_database passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_database.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_heartbeat() -> None:
+    """Ensures helper_heartbeat passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_heartbeat.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_session() -> None:
+    """Ensures helper_session passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_session.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_storage() -> None:
+    """Ensures helper_storage passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_storage.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_writer() -> None:
+    """Ensures helper_writer passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_writer.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_hot() -> None:
+    """Ensures helper_hot passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_hot.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_partitions() -> None:
+    """Ensures helper_partitions passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_partitions.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_archive() -> None:
+    """Ensures helper_archive passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_archive.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_changes() -> None:
+    """Ensures helper_changes passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_changes.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_trace() -> None:
+    """Ensures helper_trace passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_trace.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_snapshot() -> None:
+    """Ensures helper_snapshot passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_snapshot.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_helper_samples() -> None:
+    """Ensures helper_samples passes pylint specifications."""
+    file = os.path.join(src_folder, "helper_samples.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
 def test_pylint_helper_server() -> None:
     """Ensures helper_server passes pylint specifications."""
     file = os.path.join(src_folder, "helper_server.py")
@@ -84,6 +168,20 @@ def test_pylint_layout_inputs() -> None:
     assert result.global_note == 10, result.by_msg
 
 
+def test_pylint_layout_search() -> None:
+    """Ensures layout_search passes pylint specifications."""
+    file = os.path.join(pages_folder, "layout_search.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
+def test_pylint_layout_queries() -> None:
+    """Ensures layout_queries passes pylint specifications."""
+    file = os.path.join(pages_folder, "layout_queries.py")
+    result = Run([file], exit=False).linter.stats
+    assert result.global_note == 10, result.by_msg
+
+
 def test_pylint_layout_dashboard() -> None:
     """Ensures layout_dashboard passes pylint specifications."""
     file = os.path.join(pages_folder, "layout_dashboard.py")